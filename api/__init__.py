@@ -1,5 +1,7 @@
-from api.routes import send_msg_router
+from api.routes import send_msg_router, metrics_router, bookings_router
 
 __all__ = [
-    "send_msg_router"
-]
\ No newline at end of file
+    "send_msg_router",
+    "metrics_router",
+    "bookings_router"
+]
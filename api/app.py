@@ -1,19 +1,38 @@
 from contextlib import asynccontextmanager
-from api import send_msg_router
+from api import send_msg_router, metrics_router, bookings_router
+from api.common import JSONResponse, Request, status
+from api.rate_limit import rate_limit_middleware
 from fastapi import FastAPI
 from config import settings
 
 from components import MechaniGoAgent, MechaniGoContext, UserInfoContext
 from components.sub_agents import MechanicAgent, BookingAgent
-from components.utils import SessionHandler, ToolRegistry
+from components.utils import (
+    SessionHandler,
+    TieredSession,
+    ToolRegistry,
+    get_supabase_client,
+    prewarm_connections,
+    close_http_client,
+    get_summarizer
+)
+from components.tools import get_openai_client
+from components.tools.booking import get_booking_outbox
+from components.tools.knowledge import warm_knowledge_indexes
 from components.schemas import User
 from dataclasses import dataclass
-from typing import Tuple, Dict
+from typing import Any, Callable, Dict, Optional
+import logging
+import inspect
+import asyncio
+import time
 import uuid
 import os
 
 os.environ.setdefault("OPENAI_API_KEY", settings.OPENAI_API_KEY)
 
+logger = logging.getLogger(__name__)
+
 REQUIRED_TOOLS = {
     "booking_agent",
     "mechanic_agent",
@@ -24,80 +43,159 @@ REQUIRED_TOOLS = {
 class AgentState:
     session: SessionHandler
     context: MechaniGoContext
+
+@dataclass
+class SharedAgents:
     mechanic_agent: MechanicAgent
     booking_agent: BookingAgent
 
+# Per-worker cache only; the context itself is synced through the session store
+# (`SessionHandler.load_context`/`stage_context`), so any worker can serve any user.
 _AGENT_STATE: Dict[str, AgentState] = {}
+_SHARED_AGENTS: Optional[SharedAgents] = None
 
-def _initialize_session_context_and_sub_agents(session_id: str, user_id: str) -> Tuple[SessionHandler, MechaniGoContext]:
+def _initialize_session_context(session_id: str, user_id: str) -> AgentState:
     """
-    Helper method that initializes the session, context, and sub-agents during app startup.
+    Helper method that initializes the per-user session and context.
     """
-    model = "gpt-4.1-mini" # Sub-agents use mini
     resolved_user_id = user_id or session_id
 
-    session = SessionHandler(session_id=session_id) # session_id == user_id
+    session_cls = TieredSession if settings.SESSION_TIERED_STORE else SessionHandler
+    session = session_cls(session_id=session_id) # session_id == user_id
     ctx = MechaniGoContext(
         user_ctx=UserInfoContext(
             user_memory=User(uid=resolved_user_id)
         )
     )
+    return AgentState(session=session, context=ctx)
 
-    mechanic_agent = MechanicAgent(
-        api_key=settings.OPENAI_API_KEY,
-        model=settings.OPENAI_MODEL
-    )
-
-    booking_agent = BookingAgent(
-        api_key=settings.OPENAI_API_KEY,
-        model=model,
-        context=ctx
-    )
+def _build_shared_agents() -> SharedAgents:
+    """
+    Build the sub-agents once per process and register them as tools.
 
-    return AgentState(
-        session=session,
-        context=ctx,
-        mechanic_agent=mechanic_agent,
-        booking_agent=booking_agent
-    )
+    Sub-agents hold no per-user state: the booking agent reads the booking state from the
+    run context, so every session can share the same instances.
+    """
+    global _SHARED_AGENTS
+    if _SHARED_AGENTS is None:
+        mechanic_agent = MechanicAgent(
+            api_key=settings.OPENAI_API_KEY,
+            model=settings.OPENAI_MODEL
+        )
+        booking_agent = BookingAgent(
+            api_key=settings.OPENAI_API_KEY,
+            model="gpt-4.1-mini" # Sub-agents use mini
+        )
 
-def _register_agents(state: AgentState) -> None:
-    ToolRegistry.register_tool(
-        "mechanic_agent",
-        state.mechanic_agent.as_tool,
-        category="agent",
-        description=state.mechanic_agent.get_handoff_description()
-    )
+        ToolRegistry.register_tool(
+            "mechanic_agent",
+            mechanic_agent.as_tool,
+            category="agent",
+            description=mechanic_agent.get_handoff_description()
+        )
 
-    ToolRegistry.register_tool(
-        "booking_agent",
-        state.booking_agent.as_tool,
-        category="agent",
-        description=state.booking_agent.get_handoff_description()
-    )
+        ToolRegistry.register_tool(
+            "booking_agent",
+            booking_agent.as_tool,
+            category="agent",
+            description=booking_agent.get_handoff_description()
+        )
+        _SHARED_AGENTS = SharedAgents(mechanic_agent=mechanic_agent, booking_agent=booking_agent)
+    return _SHARED_AGENTS
 
 def _missing_tools() -> set[str]:
     registered = set(ToolRegistry.list_tools().keys())
     return REQUIRED_TOOLS - registered
 
-# used for dev (health check)
-def _warm_tools(app: FastAPI):
-    if _missing_tools():
-        app.state.agent_factory(user_id="health_check")
+async def _timed(report: Dict[str, Any], step: str, func: Callable[[], Any]) -> Any:
+    start = time.perf_counter()
+    try:
+        result = func()
+        if inspect.isawaitable(result):
+            result = await result
+        report[step] = {"ok": True, "seconds": round(time.perf_counter() - start, 3)}
+        return result
+    except Exception as e:
+        logger.warning("Warm-up step %s failed: %s", step, e)
+        report[step] = {"ok": False, "seconds": round(time.perf_counter() - start, 3), "error": str(e)}
+
+async def warm_up(app: FastAPI) -> None:
+    """
+    Pay the cold-start costs: clients, shared agents, knowledge indexes and pooled
+    connections. Runs in the background from `lifespan`; marks the app ready when done.
+
+    Each step is recorded in `app.state.warmup` as it finishes, so `/ready` shows progress.
+    Failed optional steps are retried lazily on first use; the app only stays unready if the
+    required tools couldn't be registered.
+    """
+    report: Dict[str, Any] = app.state.warmup
+    openai_client = await _timed(report, "openai_client", get_openai_client)
+    await _timed(report, "supabase_client", get_supabase_client)
+    await _timed(report, "shared_agents", _build_shared_agents)
+    await _timed(report, "knowledge_indexes", lambda: asyncio.to_thread(warm_knowledge_indexes))
+    await _timed(report, "connections", lambda: prewarm_connections([
+        str(openai_client.base_url) if openai_client else None,
+        settings.SUPABASE_URL
+    ]))
+    app.state.ready = not _missing_tools()
+    logger.info("Warm-up finished (ready=%s): %s", app.state.ready, report)
+
+class InFlightTracker:
+    """
+    Counts requests being handled so a stopping worker can wait for them to finish.
+    """
+    def __init__(self):
+        self.count = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def enter(self) -> None:
+        self.count += 1
+        self._idle.clear()
+
+    def exit(self) -> None:
+        self.count -= 1
+        if self.count <= 0:
+            self.count = 0
+            self._idle.set()
+
+    async def wait_idle(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+_IN_FLIGHT = InFlightTracker()
+
+async def drain(timeout: float = settings.API_GRACEFUL_TIMEOUT_SECONDS) -> None:
+    """
+    Graceful shutdown: wait for in-flight turns, then flush every session's pending
+    history and context writes so nothing staged in this worker is lost.
+    """
+    if not await _IN_FLIGHT.wait_idle(timeout):
+        logger.warning("Shutdown drain timed out with %d turns still in flight", _IN_FLIGHT.count)
+    results = await asyncio.gather(
+        *(state.session.persist_items() for state in _AGENT_STATE.values()),
+        return_exceptions=True
+    )
+    failed = [r for r in results if isinstance(r, Exception)]
+    if failed:
+        logger.warning("%d session writes failed during shutdown: %s", len(failed), failed[0])
+    logger.info("Drained %d sessions", len(results))
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     def agent_factory(user_id: str | None) -> MechaniGoAgent:
-        # Initialize and register the sub-agents on startup
         session_id = user_id or f"anon-{uuid.uuid4()}"
         state = _AGENT_STATE.get(session_id)
         if state is None:
-            state = _initialize_session_context_and_sub_agents(
+            state = _initialize_session_context(
                 session_id=session_id,
                 user_id=user_id
             )
             _AGENT_STATE[session_id] = state
-        _register_agents(state)
+        _build_shared_agents()
         return MechaniGoAgent(
             api_key=settings.OPENAI_API_KEY,
             model=settings.OPENAI_MODEL,
@@ -107,8 +205,20 @@ async def lifespan(app: FastAPI):
         )
 
     app.state.agent_factory = agent_factory
-    _warm_tools(app)
+    app.state.ready = False
+    app.state.warmup = {}
+    # Serve while warming up: /ready keeps the worker out of rotation until this finishes,
+    # and anything a request needs first is built lazily.
+    app.state.warmup_task = asyncio.create_task(warm_up(app))
+    if settings.BOOKING_OUTBOX_ENABLED:
+        get_booking_outbox().start()
     yield
+    app.state.ready = False
+    app.state.warmup_task.cancel()
+    await drain()
+    await get_booking_outbox().stop()
+    await get_summarizer().stop()
+    await close_http_client()
 
 app = FastAPI(
     lifespan=lifespan,
@@ -116,7 +226,20 @@ app = FastAPI(
     version=settings.APP_VERSION
 )
 
+@app.middleware("http")
+async def track_in_flight(request: Request, call_next):
+    _IN_FLIGHT.enter()
+    try:
+        return await call_next(request)
+    finally:
+        _IN_FLIGHT.exit()
+
+# Added last so it runs first: over-limit requests are rejected before anything else.
+app.middleware("http")(rate_limit_middleware)
+
 app.include_router(send_msg_router, prefix=f"{settings.API_PREFIX}/send", tags=["chatbot"])
+app.include_router(metrics_router, prefix=settings.API_PREFIX, tags=["metrics"])
+app.include_router(bookings_router, prefix=f"{settings.API_PREFIX}/bookings", tags=["bookings"])
 
 if settings.ENV == "development":
     @app.get("/", tags=["health"])
@@ -143,7 +266,6 @@ if settings.ENV == "development":
 
     @app.get("/health", tags=["health"])
     def health_check():
-        _warm_tools(app)
         missing = _missing_tools()
         warnings = []
         errors = []
@@ -168,6 +290,28 @@ if settings.ENV == "development":
             "error": errors
         }
 
+@app.get("/ready", tags=["health"])
+def readiness():
+    """
+    Readiness probe: 503 while the startup warm-up is still running, or if it finished
+    without registering the required tools.
+    """
+    ready = getattr(app.state, "ready", False)
+    task = getattr(app.state, "warmup_task", None)
+    if ready:
+        state = "ready"
+    elif task is None or not task.done():
+        state = "warming_up"
+    else:
+        state = "not_ready"
+    return JSONResponse(
+        content={
+            "status": state,
+            "warmup": getattr(app.state, "warmup", {})
+        },
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
 @app.get("/")
 def root():
     return {
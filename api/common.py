@@ -8,9 +8,7 @@ from fastapi import (
     status
 )
 from fastapi.responses import JSONResponse
-import pytz
-
-PH_TZ = pytz.timezone("Asia/Manila")
+from config import PH_TZ
 
 __all__ = [
     "BackgroundTasks",
@@ -20,5 +18,6 @@ __all__ = [
     "Request",
     "Depends",
     "Query",
-    "status"
+    "status",
+    "PH_TZ"
 ]
\ No newline at end of file
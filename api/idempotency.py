@@ -0,0 +1,127 @@
+"""
+Idempotent request handling for `POST /send-message`.
+
+Clients that time out and retry would otherwise start a new LLM chain for a message that
+is still being processed. Requests are keyed by the `Idempotency-Key` header (or, without
+one, a hash of session + message): a duplicate that arrives while the original is running
+attaches to the same computation (singleflight). Only requests with an explicit key get the
+cached result once the original finished; without one, a repeated message ("oo", "salamat")
+is a new turn and must get a fresh reply.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import asyncio
+import time
+
+from config import settings
+
+_STATS = {
+    "computed": 0,
+    "joined_in_flight": 0,
+    "replayed": 0
+}
+
+
+def request_key(session_id: str, message: str, header_key: Optional[str] = None) -> Tuple[str, float]:
+    """
+    Build the dedupe key and replay TTL for a request.
+
+    Keys are always scoped to the session so one user's key can never replay another's reply.
+
+    :return: `(key, ttl_seconds)`; implicit keys get a TTL of 0 (in-flight dedupe only).
+    :rtype: Tuple[str, float]
+    """
+    if header_key:
+        raw, ttl = f"key:{session_id}:{header_key.strip()}", settings.IDEMPOTENCY_TTL_SECONDS
+    else:
+        raw, ttl = f"msg:{session_id}:{message.strip()}", 0.0
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest(), ttl
+
+
+class IdempotencyCache:
+    """
+    Singleflight + short-lived result cache, per worker process.
+    """
+    def __init__(self, max_entries: int = settings.IDEMPOTENCY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._results: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def _cached(self, key: str) -> Optional[Tuple[float, Any]]:
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._results[key]
+            return None
+        self._results.move_to_end(key)
+        return entry
+
+    def _finish(self, key: str, task: asyncio.Task, ttl: float) -> None:
+        self._in_flight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return # failures are never replayed; the next retry computes again
+        if ttl <= 0:
+            return
+        self._results[key] = (time.monotonic() + ttl, task.result())
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    def forget(self, key: str) -> None:
+        """
+        Drop a stored result so the next request with `key` computes again.
+        """
+        self._results.pop(key, None)
+
+    async def run(self, key: str, compute: Callable[[], Awaitable[Any]], ttl: float) -> Tuple[Any, bool]:
+        """
+        Return the result for `key`, computing it at most once.
+
+        :param key: Dedupe key from `request_key`.
+        :type key: str
+        :param compute: Produces the result; only called when nothing is cached or in flight.
+        :type compute: Callable[[], Awaitable[Any]]
+        :param ttl: How long a successful result is replayed; 0 only joins in-flight duplicates.
+        :type ttl: float
+        :return: `(result, replayed)`; `replayed` is True for joined or cached results.
+        :rtype: Tuple[Any, bool]
+        """
+        cached = self._cached(key)
+        if cached is not None:
+            _STATS["replayed"] += 1
+            return cached[1], True
+
+        task = self._in_flight.get(key)
+        replayed = task is not None
+        if task is None:
+            # Own task so the computation survives the original client disconnecting.
+            task = asyncio.create_task(compute())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t, ttl))
+            _STATS["computed"] += 1
+        else:
+            _STATS["joined_in_flight"] += 1
+        return await asyncio.shield(task), replayed
+
+    def size(self) -> int:
+        return len(self._results)
+
+
+_cache: Optional[IdempotencyCache] = None
+
+
+def get_idempotency_cache() -> IdempotencyCache:
+    global _cache
+    if _cache is None:
+        _cache = IdempotencyCache()
+    return _cache
+
+
+def get_idempotency_stats() -> Dict[str, int]:
+    return {
+        **_STATS,
+        "in_flight": len(_cache._in_flight) if _cache else 0,
+        "cached": _cache.size() if _cache else 0
+    }
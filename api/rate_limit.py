@@ -0,0 +1,134 @@
+"""
+Token-bucket rate limiting for the chat endpoints.
+
+Runs as HTTP middleware, so an over-limit request gets a fast 429 with `Retry-After`
+before routing, `get_agent` or any model/Supabase call happens. Each request must fit
+both its user's bucket (keyed by `X-User-Id`, or client IP) and the worker-wide bucket.
+"""
+from typing import Awaitable, Callable, Dict, Optional
+from collections import OrderedDict
+import math
+import time
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from config import settings
+
+_STATS = {
+    "allowed": 0,
+    "limited_user": 0,
+    "limited_global": 0
+}
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `capacity` tokens, refilled continuously at `rate` per second.
+    """
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: Optional[float] = None) -> float:
+        """
+        Seconds until one token is available (0 if available now).
+        """
+        self._refill(now or time.monotonic())
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        user_rate: float = settings.RATE_LIMIT_USER_PER_MINUTE / 60,
+        user_burst: int = settings.RATE_LIMIT_USER_BURST,
+        global_rate: float = settings.RATE_LIMIT_GLOBAL_PER_SECOND,
+        global_burst: int = settings.RATE_LIMIT_GLOBAL_BURST,
+        max_users: int = settings.RATE_LIMIT_MAX_TRACKED_USERS
+    ):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_users = max_users
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self._users: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def _user_bucket(self, key: str) -> TokenBucket:
+        bucket = self._users.get(key)
+        if bucket is None:
+            bucket = self._users[key] = TokenBucket(self.user_rate, self.user_burst)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        self._users.move_to_end(key)
+        return bucket
+
+    def check(self, key: str) -> Optional[float]:
+        """
+        Admit one request for `key`, consuming a token from both buckets.
+
+        :return: None if admitted, else the seconds to wait before retrying.
+        :rtype: Optional[float]
+        """
+        now = time.monotonic()
+        user_bucket = self._user_bucket(key)
+        user_wait = user_bucket.wait_time(now)
+        if user_wait > 0:
+            _STATS["limited_user"] += 1
+            return user_wait
+        global_wait = self.global_bucket.wait_time(now)
+        if global_wait > 0:
+            _STATS["limited_global"] += 1
+            return global_wait
+        user_bucket.take()
+        self.global_bucket.take()
+        _STATS["allowed"] += 1
+        return None
+
+    def tracked_users(self) -> int:
+        return len(self._users)
+
+
+_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _limiter
+    if _limiter is None:
+        _limiter = RateLimiter()
+    return _limiter
+
+
+def get_rate_limit_stats() -> Dict[str, int]:
+    return {**_STATS, "tracked_users": _limiter.tracked_users() if _limiter else 0}
+
+
+async def rate_limit_middleware(
+    request: Request,
+    call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    if not settings.RATE_LIMIT_ENABLED or not request.url.path.startswith(f"{settings.API_PREFIX}/send"):
+        return await call_next(request)
+
+    user_id = (request.headers.get("X-User-Id") or "").strip()
+    key = f"user:{user_id}" if user_id else f"ip:{request.client.host if request.client else 'unknown'}"
+    wait = get_rate_limiter().check(key)
+    if wait is None:
+        return await call_next(request)
+
+    retry_after = max(1, math.ceil(wait))
+    return JSONResponse(
+        content={"message": "Too many requests. Please try again shortly."},
+        status_code=429,
+        headers={"Retry-After": str(retry_after)}
+    )
@@ -1,5 +1,9 @@
 from api.routes.send_message import router as send_msg_router
+from api.routes.metrics import router as metrics_router
+from api.routes.bookings import router as bookings_router
 
 __all__ = [
-    "send_msg_router"
-]
\ No newline at end of file
+    "send_msg_router",
+    "metrics_router",
+    "bookings_router"
+]
@@ -0,0 +1,15 @@
+from api.common import APIRouter, HTTPException, status
+
+from components.tools.booking import get_booking_outbox
+
+router = APIRouter()
+
+@router.get("/outbox/{delivery_id}")
+async def outbox_status(delivery_id: str):
+    """
+    Delivery status of a booking queued by `save_user_info` in outbox mode.
+    """
+    record = await get_booking_outbox().get_status(delivery_id)
+    if record is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown delivery id.")
+    return record
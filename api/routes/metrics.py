@@ -0,0 +1,49 @@
+from api.common import APIRouter
+from api.turn_queue import get_turn_queue_stats
+from api.idempotency import get_idempotency_stats
+from api.rate_limit import get_rate_limit_stats
+
+from components.tools.extraction import get_extraction_stats
+from components.tools.booking import get_booking_stats, get_booking_outbox
+from components.utils import (
+    get_run_monitor_stats,
+    get_pool_stats,
+    get_llm_scheduler_stats,
+    get_deadline_stats,
+    get_hedging_stats,
+    get_circuit_breaker_stats,
+    get_session_stats,
+    get_tiered_session_stats,
+    get_history_window_stats,
+    get_history_compaction_stats,
+    get_prompt_cache_stats,
+    get_usage_stats,
+    get_summarizer_stats
+)
+from config import settings
+
+router = APIRouter()
+
+@router.get("/metrics")
+async def metrics():
+    return {
+        "extraction": get_extraction_stats(),
+        "booking": get_booking_stats(),
+        "booking_outbox": await get_booking_outbox().stats() if settings.BOOKING_OUTBOX_ENABLED else {},
+        "run_monitor": get_run_monitor_stats(),
+        "http_pool": get_pool_stats(),
+        "llm_scheduler": get_llm_scheduler_stats(),
+        "turn_queue": get_turn_queue_stats(),
+        "idempotency": get_idempotency_stats(),
+        "rate_limit": get_rate_limit_stats(),
+        "deadline": get_deadline_stats(),
+        "hedging": get_hedging_stats(),
+        "circuit_breakers": get_circuit_breaker_stats(),
+        "session": get_session_stats(),
+        "session_tiers": get_tiered_session_stats(),
+        "history_window": get_history_window_stats(),
+        "history_compaction": get_history_compaction_stats(),
+        "prompt_cache": get_prompt_cache_stats(),
+        "usage": get_usage_stats(),
+        "summarizer": get_summarizer_stats()
+    }
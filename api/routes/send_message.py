@@ -8,7 +8,11 @@ from api.common import (
     status
 )
 
+from api.idempotency import get_idempotency_cache, request_key
+from api.turn_queue import get_turn_queue
 from components import MechaniGoAgent
+from components.utils import Deadline, deadline_scope
+from config import settings
 from utils import log_execution_time
 from pydantic import BaseModel
 from typing import Optional
@@ -32,6 +36,7 @@ def get_agent(request: Request, user_id: str | None = Depends(resolve_user_id)):
 @router.post("/send-message")
 @log_execution_time("POST /api/v1/send/send-message")
 async def send(
+    request: Request,
     bg_tasks: BackgroundTasks,
     payload: UserMessagePayload,
     user_id: Optional[str] = Depends(resolve_user_id),
@@ -40,18 +45,52 @@ async def send(
     if not payload.message:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Message is required.")
 
+    # Starts at arrival so time spent queued behind the session's previous turn counts too.
+    deadline = Deadline.after(settings.REQUEST_DEADLINE_SECONDS)
+
     try:
         session_id = getattr(agent.session, "session_id", user_id)
-        result = await agent.inquire(inquiry=payload.message)
-        bg_tasks.add_task(agent.session.persist_items)
-        return JSONResponse(
-            content={
+
+        async def inquire(inquiry: str):
+            with deadline_scope(deadline):
+                return await agent.inquire(inquiry)
+
+        async def run_turn() -> dict:
+            # Serialized per session; a burst of messages is answered by one merged turn.
+            turn = await get_turn_queue().submit(session_id, payload.message, inquire)
+            if turn.merged:
+                # The reply goes only to the request carrying the burst's last message.
+                return {
+                    "response": None,
+                    "session_id": session_id,
+                    "user_id": user_id,
+                    "turn_id": turn.turn_id,
+                    "batch_size": turn.batch_size,
+                    "merged": True
+                }
+            result = turn.result
+            return {
                 "response": result.response,
                 "session_id": session_id,
                 "user_id": user_id,
                 "model": result.model,
-                "usage": result.usage.model_dump()
+                "usage": result.usage.model_dump(),
+                "turn_id": turn.turn_id,
+                "batch_size": turn.batch_size,
+                "merged": False,
+                "degraded": result.degraded
             }
+
+        # Client retries attach to the in-flight turn or replay its result instead of rerunning it.
+        key, ttl = request_key(session_id, payload.message, request.headers.get("Idempotency-Key"))
+        content, replayed = await get_idempotency_cache().run(key, run_turn, ttl)
+        if content.get("degraded"):
+            # A retry should get a real answer, not a replay of the fallback.
+            get_idempotency_cache().forget(key)
+        bg_tasks.add_task(agent.session.persist_items)
+        return JSONResponse(
+            content=content,
+            headers={"Idempotent-Replayed": "true"} if replayed else None
         )
     except Exception as e:
         return JSONResponse(
@@ -0,0 +1,164 @@
+"""
+Per-session turn queue.
+
+Turns for the same session run one at a time, so concurrent requests never race on the
+session's pending history writes. Messages that arrive in a quick burst ("hi", "yung aircon
+ko", "hindi lumalamig") are debounced and merged into a single inquiry: one guardrail +
+agent run answers the whole burst. The reply goes to the request carrying the burst's last
+message; the earlier ones are told their message was merged into that turn.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+import time
+import uuid
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+RunTurn = Callable[[str], Awaitable[Any]]
+
+_STATS = {
+    "messages": 0,
+    "turns": 0,
+    "merged_messages": 0,
+    "failed_turns": 0
+}
+
+
+@dataclass
+class TurnResult:
+    result: Any
+    turn_id: str
+    batch_size: int
+    merged: bool = False # answered by a later message's reply; `result` is None
+
+
+@dataclass
+class _PendingMessage:
+    text: str
+    future: asyncio.Future
+    arrived: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _SessionLane:
+    buffer: List[_PendingMessage] = field(default_factory=list)
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    run: Optional[RunTurn] = None
+    worker: Optional[asyncio.Task] = None
+
+
+class TurnQueue:
+    """
+    Serializes turns per session and merges message bursts into one turn.
+
+    :param debounce: Quiet period (seconds) that closes a burst.
+    :param max_wait: Longest the first message of a burst waits before its turn runs.
+    :param max_batch: Max messages merged into one turn.
+    """
+    def __init__(
+        self,
+        debounce: float = settings.TURN_DEBOUNCE_SECONDS,
+        max_wait: float = settings.TURN_DEBOUNCE_MAX_SECONDS,
+        max_batch: int = settings.TURN_MAX_BATCH_MESSAGES
+    ):
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self.max_batch = max(1, max_batch)
+        self._lanes: Dict[str, _SessionLane] = {}
+
+    async def submit(self, session_id: str, message: str, run: RunTurn) -> TurnResult:
+        """
+        Queue a message for the session and wait for the turn that answers it.
+
+        :param session_id: Session the message belongs to.
+        :type session_id: str
+        :param message: Raw user message.
+        :type message: str
+        :param run: Runs one turn for the (possibly merged) inquiry, e.g. `agent.inquire`.
+        :type run: Callable[[str], Awaitable[Any]]
+        :return: The turn's result, or a `merged` marker (same `turn_id`, no result) if a
+            later message of the same burst carries the reply.
+        :rtype: TurnResult
+        """
+        lane = self._lanes.get(session_id)
+        if lane is None:
+            lane = self._lanes[session_id] = _SessionLane()
+
+        pending = _PendingMessage(text=message, future=asyncio.get_running_loop().create_future())
+        lane.buffer.append(pending)
+        lane.run = run
+        lane.wakeup.set()
+        _STATS["messages"] += 1
+
+        if lane.worker is None or lane.worker.done():
+            lane.worker = asyncio.create_task(self._process(session_id, lane))
+        # Shielded: a client disconnect mustn't cancel a turn other requests are waiting on.
+        return await asyncio.shield(pending.future)
+
+    async def _collect_burst(self, lane: _SessionLane) -> None:
+        first = lane.buffer[0].arrived
+        while len(lane.buffer) < self.max_batch and self.debounce > 0:
+            deadline = min(lane.buffer[-1].arrived + self.debounce, first + self.max_wait)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            lane.wakeup.clear()
+            try:
+                await asyncio.wait_for(lane.wakeup.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return
+
+    async def _process(self, session_id: str, lane: _SessionLane) -> None:
+        while lane.buffer:
+            await self._collect_burst(lane)
+            batch = lane.buffer[:self.max_batch]
+            del lane.buffer[:self.max_batch]
+
+            inquiry = "\n".join(pending.text for pending in batch)
+            turn_id = uuid.uuid4().hex
+            _STATS["turns"] += 1
+            _STATS["merged_messages"] += len(batch) - 1
+            if len(batch) > 1:
+                logger.info("Merged %d messages into one turn for session %s", len(batch), session_id)
+
+            try:
+                outcome = TurnResult(result=await lane.run(inquiry), turn_id=turn_id, batch_size=len(batch))
+            except Exception as e:
+                _STATS["failed_turns"] += 1
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_exception(e)
+                continue
+
+            merged = TurnResult(result=None, turn_id=turn_id, batch_size=len(batch), merged=True)
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_result(outcome if pending is batch[-1] else merged)
+
+        # No await between the empty check and here, so no message can slip in unprocessed.
+        if self._lanes.get(session_id) is lane:
+            del self._lanes[session_id]
+
+    def active_sessions(self) -> int:
+        return len(self._lanes)
+
+
+_turn_queue: Optional[TurnQueue] = None
+
+
+def get_turn_queue() -> TurnQueue:
+    global _turn_queue
+    if _turn_queue is None:
+        _turn_queue = TurnQueue()
+    return _turn_queue
+
+
+def get_turn_queue_stats() -> Dict[str, int]:
+    return {
+        **_STATS,
+        "active_sessions": _turn_queue.active_sessions() if _turn_queue else 0
+    }
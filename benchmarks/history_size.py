@@ -0,0 +1,218 @@
+"""
+Session history size benchmark.
+
+Runs sample sessions through a session the way a run does (its input, then each step's new
+items via `add_items`, then `end_turn`, which compacts the turn) and reports the bytes and
+estimated tokens of the turn items before and after compaction, per session and in total.
+Run from the repo root:
+
+    python benchmarks/history_size.py
+    python benchmarks/history_size.py --sessions sessions.json   # exported real sessions
+
+`--sessions` takes a JSON object mapping a session name to a list of turns, each turn a
+list of input items (e.g. `[item.to_input_item() for item in result.new_items]`).
+"""
+from pathlib import Path
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import json
+import sys
+import os
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Settings require these; the values are never used for network calls here.
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_API_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+
+from components.utils.SessionHandler import SessionHandler  # noqa: E402
+from components.utils.history_compaction import get_history_compaction_stats  # noqa: E402
+
+Turn = List[Dict[str, Any]]
+
+_MEASURED = ("items_in", "items_out", "bytes_in", "bytes_out", "tokens_in", "tokens_out")
+
+
+class _BenchmarkSession(SessionHandler):
+    """
+    Session whose collected items go nowhere (no Supabase writes).
+    """
+    async def persist_items(self):
+        self._pending_items = []
+
+
+def _user(text: str) -> Dict[str, Any]:
+    return {"role": "user", "content": text}
+
+
+def _reply(n: str, text: str) -> Dict[str, Any]:
+    return {
+        "id": f"msg_{n}",
+        "type": "message",
+        "role": "assistant",
+        "status": "completed",
+        "content": [{"type": "output_text", "text": text, "annotations": []}]
+    }
+
+
+def _reasoning(n: str) -> Dict[str, Any]:
+    return {"id": f"rs_{n}", "type": "reasoning", "summary": [], "encrypted_content": "gAAAAB" + "x" * 600}
+
+
+def _tool(n: str, name: str, arguments: Dict[str, Any], output: str) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": f"fc_{n}",
+            "type": "function_call",
+            "call_id": f"call_{n}",
+            "name": name,
+            "arguments": json.dumps(arguments),
+            "status": "completed"
+        },
+        {"type": "function_call_output", "call_id": f"call_{n}", "output": output}
+    ]
+
+
+BOOKING_CONFIRMATION = (
+    "Here are your booking details po:\n"
+    "Name: Juan Dela Cruz\nContact: 0917 123 4567\nAddress: 12 Mabini St, Makati\n"
+    "Car: 2018 Toyota Vios 1.3 E\nService: PMS 20,000 km\nSchedule: Saturday, 9:00 AM\nPayment: GCash\n"
+    "Tama po ba lahat? Reply 'confirm' para ma-book na natin."
+)
+
+DIAGNOSIS = (
+    "Base sa sinabi niyo po (squealing noise when braking, worse in the morning), posibleng "
+    "worn out na ang brake pads o may glazing sa rotors. Hindi pa po ito delikado pero mas "
+    "mabuting ma-check agad. Recommended namin ang brake inspection and cleaning; kung manipis "
+    "na ang pads, papalitan po natin. Gusto niyo po bang mag-book ng inspection?"
+)
+
+
+def sample_sessions() -> Dict[str, List[Turn]]:
+    faq_answer = (
+        "Opo, may home service po kami sa Metro Manila, Cavite, Laguna at Rizal. Walang dagdag "
+        "na bayad para sa home service sa loob ng service area."
+    )
+    faq = [
+        [
+            _user("Hello po, may home service ba kayo sa Cavite?"),
+            _reasoning("1"),
+            *_tool("1", "knowledge_faq_tool", {"query": "home service areas Cavite"}, json.dumps({
+                "answer": faq_answer,
+                "matches": [{"question": "Saan kayo nagse-service?", "score": 0.82},
+                            {"question": "May bayad ba ang home service?", "score": 0.61}]
+            })),
+            _reply("1", faq_answer)
+        ],
+        [
+            _user("Magkano po ang PMS?"),
+            *_tool("2", "knowledge_faq_tool", {"query": "PMS price"}, json.dumps({
+                "answer": "PMS starts at PHP 3,500 for sedans depending on mileage.",
+                "matches": [{"question": "How much is PMS?", "score": 0.9}]
+            })),
+            _reply("2", "Ang PMS po ay nagsisimula sa PHP 3,500 para sa sedan; depende po sa mileage ang final na presyo.")
+        ]
+    ]
+    booking = [
+        [
+            _user("Gusto ko po mag-book ng PMS for Saturday morning"),
+            _reasoning("3"),
+            *_tool("3", "booking_agent", {"input": "Customer wants to book PMS for Saturday morning"},
+                   "Sige po! Para ma-book natin, pakibigay po ng inyong pangalan, contact number, at address."),
+            _reply("3", "Sige po! Para ma-book natin, pakibigay po ng inyong pangalan, contact number, at address.")
+        ],
+        [
+            _user("Juan Dela Cruz, 09171234567, 12 Mabini St Makati. 2018 Vios, GCash"),
+            _reasoning("4"),
+            *_tool("4", "booking_agent", {"input": "Juan Dela Cruz, 09171234567, 12 Mabini St Makati. 2018 Vios, GCash"},
+                   BOOKING_CONFIRMATION),
+            _reply("4", BOOKING_CONFIRMATION)
+        ],
+        [
+            _user("confirm"),
+            *_tool("5", "booking_agent", {"input": "confirm"},
+                   "Booked na po! Reference no. MG-10293. Darating ang mechanic namin sa Saturday, 9:00 AM."),
+            _reply("5", "Booked na po! Reference no. MG-10293. Darating ang mechanic namin sa Saturday, 9:00 AM. Salamat po!")
+        ]
+    ]
+    diagnosis = [
+        [
+            _user("May squealing sound po yung preno ko pag umaga"),
+            _reasoning("6"),
+            *_tool("6", "mechanic_agent", {"input": "Squealing noise when braking, mostly in the morning"},
+                   "Ilang taon na po ang sasakyan at kailan huling napalitan ang brake pads?"),
+            _reply("6", "Ilang taon na po ang sasakyan at kailan huling napalitan ang brake pads?")
+        ],
+        [
+            _user("2016 Mirage po, hindi pa napapalitan since nabili"),
+            _reasoning("7"),
+            *_tool("7", "mechanic_agent", {"input": "2016 Mirage, brake pads never replaced"}, DIAGNOSIS),
+            _reply("7", DIAGNOSIS)
+        ]
+    ]
+    return {"faq": faq, "booking": booking, "diagnosis": diagnosis}
+
+
+def run_steps(turn: Turn) -> List[Turn]:
+    """
+    Split a turn into the batches a run hands to `add_items`: its input, then one per step
+    (a step ends once its tool outputs are in, or with a reply).
+    """
+    inputs = 0
+    while inputs < len(turn) and turn[inputs].get("role") == "user":
+        inputs += 1
+    batches, step = [turn[:inputs]], []
+    for item in turn[inputs:]:
+        step.append(item)
+        if item.get("type") == "function_call_output" or item.get("role") == "assistant":
+            batches.append(step)
+            step = []
+    if step:
+        batches.append(step)
+    return batches
+
+
+async def measure(turns: List[Turn]) -> Dict[str, int]:
+    before = get_history_compaction_stats()
+    session = _BenchmarkSession("benchmark")
+    for turn in turns:
+        for batch in run_steps(turn):
+            await session.add_items(batch)
+        await session.end_turn()
+    after = get_history_compaction_stats()
+    return {key: after[key] - before[key] for key in _MEASURED}
+
+
+def _row(name: str, stats: Dict[str, int]) -> str:
+    saved = 1 - stats["bytes_out"] / stats["bytes_in"] if stats["bytes_in"] else 0.0
+    return (
+        f"{name:<14} {stats['items_in']:>5} -> {stats['items_out']:<5} "
+        f"{stats['bytes_in']:>8} -> {stats['bytes_out']:<8} "
+        f"{stats['tokens_in']:>7} -> {stats['tokens_out']:<7} {saved:6.1%}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=Path, help="JSON file of sessions to measure instead of the samples")
+    args = parser.parse_args()
+
+    sessions = json.loads(args.sessions.read_text()) if args.sessions else sample_sessions()
+
+    print(f"{'session':<14} {'items':>14} {'bytes':>19} {'~tokens':>17} {'saved':>7}")
+    total: Dict[str, int] = {}
+    for name, turns in sessions.items():
+        stats = asyncio.run(measure(turns))
+        print(_row(name, stats))
+        for key, value in stats.items():
+            total[key] = total.get(key, 0) + value
+    if total:
+        print(_row("total", total))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Startup import-time benchmark.
+
+Imports each module in a fresh interpreter (so nothing is cached in `sys.modules`),
+takes the median wall time over a few runs and exits non-zero when any module is
+over its budget. Run from the repo root:
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 7 --scale 1.5   # slower CI machines
+
+Budgets are in seconds and intentionally loose; a failure means something heavy
+(Agents SDK, scikit-learn, Supabase) started loading at import time again.
+"""
+from pathlib import Path
+from typing import Dict, List
+import subprocess
+import statistics
+import argparse
+import sys
+import os
+
+ROOT = Path(__file__).resolve().parent.parent
+
+BUDGETS: Dict[str, float] = {
+    "config": 0.6,
+    "components": 0.8,
+    "components.schemas": 0.8,
+    "components.utils.schedule_parser": 0.8,
+    "api.app": 3.0,
+}
+
+# Modules that must not be loaded by a plain `import components`.
+FORBIDDEN_ON_IMPORT = ("agents", "sklearn", "scipy", "supabase", "openai")
+
+_SNIPPET = """
+import time, sys
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+print(",".join(name for name in {forbidden!r} if name in sys.modules))
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    # Settings require these; the values are never used for network calls here.
+    env.setdefault("OPENAI_API_KEY", "benchmark")
+    env.setdefault("SUPABASE_API_KEY", "benchmark")
+    env.setdefault("SUPABASE_URL", "http://localhost")
+    return env
+
+
+def measure(module: str, runs: int) -> tuple[float, List[str]]:
+    timings: List[float] = []
+    loaded: List[str] = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _SNIPPET.format(module=module, forbidden=FORBIDDEN_ON_IMPORT)],
+            cwd=ROOT,
+            env=_env(),
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip().splitlines()
+        timings.append(float(out[0]))
+        loaded = [name for name in (out[1] if len(out) > 1 else "").split(",") if name]
+    return statistics.median(timings), loaded
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh-interpreter runs per module")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget (for slower machines)")
+    args = parser.parse_args()
+
+    failed = False
+    for module, budget in BUDGETS.items():
+        budget *= args.scale
+        elapsed, loaded = measure(module, args.runs)
+        status = "ok"
+        if elapsed > budget:
+            status, failed = "OVER BUDGET", True
+        if module == "components" and loaded:
+            status, failed = f"HEAVY IMPORTS: {', '.join(loaded)}", True
+        print(f"{module:<36} {elapsed:7.3f}s / {budget:5.2f}s  {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,12 +12,20 @@ from components.utils import (
 from components.schemas import (
     MechaniGoContext,
     UserInfoContext,
+    UsageCollector,
     User
 )
+from components.utils.LLMScheduler import Priority, llm_call_scope
+from components.utils.history_window import history_window
+from components.utils.history_compaction import compact_history
+from components.utils.usage_tracking import count_turn, track_usage
+from components.utils.Summarizer import get_summarizer
+from components.utils.Deadline import DeadlineExceeded, has_budget, within_deadline, mark_degraded
+from components.tools.knowledge import local_faq_answer
 from config import settings
 
-from typing import Optional, List
-from pydantic import BaseModel
+from typing import Any, Dict, Optional, List
+from pydantic import BaseModel, Field
 
 INSTRUCTIONS = """
 You are {name}, the main customer-facing manager agent for MechaniGo.ph.
@@ -240,6 +248,12 @@ class Usage(BaseModel):
     input_tokens: int
     output_tokens: int
     total_tokens: int
+    cached_tokens: int = 0
+    requests: int = 0
+    cost_usd: float = 0.0
+    unpriced_requests: int = 0
+    by_model: Dict[str, Any] = Field(default_factory=dict)
+    by_agent: Dict[str, Any] = Field(default_factory=dict)
 
 class ChatbotResponse(BaseModel):
     response: str
@@ -247,6 +261,7 @@ class ChatbotResponse(BaseModel):
     model_settings: OutputModelSettings
     usage: Usage
     history_items: List[TResponseInputItem]
+    degraded: Optional[str] = None
 
 
 class MechaniGoAgent(AgentFactory):
@@ -336,6 +351,13 @@ class MechaniGoAgent(AgentFactory):
             temperature=self.temperature
         )
 
+    def get_llm_priority(self) -> Priority:
+        # An in-progress booking outranks general chatter when model capacity is constrained.
+        return Priority.BOOKING if self.context.booking.in_progress else Priority.FAQ
+
+    def get_fallback_response(self) -> str:
+        return "Sandali lang po, medyo mabagal ang system namin ngayon. Pakiulit po ang mensahe niyo in a moment."
+
     def builder(self) -> Agent:
         self.agent = super().build()
         return self.agent
@@ -352,28 +374,88 @@ class MechaniGoAgent(AgentFactory):
 
         Notes
         -----
-        Builds the agent if needed, executes via Runner with session/context, stores new history,
-        and surfaces token usage from the first raw response.
+        Builds the agent if needed, rehydrates the context stored by whichever worker handled
+        the previous turn, executes via Runner with session/context (which hands the turn's
+        items to the session, compacted as one batch by `end_turn`), stages the updated context for persistence, and reports the
+        token usage and estimated cost of every model call made for the turn (manager,
+        guardrail, sub-agents, extraction) from the context's usage collector.
+        The run is bound by the request's deadline; when too little of it is left, the turn is
+        answered locally instead (see `_degraded_reply`).
         """
-        response = await Runner.run(
-            starting_agent=self.builder(),
-            input=inquiry,
-            context=self.context,
-            session=self.session
-        )
-
-        new_history_items = response.raw_responses[0].to_input_items()
-        await self.session.collect_items(new_history_items)
+        self.context.usage = UsageCollector()
+        count_turn()
+        if not has_budget(settings.DEADLINE_AGENT_MIN_SECONDS):
+            return await self._degraded_reply(inquiry)
+
+        await self.session.load_context(self.context)
+        user_id = self.user_id or getattr(self.session, "session_id", None)
+        try:
+            with llm_call_scope(priority=self.get_llm_priority(), user_id=user_id):
+                response = await within_deadline(
+                    Runner.run(
+                        starting_agent=self.builder(),
+                        input=inquiry,
+                        context=self.context,
+                        session=self.session,
+                        run_config=self.get_run_config(session_input_callback=history_window(
+                            self.get_history_token_budget(),
+                            agent_name=self.get_name(),
+                            min_turns=settings.HISTORY_MIN_TURNS
+                        ))
+                    ),
+                    stage="agent",
+                    reserve=settings.DEADLINE_RESERVE_SECONDS
+                )
+        except DeadlineExceeded:
+            return await self._degraded_reply(inquiry, run_started=True)
+        except Exception:
+            # Keep what the run got to (at least the user's message) before failing the turn.
+            await self.session.end_turn()
+            raise
+        track_usage(self.context, self.get_name(), self.get_model(), (raw.usage for raw in response.raw_responses))
+
+        # The Runner handed this turn's items to the session step by step; compact them as one.
+        await self.session.end_turn()
+        new_history_items, _ = compact_history([item.to_input_item() for item in response.new_items])
+        await self.session.stage_context(self.context)
+        get_summarizer().after_turn(self.session)
         return ChatbotResponse(
             response=response.final_output,
             model=self.get_model(),
             model_settings=OutputModelSettings(
                 max_tokens=self.agent.model_settings.max_tokens
             ),
-            usage=Usage(
-                input_tokens=response.raw_responses[0].usage.input_tokens,
-                output_tokens=response.raw_responses[0].usage.output_tokens,
-                total_tokens=response.raw_responses[0].usage.total_tokens,
-            ),
+            usage=Usage(**self.context.usage.breakdown()),
             history_items=new_history_items
-        )
\ No newline at end of file
+        )
+
+    async def _degraded_reply(self, inquiry: str, run_started: bool = False) -> ChatbotResponse:
+        """
+        Answer without a model call: the local FAQ match if it's confident enough,
+        otherwise the short "sandali lang po" fallback.
+
+        :param inquiry: The user's message.
+        :type inquiry: str
+        :param run_started: Whether `Runner.run` was cancelled after it began; it has then
+            already handed the user's message to the session, so only the reply is added.
+        :type run_started: bool
+        """
+        answer = local_faq_answer(inquiry, settings.DEADLINE_FAQ_MIN_SCORE)
+        degraded = "local_faq" if answer else "fallback"
+        mark_degraded(degraded)
+
+        history_items: List[TResponseInputItem] = [
+            {"role": "user", "content": inquiry},
+            {"role": "assistant", "content": answer or self.get_fallback_response()}
+        ]
+        await self.session.end_turn(history_items[1:] if run_started else history_items)
+        await self.session.stage_context(self.context)
+        return ChatbotResponse(
+            response=answer or self.get_fallback_response(),
+            model="local",
+            model_settings=OutputModelSettings(max_tokens=self.max_tokens),
+            # Calls made before the deadline ran out (guardrail, sub-agents) still count.
+            usage=Usage(**self.context.usage.breakdown()),
+            history_items=history_items,
+            degraded=degraded
+        )
@@ -1,10 +1,25 @@
+from typing import TYPE_CHECKING
 from components.schemas import MechaniGoContext, UserInfoContext
-from components.MechaniGoAgent import MechaniGoAgent
-from components.utils import AgentFactory
+from components.lazy import lazy_exports
 
-import components.tools.extraction as extraction_tools
-import components.tools.knowledge as knowledge_tools
-import components.tools.booking as booking_tools
+import components.tools # declares the tool manifest; tool modules themselves load lazily
+
+_EXPORTS = {
+    "MechaniGoAgent": ("components.MechaniGoAgent", "MechaniGoAgent"),
+    "AgentFactory": ("components.utils.AgentFactory", "AgentFactory"),
+    "extraction_tools": ("components.tools.extraction", None),
+    "knowledge_tools": ("components.tools.knowledge", None),
+    "booking_tools": ("components.tools.booking", None)
+}
+
+__getattr__, __dir__ = lazy_exports(globals(), _EXPORTS)
+
+if TYPE_CHECKING:
+    from components.MechaniGoAgent import MechaniGoAgent
+    from components.utils import AgentFactory
+    import components.tools.extraction as extraction_tools
+    import components.tools.knowledge as knowledge_tools
+    import components.tools.booking as booking_tools
 
 __all__ = [
     "extraction_tools",
@@ -14,4 +29,4 @@ __all__ = [
     "MechaniGoContext",
     "MechaniGoAgent",
     "AgentFactory"
-]
\ No newline at end of file
+]
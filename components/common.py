@@ -1,19 +1,46 @@
-from agents import (
-    GuardrailFunctionOutput, RunContextWrapper,
-    TResponseInputItem, Runner, ModelSettings,
-    Agent, WebSearchTool,
-    input_guardrail,
-    function_tool
-)
-from agents.agent_output import AgentOutputSchema
-from agents.memory.session import SessionABC
-from agents.items import TResponseInputItem
-from agents import SQLiteSession
-from openai import AsyncOpenAI
-import openai
+from typing import TYPE_CHECKING
+from components.lazy import lazy_exports
+
+# The Agents SDK and OpenAI client are only imported when one of these names is first used.
+_EXPORTS = {
+    **{
+        name: ("agents", name) for name in (
+            "GuardrailFunctionOutput", "RunContextWrapper", "TResponseInputItem", "Runner",
+            "ModelSettings", "Agent", "WebSearchTool", "RunHooks", "AgentsException",
+            "MaxTurnsExceeded", "input_guardrail", "function_tool", "set_default_openai_client",
+            "SQLiteSession", "default_tool_error_function", "RunConfig"
+        )
+    },
+    "AgentOutputSchema": ("agents.agent_output", "AgentOutputSchema"),
+    "SessionABC": ("agents.memory.session", "SessionABC"),
+    "AsyncOpenAI": ("openai", "AsyncOpenAI"),
+    "openai": ("openai", None)
+}
+
+__getattr__, __dir__ = lazy_exports(globals(), _EXPORTS)
+
+if TYPE_CHECKING:
+    from agents import (
+        GuardrailFunctionOutput, RunContextWrapper,
+        TResponseInputItem, Runner, ModelSettings,
+        Agent, WebSearchTool,
+        RunHooks, AgentsException,
+        MaxTurnsExceeded,
+        set_default_openai_client,
+        default_tool_error_function,
+        RunConfig,
+        input_guardrail,
+        function_tool
+    )
+    from agents.agent_output import AgentOutputSchema
+    from agents.memory.session import SessionABC
+    from agents import SQLiteSession
+    from openai import AsyncOpenAI
+    import openai
 
 __all__ = [
     "RunContextWrapper", "ModelSettings", "WebSearchTool", "Runner", "Agent", "AsyncOpenAI", "AgentOutputSchema",
     "GuardrailFunctionOutput", "SQLiteSession", "SessionABC", "TResponseInputItem",
-    "function_tool", "input_guardrail", "openai"
-]
\ No newline at end of file
+    "RunHooks", "AgentsException", "MaxTurnsExceeded", "RunConfig",
+    "function_tool", "input_guardrail", "set_default_openai_client", "default_tool_error_function", "openai"
+]
@@ -0,0 +1,39 @@
+"""
+PEP 562 helpers for packages that re-export names from heavy modules.
+
+Attributes are imported on first access instead of when the package is imported,
+so importing a package doesn't drag in the Agents SDK, scikit-learn or Supabase
+unless the caller actually uses them.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from importlib import import_module
+
+
+def lazy_exports(
+    namespace: Dict[str, Any],
+    exports: Dict[str, Tuple[str, Optional[str]]]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Build the module-level `__getattr__`/`__dir__` pair for a lazy package.
+
+    :param namespace: The package's `globals()`; resolved attributes are cached there.
+    :type namespace: Dict[str, Any]
+    :param exports: Exported name -> (module path, attribute); attribute `None` exports the module itself.
+    :type exports: Dict[str, Tuple[str, Optional[str]]]
+    :return: `(__getattr__, __dir__)` for the package.
+    :rtype: Tuple[Callable[[str], Any], Callable[[], List[str]]]
+    """
+    def __getattr__(name: str) -> Any:
+        try:
+            module_name, attr = exports[name]
+        except KeyError:
+            raise AttributeError(f"module {namespace['__name__']!r} has no attribute {name!r}") from None
+        module = import_module(module_name)
+        value = module if attr is None else getattr(module, attr)
+        namespace[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(exports))
+
+    return __getattr__, __dir__
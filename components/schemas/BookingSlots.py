@@ -0,0 +1,227 @@
+from components.schemas.User import User
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Any
+from datetime import datetime
+from enum import Enum
+import re
+
+from config import PH_TZ
+
+EMAIL_RE = re.compile(r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$")
+PH_MOBILE_RE = re.compile(r"^(?:\+?63|0)9\d{9}$")
+CONFIRM_RE = re.compile(
+    r"\b(?:oo|opo|yes|yep|yup|sige|tama|correct|confirm(?:ed|s)?|proceed|go ahead|game|okay|ok|sure)\b",
+    re.IGNORECASE
+)
+DECLINE_RE = re.compile(
+    r"\b(?:hindi|no|nope|mali|wait|teka|wag|huwag|change|palitan|papalitan|edit|cancel)\b",
+    re.IGNORECASE
+)
+
+PAYMENT_OPTIONS = ("GCash", "Cash", "Card")
+
+# Required slot -> human label used when asking the user.
+REQUIRED_SLOTS: Dict[str, str] = {
+    "name": "name",
+    "email": "email",
+    "address": "address/location",
+    "contact_num": "contact number",
+    "car": "car make, model and year",
+    "service_type": "service type",
+    "schedule": "schedule date and time",
+    "payment": "preferred payment type (GCash, Cash, Card)",
+}
+
+
+class SlotStatus(str, Enum):
+    MISSING = "missing"
+    FILLED = "filled"
+    INVALID = "invalid"
+    AMBIGUOUS = "ambiguous"
+
+
+class BookingStage(str, Enum):
+    COLLECTING = "collecting"
+    CONFIRMING = "confirming"
+    SAVED = "saved"
+
+
+class BookingAction(str, Enum):
+    ASK_MISSING = "ask_missing"
+    CONFIRM = "confirm"
+    SAVE = "save"
+    DONE = "done"
+
+
+class SlotState(BaseModel):
+    status: SlotStatus = SlotStatus.MISSING
+    note: Optional[str] = None
+
+
+def _record(user: Optional[User]) -> Dict[str, Any]:
+    return user.model_dump(exclude={"uid"}) if user else {}
+
+
+class BookingSlotTracker(BaseModel):
+    """
+    Deterministic slot-filling state for the booking flow.
+
+    Tracks completeness/validation per required field and decides the next step
+    (ask for missing fields, confirm, save, done) so the booking LLM only has to phrase it.
+    """
+    slots: Dict[str, SlotState] = Field(
+        default_factory=lambda: {name: SlotState() for name in REQUIRED_SLOTS}
+    )
+    stage: BookingStage = BookingStage.COLLECTING
+    confirmed_record: Optional[Dict[str, Any]] = None
+    saved_record: Optional[Dict[str, Any]] = None
+
+    def _validate(self, user: User, schedule_follow_up: Optional[str]) -> None:
+        def check(name: str, value: Any, valid: bool = True, note: Optional[str] = None) -> None:
+            if value in (None, ""):
+                self.slots[name] = SlotState()
+            elif not valid:
+                self.slots[name] = SlotState(status=SlotStatus.INVALID, note=note)
+            else:
+                self.slots[name] = SlotState(status=SlotStatus.FILLED)
+
+        check("name", (user.name or "").strip())
+        check("email", user.email, bool(user.email and EMAIL_RE.match(str(user.email))), "invalid email format")
+        check("address", (user.address or "").strip(), len((user.address or "").strip()) >= 4, "address is too short")
+        contact = re.sub(r"[\s-]", "", user.contact_num or "")
+        check("contact_num", contact, bool(PH_MOBILE_RE.match(contact)), "not a valid PH mobile number (09XXXXXXXXX)")
+        check("service_type", (user.service_type or "").strip())
+        check("payment", user.payment, user.payment in PAYMENT_OPTIONS, "must be GCash, Cash or Card")
+
+        car = user.car
+        car_complete = bool(car and car.make and car.model and car.year)
+        if car is None or not any([car.make, car.model, car.year]):
+            self.slots["car"] = SlotState()
+        elif not car_complete:
+            missing = [k for k in ("make", "model", "year") if not getattr(car, k)]
+            self.slots["car"] = SlotState(status=SlotStatus.MISSING, note=f"still need car {', '.join(missing)}")
+        else:
+            max_year = datetime.now(PH_TZ).year + 1
+            check("car", car.year, 1960 <= int(car.year) <= max_year, "car year looks wrong")
+
+        if not user.schedule_date or not user.schedule_time:
+            # The fields decide; the follow-up only words the question while they're incomplete.
+            if schedule_follow_up:
+                self.slots["schedule"] = SlotState(status=SlotStatus.AMBIGUOUS, note=schedule_follow_up)
+            else:
+                part = "time" if user.schedule_date else ("date" if user.schedule_time else None)
+                self.slots["schedule"] = SlotState(note=f"still need the schedule {part}" if part else None)
+        else:
+            try:
+                when = PH_TZ.localize(
+                    datetime.fromisoformat(f"{user.schedule_date}T{user.schedule_time}")
+                )
+                check("schedule", when, when > datetime.now(PH_TZ), "schedule is already in the past")
+            except ValueError:
+                # Free-form schedule captured by the LLM extractor; accept it as given.
+                check("schedule", user.schedule_date)
+
+    def pending(self) -> List[str]:
+        """
+        Slots that still need user input (missing, invalid or ambiguous).
+        """
+        return [name for name, slot in self.slots.items() if slot.status != SlotStatus.FILLED]
+
+    def update(
+        self,
+        user: Optional[User],
+        schedule_follow_up: Optional[str] = None,
+        message: Optional[str] = None
+    ) -> BookingAction:
+        """
+        Re-evaluate the slots against the current user record and advance the stage.
+
+        :param user: Current user memory.
+        :type user: Optional[User]
+        :param schedule_follow_up: Pending schedule clarification, if any; only asked while the
+            schedule fields are incomplete.
+        :type schedule_follow_up: Optional[str]
+        :param message: Latest user text, used to detect a confirmation.
+        :type message: Optional[str]
+        :return: The next step the booking agent should take.
+        :rtype: BookingAction
+        """
+        user = user or User()
+        self._validate(user, schedule_follow_up)
+        record = _record(user)
+
+        if self.pending():
+            self.stage = BookingStage.COLLECTING
+            self.confirmed_record = None
+            return BookingAction.ASK_MISSING
+
+        if self.stage == BookingStage.SAVED and record == self.saved_record:
+            return BookingAction.DONE
+
+        if self.stage == BookingStage.CONFIRMING and record == self.confirmed_record and message:
+            if CONFIRM_RE.search(message) and not DECLINE_RE.search(message):
+                return BookingAction.SAVE
+
+        self.stage = BookingStage.CONFIRMING
+        self.confirmed_record = record
+        return BookingAction.CONFIRM
+
+    @property
+    def in_progress(self) -> bool:
+        """
+        True once the user has started giving booking details and the booking isn't saved yet.
+        """
+        if self.stage == BookingStage.SAVED:
+            return False
+        return self.stage == BookingStage.CONFIRMING or any(
+            slot.status != SlotStatus.MISSING for slot in self.slots.values()
+        )
+
+    def next_action(self) -> BookingAction:
+        if self.pending():
+            return BookingAction.ASK_MISSING
+        if self.stage == BookingStage.SAVED:
+            return BookingAction.DONE
+        return BookingAction.CONFIRM
+
+    def mark_saved(self, user: Optional[User]) -> None:
+        self.stage = BookingStage.SAVED
+        self.saved_record = _record(user)
+        self.confirmed_record = None
+
+    @staticmethod
+    def summary(user: Optional[User]) -> str:
+        user = user or User()
+        car = user.car
+        car_text = " ".join(str(v) for v in (car.year, car.make, car.model) if v) if car else ""
+        lines = [
+            f"Name: {user.name or '-'}",
+            f"Email: {user.email or '-'}",
+            f"Address: {user.address or '-'}",
+            f"Contact: {user.contact_num or '-'}",
+            f"Car: {car_text or '-'}",
+            f"Service: {user.service_type or '-'}",
+            f"Schedule: {user.schedule_date or '-'} {user.schedule_time or ''}".rstrip(),
+            f"Payment: {user.payment or '-'}",
+        ]
+        return "\n".join(lines)
+
+    def directive(self, user: Optional[User]) -> Dict[str, Any]:
+        """
+        Compact description of the next step, returned by the booking tools and
+        rendered into the booking agent's state note.
+        """
+        action = self.next_action()
+        result: Dict[str, Any] = {"next_action": action.value}
+        if action == BookingAction.ASK_MISSING:
+            ask_for = []
+            for name in self.pending():
+                slot = self.slots[name]
+                label = REQUIRED_SLOTS[name]
+                ask_for.append(f"{label} ({slot.note})" if slot.note and slot.status != SlotStatus.AMBIGUOUS else label)
+                if slot.status == SlotStatus.AMBIGUOUS:
+                    result["follow_up"] = slot.note
+            result["ask_for"] = ask_for
+        elif action in (BookingAction.CONFIRM, BookingAction.DONE):
+            result["summary"] = self.summary(user)
+        return result
@@ -1,11 +1,28 @@
+from components.schemas.BookingSlots import BookingSlotTracker
+from components.schemas.Usage import UsageCollector
 from components.schemas import User
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any
 
 class UserInfoContext(BaseModel):
     user_memory: User
+    schedule_follow_up: Optional[str] = None # set when the last schedule given was ambiguous
+    schedule_pending: Optional[Dict[str, Any]] = None # `ScheduleParse.pending()` the follow-up asks about
     model_config = {"arbitrary_types_allowed": True}
 
+    def settle_schedule(self) -> None:
+        """
+        Drop the pending schedule question once both schedule fields are filled.
+        """
+        if self.user_memory.schedule_date and self.user_memory.schedule_time:
+            self.schedule_follow_up = None
+            self.schedule_pending = None
+
 
 class MechaniGoContext(BaseModel):
     user_ctx: UserInfoContext
+    booking: BookingSlotTracker = Field(default_factory=BookingSlotTracker)
+    booking_row: Optional[Dict[str, Any]] = None # cached `user_bookings` row, loaded once per session
+    booking_queued: Optional[Dict[str, Any]] = None # `booking_row` plus the outbox writes not yet delivered
+    usage: UsageCollector = Field(default_factory=UsageCollector, exclude=True) # current turn only, never persisted
     model_config = {"arbitrary_types_allowed": True}
\ No newline at end of file
@@ -0,0 +1,100 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Optional
+
+from config import settings
+
+
+def model_pricing(model: str) -> Optional[Dict[str, float]]:
+    """
+    USD per 1M tokens for `model` from `settings.MODEL_PRICING`; dated snapshots
+    (e.g. "gpt-4o-mini-2024-07-18") use the longest configured prefix.
+    """
+    pricing = settings.MODEL_PRICING.get(model)
+    if pricing is not None:
+        return pricing
+    prefixes = [name for name in settings.MODEL_PRICING if model.startswith(name)]
+    return settings.MODEL_PRICING[max(prefixes, key=len)] if prefixes else None
+
+
+def estimate_cost(model: str, input_tokens: int, cached_tokens: int, output_tokens: int) -> Optional[float]:
+    """
+    Estimated USD cost of one call, or None for a model without pricing.
+    """
+    pricing = model_pricing(model)
+    if pricing is None:
+        return None
+    cached_rate = pricing.get("cached_input", pricing["input"])
+    return (
+        (input_tokens - cached_tokens) * pricing["input"]
+        + cached_tokens * cached_rate
+        + output_tokens * pricing["output"]
+    ) / 1_000_000
+
+
+class ModelUsage(BaseModel):
+    requests: int = 0
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+    cost_usd: float = 0.0
+    unpriced_requests: int = 0 # calls to models missing from `settings.MODEL_PRICING`
+
+    def add(self, input_tokens: int, cached_tokens: int, output_tokens: int, cost: Optional[float]) -> None:
+        self.requests += 1
+        self.input_tokens += input_tokens
+        self.cached_tokens += cached_tokens
+        self.output_tokens += output_tokens
+        self.total_tokens += input_tokens + output_tokens
+        if cost is None:
+            self.unpriced_requests += 1
+        else:
+            self.cost_usd += cost
+
+
+class UsageCollector(BaseModel):
+    """
+    Token usage and estimated cost of every model call made for a turn (manager generations,
+    guardrail, nested sub-agent runs, extraction), broken down by model and by agent.
+    """
+    total: ModelUsage = Field(default_factory=ModelUsage)
+    by_model: Dict[str, ModelUsage] = Field(default_factory=dict)
+    by_agent: Dict[str, ModelUsage] = Field(default_factory=dict)
+
+    def add(self, agent_name: str, model: str, usage: Any) -> Optional[float]:
+        """
+        Add one response's usage.
+
+        :param agent_name: Agent (or call site) that made the call.
+        :type agent_name: str
+        :param model: Model the call went to.
+        :type model: str
+        :param usage: The response's `usage` (Agents SDK or OpenAI client object).
+        :type usage: Any
+        :return: The call's estimated cost, or None if the model has no pricing.
+        :rtype: Optional[float]
+        """
+        input_tokens = getattr(usage, "input_tokens", 0) or 0
+        output_tokens = getattr(usage, "output_tokens", 0) or 0
+        cached_tokens = getattr(getattr(usage, "input_tokens_details", None), "cached_tokens", 0) or 0
+        cost = estimate_cost(model, input_tokens, cached_tokens, output_tokens)
+        for bucket in (
+            self.total,
+            self.by_model.setdefault(model, ModelUsage()),
+            self.by_agent.setdefault(agent_name, ModelUsage())
+        ):
+            bucket.add(input_tokens, cached_tokens, output_tokens, cost)
+        return cost
+
+    def breakdown(self) -> Dict[str, Any]:
+        """
+        JSON-ready totals plus the per-model and per-agent breakdown.
+        """
+        def row(usage: ModelUsage) -> Dict[str, Any]:
+            return {**usage.model_dump(), "cost_usd": round(usage.cost_usd, 6)}
+
+        return {
+            **row(self.total),
+            "by_model": {name: row(usage) for name, usage in self.by_model.items()},
+            "by_agent": {name: row(usage) for name, usage in self.by_agent.items()}
+        }
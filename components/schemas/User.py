@@ -2,9 +2,9 @@ from pydantic import BaseModel, EmailStr
 from typing import Optional
 
 class UserCarDetails(BaseModel):
-    make: str = None
-    model: str = None
-    year: int = None
+    make: Optional[str] = None
+    model: Optional[str] = None
+    year: Optional[int] = None
 
 class User(BaseModel, EmailStr):
     uid: Optional[str] = None
@@ -1,9 +1,17 @@
 from components.schemas.User import User, UserCarDetails
+from components.schemas.BookingSlots import BookingSlotTracker, BookingAction, BookingStage, SlotStatus
+from components.schemas.Usage import UsageCollector, ModelUsage
 from components.schemas.Contexts import MechaniGoContext, UserInfoContext
 
 __all__ = [
+    "BookingSlotTracker",
+    "BookingAction",
+    "BookingStage",
+    "SlotStatus",
     "MechaniGoContext",
     "UserInfoContext",
+    "UsageCollector",
+    "ModelUsage",
     "UserCarDetails",
     "User"
 ]
\ No newline at end of file
@@ -1,8 +1,10 @@
 from components.utils import AgentFactory, ToolRegistry
+from components.utils.LLMScheduler import Priority
 from components.common import ModelSettings
 from components import MechaniGoContext
-from typing import Optional
+from typing import Optional, Any
 from config import settings
+import json
 
 INSTRUCTIONS = """
 You are {name}, a bookings and payment agent for MechaniGo.ph.\n
@@ -20,20 +22,24 @@ Your goal is to collect user details, then confirm and save.\n
 
 # Flow
 
-1) First response: ask for ALL required details in one short message (one paragraph or a tight bullet list).
-2) When the user provides the required details, call `extract_user_info` to parse/merge into the working record.
-3) If any required fields are still missing, ask again but include ONLY the missing fields; keep it concise.
-4) When all the required fields are extracted, immediately call `save_user_info` with the current record, summarize the infor, acknowledge success, and end the conversation.
+The booking state is tracked by the system. You only phrase the next step; do not decide it yourself.
 
-# Tools
+1) Call `extract_user_info` with the user's message every time they reply (details, corrections or a confirmation).
+2) Follow the `next_action` returned by the tool (or shown in the latest "Booking State" note):
+   - `ask_missing`: ask ONLY for the fields in `ask_for`, in one short message. If there is a `follow_up`, ask exactly that question.
+   - `confirm`: show the `summary` and ask the user to confirm it (oo/yes) or say what to change.
+   - `done`: the booking is saved. Acknowledge success with the `summary` and end the conversation. Do NOT ask for confirmation again.
+3) Saving happens automatically once the user confirms through `extract_user_info`. `save_user_info` never saves an unconfirmed record; if it returns `needs_confirmation`, show the `summary` and ask the user to confirm.
 
-- `extract_user_info` to parse user-provided details.
-- `save_user_info` to save the confirmed record.
+# Tools
 
-# Current User Memory:
-{user_memory}
+- `extract_user_info` to parse user-provided details and get the next step.
+- `save_user_info` to record details the user asks you to change directly.
 """
 
+STATE_TEMPLATE = """# Booking State
+{state}"""
+
 class BookingAgent(AgentFactory):
     def __init__(
         self,
@@ -70,25 +76,26 @@ class BookingAgent(AgentFactory):
     @property
     def as_tool(self):
         if self.orchestrator_tool is None:
-            self.orchestrator_tool = self.build().as_tool(
-                tool_name=self.get_name(),
-                tool_description=self.get_handoff_description()
-            )
+            self.orchestrator_tool = self.build_monitored_tool()
         return self.orchestrator_tool
 
-    def dynamic_instructions(self):
-        user_dump = {}
-        if self.context and getattr(self.context, "user_ctx", None):
-            user = self.context.user_ctx.user_memory
-            if user:
-                try:
-                    user_dump = user.model_dump()
-                except Exception:
-                    user_dump = {}
-        return self.instructions.format(
-            name=self.get_name(),
-            user_memory=user_dump
-        )
+    def get_turn_context(self, context: Any) -> Optional[str]:
+        """
+        Render the booking state note for the current model call.
+
+        Rendered on every model call, so the booking state comes from the live run context
+        rather than whatever the context looked like when the tool was first built. Only the
+        slot tracker's compact directive is sent, not the whole user memory, and it goes after
+        the history so the static instructions stay cacheable.
+        """
+        context = context or self.context
+        state = {}
+        tracker = getattr(context, "booking", None)
+        user_ctx = getattr(context, "user_ctx", None)
+        if tracker is not None and user_ctx is not None:
+            # Read-only: the booking tools advance the tracker; rendering never does.
+            state = tracker.directive(user_ctx.user_memory)
+        return STATE_TEMPLATE.format(state=json.dumps(state, ensure_ascii=False))
 
     def get_model(self) -> str:
         return self.model
@@ -99,8 +106,8 @@ class BookingAgent(AgentFactory):
     def get_handoff_description(self) -> str:
         return "Handles user info extraction and booking services."
 
-    def get_instructions(self):
-        return self.dynamic_instructions()
+    def get_instructions(self) -> str:
+        return self.instructions.format(name=self.get_name())
 
     def get_tools(self):
         return [
@@ -111,6 +118,12 @@ class BookingAgent(AgentFactory):
     def get_input_guardrails(self):
         return [] # No guardrails for now
 
+    def get_llm_priority(self) -> Priority:
+        return Priority.BOOKING
+
+    def get_fallback_response(self) -> str:
+        return "Pasensya na po, nagkaproblema sa pag-process ng booking details niyo. Pakisend po ulit ng details na gusto niyong i-book."
+
     def get_model_settings(self) -> ModelSettings:
         return ModelSettings(
             max_tokens=self.max_tokens,
@@ -1,5 +1,6 @@
 from components.common import AgentOutputSchema
 from components.utils import AgentFactory
+from components.utils.LLMScheduler import Priority
 from components.common import ModelSettings
 from typing import Optional, List
 from pydantic import BaseModel
@@ -239,10 +240,7 @@ class MechanicAgent(AgentFactory):
     @property
     def as_tool(self):
         if self.orchestrator_tool is None:
-            self.orchestrator_tool = self.build().as_tool(
-                tool_name=self.get_name(),
-                tool_description=self.get_handoff_description()
-            )
+            self.orchestrator_tool = self.build_monitored_tool()
         return self.orchestrator_tool
 
     def get_model(self) -> str:
@@ -263,6 +261,12 @@ class MechanicAgent(AgentFactory):
     def get_input_guardrails(self):
         return [] # No guardrails for now
 
+    def get_llm_priority(self) -> Priority:
+        return Priority.MECHANIC
+
+    def get_fallback_response(self) -> str:
+        return "Pasensya na po, medyo natagalan ako sa pag-check. Pwede po bang ikwento ulit ang pangunahing sintomas ng sasakyan?"
+
     def get_output_type(self) -> AgentOutputSchema:
         return AgentOutputSchema(output_type=MechanicAgentResponse, strict_json_schema=True)
 
@@ -1,10 +1,52 @@
-from components.tools.clients import get_openai_client, MODEL_TYPE
-from components.tools.knowledge import faq_tool, mechanic_tool
+from typing import TYPE_CHECKING
+from components.lazy import lazy_exports
+from components.utils.Registry import ToolRegistry
 
+_EXPORTS = {
+    "get_openai_client": ("components.tools.clients", "get_openai_client"),
+    "MODEL_TYPE": ("components.tools.clients", "MODEL_TYPE"),
+    "faq_tool": ("components.tools.knowledge", "faq_tool"),
+    "mechanic_tool": ("components.tools.knowledge", "mechanic_tool")
+}
+
+__getattr__, __dir__ = lazy_exports(globals(), _EXPORTS)
+
+if TYPE_CHECKING:
+    from components.tools.clients import get_openai_client, MODEL_TYPE
+    from components.tools.knowledge import faq_tool, mechanic_tool
+
+# Tool manifest: tool modules are imported the first time an agent asks for the tool.
+ToolRegistry.register_lazy(
+    "extract.user_info",
+    "components.tools.extraction:extract_user_info",
+    category="extraction",
+    description="Extracts user information from text."
+)
+
+ToolRegistry.register_lazy(
+    "booking.save_user_info",
+    "components.tools.booking:save_user_info",
+    category="booking",
+    description="Saves/updates user booking info in Supabase."
+)
+
+ToolRegistry.register_lazy(
+    "knowledge.faq_tool",
+    "components.tools.knowledge:faq_tool",
+    category="knowledge",
+    description="Answers MechaniGo FAQs using TFIDF."
+)
+
+ToolRegistry.register_lazy(
+    "knowledge.mechanic_tool",
+    "components.tools.knowledge:mechanic_tool",
+    category="knowledge",
+    description="Answers automotive related inquiries."
+)
 
 __all__ = [
     "get_openai_client",
     "mechanic_tool",
     "faq_tool",
     "MODEL_TYPE"
-]
\ No newline at end of file
+]
@@ -1,9 +1,170 @@
 from components.common import RunContextWrapper, function_tool
-from components.utils import ToolRegistry, get_supabase_client
+from components.utils import (
+    BookingOutbox,
+    get_supabase_client,
+    merge_user_memory,
+    parse_schedule,
+    idempotency_key
+)
+from components.schemas import BookingAction
 from components import MechaniGoContext
-from typing import Optional
+from components.utils.Deadline import deadline_tool_error
+from components.utils.SupabaseClient import supabase_call
+from components.utils.CircuitBreaker import CircuitOpenError, get_circuit_breaker
+from typing import Optional, Dict, Any
+from config import settings
 
-@function_tool(name_override="save_user_info")
+
+def _user_columns(context: MechaniGoContext) -> Dict[str, Any]:
+    user = context.user_ctx.user_memory
+    car = user.car
+    schedule = " ".join(v for v in (user.schedule_date, user.schedule_time) if v) or None
+    return {
+        "name": user.name,
+        "email": str(user.email) if user.email else None,
+        "address": user.address,
+        "contact_num": user.contact_num,
+        "service_type": user.service_type,
+        "schedule": schedule,
+        "payment": user.payment,
+        "car_make": car.make if car else None,
+        "car_model": car.model if car else None,
+        "car_year": car.year if car else None,
+    }
+
+
+_STATS = {
+    "row_reads": 0,
+    "writes": 0,
+    "writes_queued": 0,
+    "writes_skipped": 0,
+    "writes_failed": 0,
+    "row_reads_skipped": 0
+}
+
+_outbox: Optional[BookingOutbox] = None
+
+
+async def _deliver_booking(user_id: str, payload: Dict[str, Any]) -> None:
+    client = await get_supabase_client()
+    await supabase_call(client.table("user_bookings").upsert(
+        {"user_id": user_id, **payload}, on_conflict="user_id"
+    ).execute)
+
+
+def get_booking_outbox() -> BookingOutbox:
+    """
+    Process-wide booking outbox that delivers queued writes to `user_bookings`.
+    """
+    global _outbox
+    if _outbox is None:
+        _outbox = BookingOutbox(deliver=_deliver_booking)
+    return _outbox
+
+
+def get_booking_stats() -> Dict[str, int]:
+    return dict(_STATS)
+
+
+async def _load_booking_row(context: MechaniGoContext) -> Dict[str, Any]:
+    """
+    Return the session's cached `user_bookings` row, reading it from Supabase only once.
+
+    While the Supabase circuit is open an empty row is returned (not cached), so the next
+    save writes every column.
+    """
+    if context.booking_row is None:
+        client = await get_supabase_client()
+        try:
+            existing = await supabase_call(
+                client.table("user_bookings")
+                .select("*")
+                .eq("user_id", context.user_ctx.user_memory.uid)
+                .limit(1)
+                .execute
+            )
+        except CircuitOpenError:
+            _STATS["row_reads_skipped"] += 1
+            return {}
+        _STATS["row_reads"] += 1
+        context.booking_row = existing.data[0] if existing.data else {}
+    return context.booking_row
+
+
+def diff_booking(current: Dict[str, Any], desired: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Field-level diff: the non-empty columns in `desired` whose value differs from `current`.
+    """
+    return {
+        key: value for key, value in desired.items()
+        if value is not None and current.get(key) != value
+    }
+
+
+async def save_booking(context: MechaniGoContext) -> Dict[str, Any]:
+    """
+    Upsert the booking row for the context's user and mark the booking as saved.
+
+    Compares the user memory against the session's cached copy of the row and only
+    writes the columns that changed; nothing is sent when the row is already current.
+    With `settings.BOOKING_OUTBOX_ENABLED`, or while the Supabase circuit is open, the
+    change is queued in the local outbox and delivered in the background, so the call
+    doesn't wait on Supabase; the cached row only changes once that write is delivered,
+    and until then later saves diff against the queued state, so a change made meanwhile
+    (even back to the delivered value) is queued behind it.
+
+    :param context: Session context holding the user memory and booking tracker.
+    :type context: MechaniGoContext
+    :return: Save status and the fields that were written.
+    :rtype: Dict[str, Any]
+    """
+    user_id = context.user_ctx.user_memory.uid
+    current = await _load_booking_row(context)
+    base = context.booking_queued or current
+    changed = diff_booking(base, _user_columns(context))
+
+    if not changed:
+        _STATS["writes_skipped"] += 1
+        context.booking.mark_saved(context.user_ctx.user_memory)
+        return {"status": "unchanged", "updated_fields": []}
+
+    result: Dict[str, Any] = {"status": "saved", "updated_fields": list(changed)}
+    # While earlier writes are still queued this one goes behind them, never around them.
+    if (
+        settings.BOOKING_OUTBOX_ENABLED
+        or context.booking_queued is not None
+        or get_circuit_breaker("supabase").is_open
+    ):
+        queued = {**base, "user_id": user_id, **changed}
+        context.booking_queued = queued
+
+        def settled(status: str) -> None:
+            if status == "delivered":
+                context.booking_row = {**(context.booking_row or current), "user_id": user_id, **changed}
+                if context.booking_queued == queued:
+                    # Nothing newer is waiting.
+                    context.booking_queued = None
+            else:
+                # Re-read the row on the next save so the lost columns are written again.
+                _STATS["writes_failed"] += 1
+                context.booking_row = None
+                context.booking_queued = None
+
+        # The cached row only moves once the queued write has actually landed.
+        key = idempotency_key(user_id, changed, base)
+        await get_booking_outbox().enqueue(user_id, changed, key=key, on_settled=settled)
+        _STATS["writes_queued"] += 1
+        result.update(status="queued", delivery_id=key)
+    else:
+        await _deliver_booking(user_id, changed)
+        _STATS["writes"] += 1
+        context.booking_row = {**current, "user_id": user_id, **changed}
+
+    context.booking.mark_saved(context.user_ctx.user_memory)
+    return result
+
+
+@function_tool(name_override="save_user_info", failure_error_function=deadline_tool_error)
 async def save_user_info(
     ctx: RunContextWrapper[MechaniGoContext],
     name: Optional[str] = None,
@@ -19,7 +180,7 @@ async def save_user_info(
 ):
     """
     Docstring for save_user_info
-    
+
     :param ctx: Context for session memory.
     :type ctx: RunContextWrapper[MechaniGoContext]
     :param name: User name.
@@ -43,46 +204,35 @@ async def save_user_info(
     :param car_year: User car year of manufacture.
     :type car_year: Optional[int]
     """
+    context = ctx.context
+    parsed = parse_schedule(schedule) if schedule else None
+    schedule_fields = parsed.to_payload() if parsed else {}
+    if schedule and not schedule_fields:
+        # Free-form schedule the parser couldn't normalize; keep it as given.
+        schedule_fields = {"schedule_date": schedule}
 
-    client = await get_supabase_client()
-    user_id = ctx.context.user_ctx.user_memory.uid
-
-    existing = await (
-        client.table("user_bookings")
-        .select("*")
-        .eq("user_id", user_id)
-        .limit(1)
-        .execute()
-    )
-
-    current = existing.data[0] if existing.data else {}
-
-    def pick(val, key):
-        return val if val is not None else current.get(key)
-
-    payload = {
-        "user_id": user_id,
-        "name": pick(name, "name"),
-        "email": pick(email, "email"),
-        "address": pick(address, "address"),
-        "contact_num": pick(contact_num, "contact_num"),
-        "service_type": pick(service_type, "service_type"),
-        "schedule": pick(schedule, "schedule"),
-        "payment": pick(payment, "payment"),
-        "car_make": pick(car_make, "car_make"),
-        "car_model": pick(car_model, "car_model"),
-        "car_year": pick(car_year, "car_year"),
-    }
+    merge_user_memory(context, {
+        "name": name,
+        "email": email,
+        "address": address,
+        "contact_num": contact_num,
+        "service_type": service_type,
+        "payment": payment,
+        "car": {"make": car_make, "model": car_model, "year": car_year},
+        **schedule_fields
+    })
+
+    context.user_ctx.settle_schedule()
+    user = context.user_ctx.user_memory
+    action = context.booking.update(user, context.user_ctx.schedule_follow_up)
+    if action == BookingAction.ASK_MISSING:
+        # Never write a half-filled booking; tell the agent what is still needed instead.
+        return {"status": "incomplete", **context.booking.directive(user)}
+    if action == BookingAction.DONE:
+        return {"status": "already_saved", **context.booking.directive(user)}
+    if action == BookingAction.CONFIRM:
+        # Only a confirmed record is written; read the summary back first.
+        return {"status": "needs_confirmation", **context.booking.directive(user)}
 
-    await client.table("user_bookings").upsert(
-        payload, on_conflict="user_id"
-    ).execute()
-    updated_fields = [k for k, v in payload.items() if v is not None]
-    return {"status": "saved", "updated_fields": updated_fields}
-
-ToolRegistry.register_tool(
-    "booking.save_user_info",
-    save_user_info,
-    category="booking",
-    description="Saves/updates user booking info in Supabase."
-)
\ No newline at end of file
+    result = await save_booking(context)
+    return {**result, **context.booking.directive(user)}
@@ -3,14 +3,26 @@ Shared OpenAI client across the function tools.
 
 The model type is `gpt-4o-mini`.
 """
-from components.common import AsyncOpenAI
+from components.common import AsyncOpenAI, set_default_openai_client
+from components.utils.HttpPool import get_http_client, get_http_timeout
 from config import settings
 
 _client = None
 MODEL_TYPE = "gpt-4o-mini"
 
 async def get_openai_client() -> AsyncOpenAI:
+    """
+    Return the shared OpenAI client, built on the shared HTTP pool.
+
+    It is also installed as the Agents SDK default client, so agent runs and
+    function tools go through the same connections.
+    """
     global _client
     if _client is None:
-        _client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-    return _client
\ No newline at end of file
+        _client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=get_http_client(),
+            timeout=get_http_timeout()
+        )
+        set_default_openai_client(_client, use_for_tracing=False)
+    return _client
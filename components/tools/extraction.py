@@ -1,14 +1,143 @@
 """
 The extraction tools library.
+
+`extract_user_info` runs the rule-based extractor first and only falls back to the
+LLM for the fields that are still missing, sending just the unmatched text.
 """
 from components.tools.clients import get_openai_client, MODEL_TYPE
+from components.tools.booking import save_booking
+from components.schemas import BookingAction, UserInfoContext
 from components.common import function_tool, RunContextWrapper
-from components.utils import ToolRegistry, merge_user_memory
-from typing import Any
+from components.utils import (
+    merge_user_memory,
+    extract_local_fields,
+    missing_user_fields,
+    resolve_follow_up,
+    ScheduleParse
+)
+from components.utils.Deadline import DeadlineExceeded, within_deadline, mark_degraded, deadline_tool_error
+from components.utils.Hedging import hedged
+from components.utils.usage_tracking import track_usage
+from config import settings
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import logging
+import copy
 import json
+import re
 
-@function_tool(name_override="extract_user_info")
-async def extract_user_info(ctx: RunContextWrapper[Any], text: str):
+logger = logging.getLogger(__name__)
+
+SCHEDULE_FIELDS = ("schedule_date", "schedule_time")
+
+_LLM_PROPERTIES: Dict[str, Dict[str, Any]] = {
+    "name": {"type": "string", "nullable": True},
+    "email": {"type": "string", "nullable": True},
+    "address": {"type": "string", "nullable": True},
+    "contact_num": {"type": "string", "nullable": True},
+    "service_type": {"type": "string", "nullable": True},
+    "date": {"type": "string", "format": "date-time", "nullable": True},
+    "payment": {
+        "type": "string",
+        "enum": ["GCash", "Cash", "Card"],
+        "nullable": True
+    },
+}
+
+_CAR_PROPERTIES: Dict[str, Dict[str, Any]] = {
+    "car_make": {"type": "string", "nullable": True},
+    "car_model": {"type": "string", "nullable": True},
+    "car_year": {"type": "integer", "nullable": True},
+}
+
+# Words that carry no extractable detail on their own ("sige po", "yes").
+_FILLER_WORDS = {
+    "po", "opo", "oo", "yes", "ok", "okay", "sige", "and", "at", "ang", "ko", "ako", "my", "is",
+    "ay", "na", "ng", "sa", "the", "salamat", "thanks", "thank", "you", "lang", "naman", "pala",
+    "am", "pm"
+}
+
+_STATS = {
+    "calls": 0,
+    "llm_calls": 0,
+    "llm_calls_avoided": 0,
+    "local_fields_extracted": 0
+}
+
+
+def get_extraction_stats() -> Dict[str, int]:
+    """
+    Counters for `extract_user_info` since process start, including how many LLM calls
+    the rule-based extractor avoided.
+    """
+    return dict(_STATS)
+
+
+def _llm_schema(missing: List[str]) -> Dict[str, Any]:
+    properties: Dict[str, Any] = {}
+    for key in missing:
+        if key in SCHEDULE_FIELDS:
+            properties["date"] = _LLM_PROPERTIES["date"]
+        elif key.startswith("car."):
+            car = properties.setdefault(
+                "car", {"type": "object", "properties": {}, "nullable": True}
+            )
+            sub_key = f"car_{key.split('.', 1)[1]}"
+            car["properties"][sub_key] = _CAR_PROPERTIES[sub_key]
+        elif key in _LLM_PROPERTIES:
+            properties[key] = _LLM_PROPERTIES[key]
+    return {"type": "object", "properties": properties, "required": []}
+
+
+def _has_content(residual: str) -> bool:
+    words = re.findall(r"[^\W\d_]{2,}", residual.lower())
+    return any(word not in _FILLER_WORDS for word in words)
+
+
+def _track_schedule(user_ctx: UserInfoContext, schedule: ScheduleParse) -> None:
+    """
+    Keep the pending schedule question in step with the schedule just read.
+    """
+    if schedule.follow_up:
+        user_ctx.schedule_follow_up = schedule.follow_up
+        user_ctx.schedule_pending = schedule.pending()
+        # Whatever an earlier schedule left in the fields this one couldn't fill is stale now.
+        given = schedule.to_payload()
+        user_ctx.user_memory = user_ctx.user_memory.model_copy(
+            update={key: None for key in SCHEDULE_FIELDS if key not in given}
+        )
+    else:
+        user_ctx.schedule_follow_up = None
+        user_ctx.schedule_pending = None
+
+
+def _normalize_llm_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Map the LLM function arguments onto the `User` field names.
+    """
+    normalized = {k: v for k, v in payload.items() if k not in ("date", "car")}
+
+    date_value = payload.get("date")
+    if isinstance(date_value, str) and date_value:
+        try:
+            parsed = datetime.fromisoformat(date_value.replace("Z", "+00:00"))
+            normalized["schedule_date"] = parsed.date().isoformat()
+            if "T" in date_value or " " in date_value.strip():
+                normalized["schedule_time"] = parsed.strftime("%H:%M")
+        except ValueError:
+            normalized["schedule_date"] = date_value
+
+    car = payload.get("car")
+    if isinstance(car, dict):
+        normalized["car"] = {
+            "make": car.get("car_make"),
+            "model": car.get("car_model"),
+            "year": car.get("car_year"),
+        }
+    return normalized
+
+
+async def _extract_with_llm(text: str, missing: List[str], context: Any = None) -> Dict[str, Any]:
     client = await get_openai_client()
     response = await client.responses.create(
         model=MODEL_TYPE,
@@ -21,36 +150,13 @@ async def extract_user_info(ctx: RunContextWrapper[Any], text: str):
                 "type": "function",
                 "name": "return_extracted_data",
                 "description": "Return extracted user info in structured JSON.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "name": {"type": "string", "nullable": True},
-                        "email": {"type": "string", "nullable": True},
-                        "address": {"type": "string", "nullable": True},
-                        "contact_num": {"type": "string", "nullable": True},
-                        "service_type": {"type": "string", "nullable": True},
-                        "date": {"type": "string", "format": "date-time", "nullable": True},
-                        "payment": {
-                            "type": "string",
-                            "enum": ["GCash", "Cash", "Credit"],
-                            "nullable": True
-                        },
-                        "car": {
-                            "type": "object",
-                            "properties": {
-                                "car_make": {"type": "string", "nullable": True},
-                                "car_model": {"type": "string", "nullable": True},
-                                "car_year": {"type": "integer", "nullable": True},
-                            },
-                            "nullable": True
-                        }
-                    },
-                    "required": []
-                }
+                "parameters": _llm_schema(missing)
             }
         ]
     )
 
+    track_usage(context, "extract_user_info", MODEL_TYPE, [response.usage])
+
     tool_calls = [
         item for item in response.output if item.type == "function_call"
     ]
@@ -58,13 +164,79 @@ async def extract_user_info(ctx: RunContextWrapper[Any], text: str):
     if not tool_calls:
         return {}
 
-    payload = json.loads(tool_calls[0].arguments)
-    merge_user_memory(ctx.context, payload)
-    return payload
+    return _normalize_llm_payload(json.loads(tool_calls[0].arguments))
+
+
+@function_tool(name_override="extract_user_info", failure_error_function=deadline_tool_error)
+async def extract_user_info(ctx: RunContextWrapper[Any], text: str):
+    _STATS["calls"] += 1
+
+    local = extract_local_fields(text)
+    if local.payload:
+        merge_user_memory(ctx.context, local.payload)
+        _STATS["local_fields_extracted"] += len(local.found)
+
+    payload: Dict[str, Any] = copy.deepcopy(local.payload)
+    user_ctx = getattr(ctx.context, "user_ctx", None)
+    schedule: Optional[ScheduleParse] = local.schedule
+    if user_ctx is not None and user_ctx.schedule_pending:
+        # "PM po", "yung susunod": read against the schedule the last question was about.
+        answer = resolve_follow_up(user_ctx.schedule_pending, text)
+        if answer is not None:
+            schedule = answer
+            merge_user_memory(ctx.context, answer.to_payload())
+            payload.update(answer.to_payload())
+    if schedule is not None and user_ctx is not None:
+        _track_schedule(user_ctx, schedule)
+
+    missing = missing_user_fields(user_ctx.user_memory if user_ctx else None)
+    if schedule is not None:
+        if schedule.is_complete:
+            # Resolved locally without ambiguity; the LLM would only guess.
+            missing = [key for key in missing if key not in SCHEDULE_FIELDS]
+        else:
+            # A partial or ambiguous reading may be wrong; let the LLM confirm or correct it.
+            missing += [key for key in SCHEDULE_FIELDS if key not in missing]
+
+    if missing and _has_content(local.residual):
+        _STATS["llm_calls"] += 1
+        try:
+            # `_extract_with_llm` records its own usage, a losing hedge's included.
+            llm_payload = await within_deadline(
+                hedged("extraction", lambda: _extract_with_llm(local.residual, missing, ctx.context)),
+                stage="extraction",
+                reserve=settings.DEADLINE_RESERVE_SECONDS
+            )
+        except DeadlineExceeded:
+            # Keep the locally extracted fields; the rest can be asked for next turn.
+            mark_degraded("extraction_llm_skipped")
+            llm_payload = {}
+        merge_user_memory(ctx.context, llm_payload)
+        for key, value in llm_payload.items():
+            if key == "car" and isinstance(value, dict):
+                car = payload.setdefault("car", {})
+                car.update({k: v for k, v in value.items() if v is not None})
+            elif value not in (None, ""):
+                payload[key] = value
+    else:
+        _STATS["llm_calls_avoided"] += 1
+        logger.info(
+            "extract_user_info: LLM call avoided (local fields=%s, missing=%s); total avoided=%d",
+            local.found, missing, _STATS["llm_calls_avoided"]
+        )
+
+    if user_ctx is not None:
+        user_ctx.settle_schedule()
+
+    tracker = getattr(ctx.context, "booking", None)
+    if tracker is None or user_ctx is None:
+        if schedule is not None and schedule.follow_up:
+            payload["follow_up"] = schedule.follow_up
+        return payload
 
-ToolRegistry.register_tool(
-    "extract.user_info",
-    extract_user_info,
-    category="extraction",
-    description="Extracts user information from text."
-)
\ No newline at end of file
+    # The slot tracker, not the model, decides whether to ask, confirm or save.
+    action = tracker.update(user_ctx.user_memory, user_ctx.schedule_follow_up, text)
+    if action == BookingAction.SAVE:
+        saved = await save_booking(ctx.context)
+        return {"extracted": payload, "status": saved["status"], **tracker.directive(user_ctx.user_memory)}
+    return {"extracted": payload, **tracker.directive(user_ctx.user_memory)}
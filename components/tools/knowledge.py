@@ -1,41 +1,51 @@
 """
 The knowledge tools library.
 """
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import linear_kernel
 from difflib import SequenceMatcher
+from dataclasses import dataclass
 from pathlib import Path
+import logging
 import json
 
 from components.common import function_tool
-from components.utils import ToolRegistry
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any, Iterable, Optional, Tuple
 
-def _vector_rank(
-    query: str,
-    faqs: List[Dict[str, Any]],
-    top_k: int = 3
-) -> List[Dict[str, Any]]:
+if TYPE_CHECKING:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+FAQ_PATH = "data/faqs.json"
+MECHANIC_KB_PATH = "data/mechanic_knowledge_base.json"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class KnowledgeIndex:
     """
-    Rank FAQ entries by similarity to a query using TF‑IDF cosine similarity plus a fuzzy title boost.
+    TF-IDF index fitted once over a knowledge file's (question, answer) entries.
+    """
+    faqs: List[Dict[str, Any]]
+    valid_indices: List[int]
+    questions: List[str]
+    vectorizer: Optional["TfidfVectorizer"] = None
+    matrix: Any = None
+
+
+# path -> (file mtime, index); refitted only when the file changes
+_INDEXES: Dict[str, Tuple[float, KnowledgeIndex]] = {}
+
+
+def build_index(faqs: List[Dict[str, Any]]) -> KnowledgeIndex:
+    """
+    Fit the bigram TF-IDF model over the FAQ corpus.
 
     The question text is weighted more heavily than the answer to reduce noise from long answers.
-    A bigram TF‑IDF model scores matches on the combined (question, answer) text, then a
-    SequenceMatcher ratio on the question/title is blended in to break ties and favor close
-    question wording.
-    
-    :param query: The user’s search text.
-    :type query: str
+
     :param faqs: List of FAQ dictionaries containing "question"/"title" and "answer".
     :type faqs: List[Dict[str, Any]]
-    :param top_k: Number of top matches to return.
-    :type top_k: int
-    :return: The top_k FAQ dicts ordered by combined similarity.
-    :rtype: List[Dict[str, Any]]
+    :return: Index usable by `_vector_rank`; `vectorizer` is None when nothing could be fitted.
+    :rtype: KnowledgeIndex
     """
-    if not query:
-        return faqs[:top_k]
-    
     corpus: List[str] = []
     valid_indices: List[int] = []
     questions: List[str] = []
@@ -48,63 +58,149 @@ def _vector_rank(
             corpus.append(text)
             questions.append(question)
 
+    index = KnowledgeIndex(faqs=faqs, valid_indices=valid_indices, questions=questions)
     if not corpus:
-        return faqs[:top_k]
-    
+        return index
+
+    # scikit-learn/scipy take ~1s to import; only pay for it once an index is built.
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
     vectorizer = TfidfVectorizer(stop_words="english", ngram_range=(1, 2))
     try:
-        tfidf = vectorizer.fit_transform([query] + corpus)
+        index.matrix = vectorizer.fit_transform(corpus)
     except ValueError:
-        return faqs[:top_k]
-    
-    query_vec = tfidf[0:1]
-    faq_vecs = tfidf[1:]
-    cosine_similarities = linear_kernel(query_vec, faq_vecs).flatten()
+        return index
+    index.vectorizer = vectorizer
+    return index
+
+
+def get_index(path: str) -> KnowledgeIndex:
+    """
+    Return the cached index for a knowledge file, (re)building it when the file changed.
+    """
+    mtime = Path(path).stat().st_mtime
+    cached = _INDEXES.get(path)
+    if cached is None or cached[0] != mtime:
+        faqs = json.loads(Path(path).read_text(encoding="utf-8"))
+        cached = (mtime, build_index(faqs))
+        _INDEXES[path] = cached
+    return cached[1]
+
+
+def warm_knowledge_indexes(paths: Iterable[str] = (FAQ_PATH, MECHANIC_KB_PATH)) -> Dict[str, int]:
+    """
+    Prebuild the indexes for the knowledge files (used on app startup).
+
+    Missing or unreadable files are logged and skipped; they're retried on first query.
+
+    :return: Number of entries indexed per file.
+    :rtype: Dict[str, int]
+    """
+    indexed: Dict[str, int] = {}
+    for path in paths:
+        try:
+            indexed[path] = len(get_index(path).faqs)
+        except (OSError, ValueError) as e:
+            logger.warning("Knowledge index for %s not built: %s", path, e)
+    return indexed
+
+
+def _score_entries(query: str, index: KnowledgeIndex) -> List[Tuple[float, int]]:
+    """
+    Score every indexed entry against `query`, best first, as `(score, faq index)` pairs.
+    """
+    from sklearn.metrics.pairwise import linear_kernel
+
+    query_vec = index.vectorizer.transform([query])
+    cosine_similarities = linear_kernel(query_vec, index.matrix).flatten()
 
     def _fuzzy_score(q: str, cand: str) -> float:
         return SequenceMatcher(None, q.lower(), cand.lower()).ratio()
 
     combined_scores = []
-    for sim, idx, qtext in zip(cosine_similarities, valid_indices, questions):
+    for sim, idx, qtext in zip(cosine_similarities, index.valid_indices, index.questions):
         fuzzy = _fuzzy_score(query, qtext)
         combined = (0.65 * sim) + (0.35 * fuzzy)
         combined_scores.append((combined, idx))
 
-    ranked = sorted(
+    return sorted(
         combined_scores,
         key=lambda item: item[0],
         reverse=True
     )
+
+
+def _vector_rank(
+    query: str,
+    faqs: List[Dict[str, Any]],
+    top_k: int = 3,
+    index: Optional[KnowledgeIndex] = None
+) -> List[Dict[str, Any]]:
+    """
+    Rank FAQ entries by similarity to a query using TF‑IDF cosine similarity plus a fuzzy title boost.
+
+    A bigram TF‑IDF model scores matches on the combined (question, answer) text, then a
+    SequenceMatcher ratio on the question/title is blended in to break ties and favor close
+    question wording. Pass a prebuilt `index` to skip refitting the model on every query.
+    
+    :param query: The user’s search text.
+    :type query: str
+    :param faqs: List of FAQ dictionaries containing "question"/"title" and "answer".
+    :type faqs: List[Dict[str, Any]]
+    :param top_k: Number of top matches to return.
+    :type top_k: int
+    :param index: Prebuilt index for `faqs`; fitted on the fly if omitted.
+    :type index: Optional[KnowledgeIndex]
+    :return: The top_k FAQ dicts ordered by combined similarity.
+    :rtype: List[Dict[str, Any]]
+    """
+    if not query:
+        return faqs[:top_k]
+
+    index = index or build_index(faqs)
+    if index.vectorizer is None:
+        return faqs[:top_k]
+
+    ranked = _score_entries(query, index)
     top_indices = [idx for _, idx in ranked[:top_k]]
     return [faqs[i] for i in top_indices]
 
 def _answer_from_file(query: str, path: str, top_k: int=3) -> str:
-    data = Path(path).read_text(encoding="utf-8")
-    ranked = _vector_rank(query.strip(), json.loads(data), top_k)
+    index = get_index(path)
+    ranked = _vector_rank(query.strip(), index.faqs, top_k, index=index)
     if not ranked:
         return "Wala po akong sagot diyan."
     if not query.strip():
         return "Pakilinaw po ng tanong para mahanap ko ang sagot."
     return str(ranked[0].get("answer") or "Wala po akong sagot diyan.")
 
+def local_faq_answer(query: str, min_score: float, path: str = FAQ_PATH) -> Optional[str]:
+    """
+    Best FAQ answer for `query` if it matches confidently enough, without any model call.
+
+    Used as a degraded reply when a turn has no time left for the agent.
+
+    :return: The answer, or None when nothing scores at least `min_score`.
+    :rtype: Optional[str]
+    """
+    if not query.strip():
+        return None
+    try:
+        index = get_index(path)
+    except (OSError, ValueError) as e:
+        logger.warning("Local FAQ answer unavailable for %s: %s", path, e)
+        return None
+    if index.vectorizer is None:
+        return None
+    score, idx = _score_entries(query.strip(), index)[0]
+    if score < min_score:
+        return None
+    return str(index.faqs[idx].get("answer") or "") or None
+
 @function_tool
 def faq_tool(query: str) -> str:
-    return _answer_from_file(query, "data/faqs.json", 1)
+    return _answer_from_file(query, FAQ_PATH, 1)
 
 @function_tool
 def mechanic_tool(query: str) -> str:
-    return _answer_from_file(query, "data/mechanic_knowledge_base.json", 1)
-
-ToolRegistry.register_tool(
-    "knowledge.faq_tool",
-    faq_tool,
-    category="knowledge",
-    description="Answers MechaniGo FAQs using TFIDF."
-)
-
-ToolRegistry.register_tool(
-    "knowledge.mechanic_tool",
-    mechanic_tool,
-    category="knowledge",
-    description="Answers automotive related inquiries."
-)
\ No newline at end of file
+    return _answer_from_file(query, MECHANIC_KB_PATH, 1)
@@ -1,12 +1,20 @@
-from components.common import Agent, ModelSettings, openai
-from typing import Optional, List, Literal, Iterable, Any
+from components.common import (
+    Agent, ModelSettings, RunContextWrapper, Runner, RunConfig,
+    MaxTurnsExceeded, function_tool, openai
+)
+from components.utils.RunMonitor import RunMonitor, RunLoopAborted, record
+from components.utils.LLMScheduler import Priority, llm_call_scope
+from components.utils.Deadline import DeadlineExceeded, has_budget, within_deadline, deadline_tool_error
+from components.utils.prompt_cache import prompt_cache_key, turn_context_filter
+from config import settings
+from typing import Optional, List, Literal, Iterable, Any, Callable, Union
 from abc import ABC, abstractmethod
 
 def build_agent(
     api_key: str,
     name: str,
     handoff_description: str,
-    instructions: str,
+    instructions: Union[str, Callable[..., str]],
     output_type: Optional[Any] = None,
     model: Optional[str] = None,
     tools: Optional[Iterable[Any]] = None,
@@ -23,8 +31,8 @@ def build_agent(
     :type name: str
     :param handoff_description: Short description shown when control is handed to this Agent.
     :type handoff_description: str
-    :param instructions: System prompt or core instructions for the Agent.
-    :type instructions: str
+    :param instructions: System prompt or core instructions for the Agent, or a callable `(run_ctx, agent) -> str` rendered per run.
+    :type instructions: Union[str, Callable[..., str]]
     :param output_type: Expected output schema or parser; defaults to None.
     :type output_type: Optional[Any]
     :param model: LLM Model used; falls back to `ModelSettings`.
@@ -73,7 +81,7 @@ class AgentFactory(ABC):
         pass
 
     @abstractmethod
-    def get_instructions(self) -> str:
+    def get_instructions(self) -> Union[str, Callable[..., str]]:
         pass
 
     @abstractmethod
@@ -93,6 +101,37 @@ class AgentFactory(ABC):
     def get_tool_use_behavior(self) -> Literal["run_llm_again", "stop_on_first_tool"]:
         return "run_llm_again"
 
+    def get_llm_priority(self) -> Priority:
+        """
+        Scheduling class for this agent's model calls (see `LLMScheduler`).
+        """
+        return Priority.FAQ
+
+    def get_history_token_budget(self) -> int:
+        """
+        Token budget for session history sent with each run (see `history_window`).
+        """
+        return settings.HISTORY_TOKEN_BUDGETS.get(self.get_name(), settings.HISTORY_TOKEN_BUDGET)
+
+    def get_turn_context(self, context: Any) -> Optional[str]:
+        """
+        Per-user / per-turn data for the model. Sent as a note after the instructions and
+        history so the instructions stay byte-identical across users (see `prompt_cache`).
+        """
+        return None
+
+    def get_run_config(self, **kwargs: Any) -> RunConfig:
+        """
+        Run configuration for this agent's runs; `kwargs` are passed on to `RunConfig`.
+        """
+        return RunConfig(call_model_input_filter=turn_context_filter(self.get_turn_context), **kwargs)
+
+    def get_fallback_response(self) -> str:
+        """
+        Reply relayed to the user when a nested run of this agent is aborted.
+        """
+        return "Pasensya na po, nagkaproblema sa pag-process. Pwede po bang ulitin ang huling mensahe niyo?"
+
     def build(self) -> Agent:
         """
         Agent builder method.
@@ -100,6 +139,11 @@ class AgentFactory(ABC):
         :return: Configured agent.
         :rtype: Agent[Any]
         """
+        model_settings = self.get_model_settings()
+        if settings.PROMPT_CACHE_KEY_ENABLED:
+            model_settings = model_settings.resolve(
+                ModelSettings(extra_args={"prompt_cache_key": prompt_cache_key(self.get_name())})
+            )
         return build_agent(
             api_key=self.api_key,
             name=self.get_name(),
@@ -109,6 +153,56 @@ class AgentFactory(ABC):
             model=self.get_model(),
             tools=self.get_tools(),
             tool_use_behavior=self.get_tool_use_behavior(),
-            model_settings=self.get_model_settings(),
+            model_settings=model_settings,
             input_guardrails=self.get_input_guardrails()
-        )
\ No newline at end of file
+        )
+
+    def build_monitored_tool(self) -> Any:
+        """
+        Wrap this agent as a tool (like `Agent.as_tool`) whose nested run is watched by a
+        `RunMonitor` and capped at `settings.SUB_AGENT_MAX_TURNS`.
+
+        Loops, token overspend and max-turn overruns end the run early with
+        `get_fallback_response()` instead of an error. Running out of the request's
+        deadline raises `DeadlineExceeded` so the manager turn can degrade.
+
+        :return: Function tool that runs the agent.
+        :rtype: FunctionTool
+        """
+        agent = self.build()
+        name = self.get_name()
+        fallback = self.get_fallback_response()
+        priority = self.get_llm_priority()
+
+        @function_tool(
+            name_override=name,
+            description_override=self.get_handoff_description(),
+            failure_error_function=deadline_tool_error
+        )
+        async def run_agent(context: RunContextWrapper, input: str) -> Any:
+            if not has_budget(settings.DEADLINE_SUB_AGENT_MIN_SECONDS):
+                # Not enough time left for a nested run; the manager turn degrades instead.
+                raise DeadlineExceeded(name)
+            monitor = RunMonitor(agent_name=name, prompt=input)
+            try:
+                with llm_call_scope(priority=priority):
+                    output = await within_deadline(
+                        Runner.run(
+                            starting_agent=agent,
+                            input=input,
+                            context=context.context,
+                            max_turns=settings.SUB_AGENT_MAX_TURNS,
+                            hooks=monitor,
+                            run_config=self.get_run_config()
+                        ),
+                        stage=name,
+                        reserve=settings.DEADLINE_RESERVE_SECONDS
+                    )
+            except RunLoopAborted:
+                return fallback
+            except MaxTurnsExceeded as e:
+                record(name, "max_turns", str(e), input, monitor.tokens)
+                return fallback
+            return output.final_output
+
+        return run_agent
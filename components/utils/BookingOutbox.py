@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from pathlib import Path
+import hashlib
+import contextvars
+import asyncio
+import logging
+import sqlite3
+import random
+import json
+import time
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[str, Dict[str, Any]], Awaitable[None]]
+# Called with the final status ("delivered" or "failed") of a row enqueued by this process.
+Settled = Callable[[str], None]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS booking_outbox (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS booking_outbox_due ON booking_outbox (status, next_attempt_at);
+"""
+
+# Oldest undelivered row per user only, so a retried older write never lands after a newer
+# one. A 'sending' row whose lease ran out (its worker died mid-delivery) is due again.
+_DUE_QUERY = """
+SELECT id, user_id, payload, attempts FROM booking_outbox AS o
+WHERE status IN ('pending', 'sending') AND next_attempt_at <= ?
+AND NOT EXISTS (
+    SELECT 1 FROM booking_outbox AS p
+    WHERE p.user_id = o.user_id AND p.status IN ('pending', 'sending') AND p.created_at < o.created_at
+)
+ORDER BY created_at
+LIMIT ?
+"""
+
+# A key that is already queued or delivered is left alone; one that failed for good is
+# queued again from scratch, ordered as a new write so it can't overtake newer ones.
+_ENQUEUE_QUERY = """
+INSERT INTO booking_outbox (id, user_id, payload, next_attempt_at, created_at, updated_at)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    status = 'pending', attempts = 0, last_error = NULL, next_attempt_at = excluded.next_attempt_at,
+    created_at = excluded.created_at, updated_at = excluded.updated_at
+WHERE booking_outbox.status = 'failed'
+"""
+
+# Several workers can share the file; only the one whose claim updates the row delivers it.
+_CLAIM_QUERY = """
+UPDATE booking_outbox SET status = 'sending', next_attempt_at = ?, updated_at = ?
+WHERE id = ? AND status IN ('pending', 'sending') AND next_attempt_at <= ?
+RETURNING id
+"""
+
+
+def idempotency_key(user_id: str, payload: Dict[str, Any], base: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Stable key for one logical booking write: the same change on top of the same row state
+    always maps to the same key, so repeated tool calls enqueue it only once.
+    """
+    raw = json.dumps([user_id, payload, base or {}], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class BookingOutbox:
+    """
+    Durable, SQLite-backed outbox for booking writes.
+
+    `enqueue` records the payload locally and returns immediately; a background worker
+    claims due rows (a lease of `lease_seconds`, so workers sharing the file never send
+    the same row twice) and delivers them with retries and exponential backoff. Delivery
+    status is queryable by the idempotency key returned from `enqueue`.
+    """
+    def __init__(
+        self,
+        path: str = settings.BOOKING_OUTBOX_PATH,
+        deliver: Optional[Deliver] = None,
+        max_attempts: int = settings.BOOKING_OUTBOX_MAX_ATTEMPTS,
+        base_delay: float = settings.BOOKING_OUTBOX_BASE_DELAY_SECONDS,
+        max_delay: float = settings.BOOKING_OUTBOX_MAX_DELAY_SECONDS,
+        poll_interval: float = 1.0,
+        batch_size: int = 20,
+        lease_seconds: float = 60.0
+    ):
+        self.path = path
+        self.deliver = deliver
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+
+        self._initialized = False
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._on_settled: Dict[str, List[Settled]] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._initialized = True
+        return conn
+
+    def _execute(self, query: str, params: tuple = ()) -> List[sqlite3.Row]:
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+
+    async def _run(self, query: str, params: tuple = ()) -> List[sqlite3.Row]:
+        return await asyncio.to_thread(self._execute, query, params)
+
+    async def enqueue(
+        self,
+        user_id: str,
+        payload: Dict[str, Any],
+        key: Optional[str] = None,
+        on_settled: Optional[Settled] = None
+    ) -> str:
+        """
+        Record a booking payload for delivery.
+
+        :param user_id: Booking owner (`user_bookings.user_id`).
+        :type user_id: str
+        :param payload: Columns to upsert.
+        :type payload: Dict[str, Any]
+        :param key: Idempotency key; derived from the payload when omitted. Enqueuing a key
+            that already failed for good queues it again with a fresh attempt budget.
+        :type key: Optional[str]
+        :param on_settled: Called once the row is delivered or has failed for good (in this
+            process only; lost on restart).
+        :type on_settled: Optional[Callable[[str], None]]
+        :return: The idempotency key (delivery id).
+        :rtype: str
+        """
+        key = key or idempotency_key(user_id, payload)
+        now = time.time()
+        await self._run(_ENQUEUE_QUERY, (key, user_id, json.dumps(payload, default=str), now, now, now))
+        if on_settled is not None:
+            self._on_settled.setdefault(key, []).append(on_settled)
+            status = await self.get_status(key)
+            if status is not None and status["status"] in ("delivered", "failed"):
+                # Same write enqueued earlier and already settled.
+                self._settle(key, status["status"])
+        self.start()
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return key
+
+    async def get_status(self, key: str) -> Optional[Dict[str, Any]]:
+        rows = await self._run(
+            "SELECT id, user_id, status, attempts, last_error, created_at, updated_at "
+            "FROM booking_outbox WHERE id = ?",
+            (key,)
+        )
+        return dict(rows[0]) if rows else None
+
+    async def stats(self) -> Dict[str, int]:
+        rows = await self._run("SELECT status, COUNT(*) AS total FROM booking_outbox GROUP BY status")
+        return {row["status"]: row["total"] for row in rows}
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    async def process_due(self) -> int:
+        """
+        Deliver every row that is currently due. Returns how many were attempted.
+        """
+        if self.deliver is None:
+            return 0
+        now = time.time()
+        rows = await self._run(_DUE_QUERY, (now, self.batch_size))
+        attempted = 0
+        for row in rows:
+            claimed = await self._run(_CLAIM_QUERY, (time.time() + self.lease_seconds, time.time(), row["id"], now))
+            if not claimed:
+                # Another worker took it between the scan and the claim.
+                continue
+            attempted += 1
+            attempts = row["attempts"] + 1
+            try:
+                await self.deliver(row["user_id"], json.loads(row["payload"]))
+            except Exception as e:
+                now = time.time()
+                status = "failed" if attempts >= self.max_attempts else "pending"
+                await self._run(
+                    "UPDATE booking_outbox SET status = ?, attempts = ?, next_attempt_at = ?, "
+                    "last_error = ?, updated_at = ? WHERE id = ?",
+                    (status, attempts, now + self._backoff(attempts), str(e)[:500], now, row["id"])
+                )
+                logger.warning(
+                    "Booking outbox delivery failed (id=%s, attempt %d/%d): %s",
+                    row["id"], attempts, self.max_attempts, e
+                )
+                if status == "failed":
+                    self._settle(row["id"], status)
+            else:
+                await self._run(
+                    "UPDATE booking_outbox SET status = 'delivered', attempts = ?, last_error = NULL, "
+                    "updated_at = ? WHERE id = ?",
+                    (attempts, time.time(), row["id"])
+                )
+                self._settle(row["id"], "delivered")
+        return attempted
+
+    def _settle(self, key: str, status: str) -> None:
+        for callback in self._on_settled.pop(key, []):
+            try:
+                callback(status)
+            except Exception:
+                logger.exception("Booking outbox settle callback failed (id=%s)", key)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.process_due()
+            except Exception:
+                logger.exception("Booking outbox worker error")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        """
+        Start the delivery worker on the running event loop (no-op if already running).
+        """
+        if self._worker is not None and not self._worker.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._wakeup = asyncio.Event()
+        # Fresh context: the worker mustn't inherit the enqueuing request's deadline or priority.
+        self._worker = loop.create_task(self._loop(), context=contextvars.Context())
+
+    async def stop(self) -> None:
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
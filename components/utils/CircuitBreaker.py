@@ -0,0 +1,170 @@
+"""
+Circuit breaker for calls to an external dependency (Supabase).
+
+After `failure_threshold` consecutive failures the breaker opens and calls fail fast with
+`CircuitOpenError` instead of blocking on a database that is down; callers fall back to
+local state. After `reset_timeout` it goes half-open and lets `half_open_probes` calls
+through: a success closes it again, a failure re-opens it. A call cut short by the request
+deadline (`DeadlineExceeded`, or cancellation) says nothing about the dependency's health
+and counts as neither. Errors the caller classifies as its own fault (`is_failure` returns
+False, e.g. an HTTP 4xx) are raised as-is and count as an answer from a healthy dependency.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+from enum import Enum
+import logging
+import time
+
+from components.utils.Deadline import DeadlineExceeded
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling the dependency while its breaker is open.
+    """
+    def __init__(self, name: str, retry_in: float):
+        self.name = name
+        self.retry_in = retry_in
+        super().__init__(f"{name} circuit is open (retry in {retry_in:.1f}s)")
+
+
+class CircuitBreaker:
+    """
+    :param name: Dependency name, used in errors, logs and stats.
+    :param failure_threshold: Consecutive failures that open the circuit.
+    :param reset_timeout: Seconds the circuit stays open before probing.
+    :param half_open_probes: Calls let through at once while half-open.
+    """
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = settings.SUPABASE_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = settings.SUPABASE_BREAKER_RESET_SECONDS,
+        half_open_probes: int = settings.SUPABASE_BREAKER_HALF_OPEN_PROBES
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = max(1, half_open_probes)
+
+        self.state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._on_close: List[Callable[[], None]] = []
+        self._stats = {"calls": 0, "failures": 0, "rejected": 0, "opened": 0, "probes": 0}
+
+    @property
+    def is_open(self) -> bool:
+        """
+        True while calls would be rejected right now.
+        """
+        return self.state == CircuitState.OPEN and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def on_close(self, callback: Callable[[], None]) -> None:
+        """
+        Register a callback run when the circuit closes after an outage (e.g. to replay writes).
+        """
+        self._on_close.append(callback)
+
+    def _admit(self) -> bool:
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = CircuitState.HALF_OPEN
+            self._probes = 0
+            logger.info("%s circuit half-open; probing", self.name)
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probes >= self.half_open_probes:
+                return False
+            self._probes += 1
+            self._stats["probes"] += 1
+        return True
+
+    def _record_success(self) -> None:
+        self._failures = 0
+        if self.state != CircuitState.CLOSED:
+            self.state = CircuitState.CLOSED
+            logger.info("%s circuit closed", self.name)
+            for callback in self._on_close:
+                try:
+                    callback()
+                except Exception:
+                    logger.exception("%s circuit on_close callback failed", self.name)
+
+    def _record_failure(self, error: BaseException) -> None:
+        self._stats["failures"] += 1
+        self._failures += 1
+        if self.state == CircuitState.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != CircuitState.OPEN:
+                self._stats["opened"] += 1
+                logger.warning("%s circuit opened after %d failure(s): %s", self.name, self._failures, error)
+            self.state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+
+    async def call(
+        self,
+        call: Callable[[], Awaitable[T]],
+        is_failure: Optional[Callable[[Exception], bool]] = None
+    ) -> T:
+        """
+        Run `call` through the breaker.
+
+        :param call: Starts the dependency call; not invoked while the circuit is open.
+        :type call: Callable[[], Awaitable[T]]
+        :param is_failure: Whether an error means the dependency is unhealthy; every error
+            does when omitted.
+        :type is_failure: Optional[Callable[[Exception], bool]]
+        :raises CircuitOpenError: If the circuit is open (or half-open with its probes in flight).
+        :return: The call's result.
+        :rtype: T
+        """
+        if not self._admit():
+            self._stats["rejected"] += 1
+            raise CircuitOpenError(self.name, max(0.0, self._opened_at + self.reset_timeout - time.monotonic()))
+        self._stats["calls"] += 1
+        try:
+            result = await call()
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            if is_failure is None or is_failure(e):
+                self._record_failure(e)
+            else:
+                self._record_success()
+            raise
+        finally:
+            if self.state == CircuitState.HALF_OPEN:
+                self._probes -= 1
+        self._record_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state.value, "consecutive_failures": self._failures, **self._stats}
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str = "supabase") -> CircuitBreaker:
+    """
+    Process-wide breaker for a dependency (created on first use).
+    """
+    breaker = _BREAKERS.get(name)
+    if breaker is None:
+        breaker = _BREAKERS[name] = CircuitBreaker(name)
+    return breaker
+
+
+def get_circuit_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: breaker.stats() for name, breaker in _BREAKERS.items()}
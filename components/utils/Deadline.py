@@ -0,0 +1,139 @@
+"""
+Per-request deadline budget.
+
+`POST /send-message` opens a `deadline_scope` for the turn; everything it awaits (guardrail,
+manager run, sub-agent tools, extraction, Supabase reads/writes) sees the same `Deadline`
+through the `request_deadline` context variable. Calls are bounded with `within_deadline`,
+and callers check `has_budget` before an optional step so that, when time is short, they
+take a cheaper path (skip the history read, answer from the local FAQ, short fallback reply)
+instead of running into the client's timeout.
+"""
+from dataclasses import dataclass
+from typing import Any, Awaitable, Dict, Iterator, Optional, TypeVar
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import inspect
+import math
+import time
+
+from components.common import AgentsException, RunContextWrapper, default_tool_error_function
+
+T = TypeVar("T")
+
+_STATS: Dict[str, Any] = {
+    "requests": 0,
+    "timeouts": {},
+    "degraded": {}
+}
+
+
+@dataclass(frozen=True)
+class Deadline:
+    expires_at: float
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(expires_at=time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+
+class DeadlineExceeded(AgentsException):
+    """
+    Raised when a step can't finish within the request's remaining budget.
+
+    Tools that may raise it use `deadline_tool_error` as their failure handler, so it
+    reaches the manager turn (which degrades) instead of going back to the model as a
+    tool error.
+    """
+    def __init__(self, stage: str):
+        self.stage = stage
+        super().__init__(f"deadline exceeded during {stage}")
+
+
+request_deadline: ContextVar[Optional[Deadline]] = ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline) -> Iterator[Deadline]:
+    """
+    Apply `deadline` to everything awaited inside the block (including nested tasks).
+    """
+    token = request_deadline.set(deadline)
+    _STATS["requests"] += 1
+    try:
+        yield deadline
+    finally:
+        request_deadline.reset(token)
+
+
+def remaining_budget() -> float:
+    """
+    Seconds left for the current request (infinite outside a `deadline_scope`).
+    """
+    deadline = request_deadline.get()
+    return deadline.remaining() if deadline is not None else math.inf
+
+
+def has_budget(seconds: float) -> bool:
+    return remaining_budget() >= seconds
+
+
+def mark_degraded(path: str) -> None:
+    """
+    Count a turn that took a cheaper path because the budget ran low.
+    """
+    _STATS["degraded"][path] = _STATS["degraded"].get(path, 0) + 1
+
+
+async def within_deadline(awaitable: Awaitable[T], stage: str, reserve: float = 0.0) -> T:
+    """
+    Await `awaitable`, cancelling it once the request's budget (minus `reserve`) runs out.
+
+    :param awaitable: The call to bound.
+    :type awaitable: Awaitable[T]
+    :param stage: Label used in the raised error and the timeout counters.
+    :type stage: str
+    :param reserve: Seconds kept back for the caller to build a degraded reply.
+    :type reserve: float
+    :raises DeadlineExceeded: If the budget is already spent or runs out while waiting.
+    :return: The awaitable's result.
+    :rtype: T
+    """
+    timeout = remaining_budget() - reserve
+    if timeout == math.inf:
+        return await awaitable
+    if timeout <= 0:
+        if inspect.iscoroutine(awaitable):
+            awaitable.close()
+        _count_timeout(stage)
+        raise DeadlineExceeded(stage)
+    try:
+        return await asyncio.wait_for(awaitable, timeout=timeout)
+    except asyncio.TimeoutError:
+        _count_timeout(stage)
+        raise DeadlineExceeded(stage) from None
+
+
+def _count_timeout(stage: str) -> None:
+    _STATS["timeouts"][stage] = _STATS["timeouts"].get(stage, 0) + 1
+
+
+def deadline_tool_error(ctx: RunContextWrapper[Any], error: Exception) -> str:
+    """
+    `failure_error_function` for tools: re-raises `DeadlineExceeded`, otherwise behaves
+    like the SDK default.
+    """
+    if isinstance(error, DeadlineExceeded):
+        raise error
+    return default_tool_error_function(ctx, error)
+
+
+def get_deadline_stats() -> Dict[str, Any]:
+    return {
+        "requests": _STATS["requests"],
+        "timeouts": dict(_STATS["timeouts"]),
+        "degraded": dict(_STATS["degraded"])
+    }
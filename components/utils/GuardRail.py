@@ -6,6 +6,11 @@ from components.common import (
     Runner,
     Agent
 )
+from components.utils.LLMScheduler import Priority, llm_call_scope
+from components.utils.Deadline import DeadlineExceeded, within_deadline, mark_degraded
+from components.utils.Hedging import hedged
+from components.utils.usage_tracking import agent_model, track_usage
+from config import settings
 from pydantic import BaseModel, Field
 from typing import Any
 
@@ -46,12 +51,26 @@ async def mechanigo_guardrail(
     agent: Agent,
     user_input: str | list[TResponseInputItem]
 ) -> GuardrailFunctionOutput:
-    result = await Runner.run(
-        _guardrail_agent,
-        user_input,
-        context=ctx.context
-    )
+    def record_usage(run: Any) -> None:
+        track_usage(ctx.context, "guardrail", agent_model(_guardrail_agent), (response.usage for response in run.raw_responses))
+
+    try:
+        with llm_call_scope(priority=Priority.GUARDRAIL):
+            result = await within_deadline(
+                hedged("guardrail", lambda: Runner.run(
+                    _guardrail_agent,
+                    user_input,
+                    context=ctx.context
+                ), on_loser=record_usage),
+                stage="guardrail",
+                reserve=settings.DEADLINE_RESERVE_SECONDS
+            )
+    except DeadlineExceeded:
+        # Out of budget: let the turn through; the manager run is bound by the same deadline.
+        mark_degraded("guardrail_skipped")
+        return GuardrailFunctionOutput(output_info=None, tripwire_triggered=False)
 
+    record_usage(result)
     verdict: InputGuardRailOutput = result.final_output
     should_block = (
         verdict.is_prompt_injection
@@ -0,0 +1,208 @@
+"""
+Hedged requests for short, latency-sensitive model calls (guardrail, LLM extraction).
+
+Their median latency is low but the tail is long, and they sit on the critical path. With
+`settings.HEDGING_ENABLED`, a call that hasn't answered by the observed p90 latency for its
+kind gets a duplicate; whichever finishes first wins. The other is left to finish in the
+background rather than cancelled: the request is already with the provider and billed either
+way, and its latency keeps the percentile honest (winners alone would pull it down). A budget
+caps the hedges at `settings.HEDGE_BUDGET_RATIO` of calls so the extra spend stays bounded.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set, TypeVar
+from collections import deque
+import asyncio
+import logging
+import time
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class _CallStats:
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=settings.HEDGE_WINDOW))
+    calls: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    budget_denied: int = 0
+    losers: int = 0
+    losers_completed: int = 0
+
+    def threshold(self) -> Optional[float]:
+        """
+        Hedge delay: the observed latency percentile, once there are enough samples.
+        """
+        if len(self.latencies) < settings.HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        rank = min(len(ordered) - 1, int(len(ordered) * settings.HEDGE_PERCENTILE))
+        return max(settings.HEDGE_MIN_DELAY_SECONDS, ordered[rank])
+
+
+class HedgePolicy:
+    """
+    Per-kind latency tracking and hedge budget, per worker process.
+
+    :param budget_ratio: Hedges allowed per call (0.1 = at most ~10% extra requests).
+    :param burst: Hedges that can be spent at once after a quiet period.
+    """
+    def __init__(
+        self,
+        budget_ratio: float = settings.HEDGE_BUDGET_RATIO,
+        burst: float = settings.HEDGE_BUDGET_BURST
+    ):
+        self.budget_ratio = budget_ratio
+        self.burst = burst
+        self._budget = burst
+        self._calls: Dict[str, _CallStats] = {}
+        self._losers: Set[asyncio.Future] = set()
+
+    def _stats(self, kind: str) -> _CallStats:
+        stats = self._calls.get(kind)
+        if stats is None:
+            stats = self._calls[kind] = _CallStats()
+        return stats
+
+    def _take_budget(self) -> bool:
+        if self._budget >= 1:
+            self._budget -= 1
+            return True
+        return False
+
+    def _let_finish(
+        self,
+        stats: _CallStats,
+        attempt: asyncio.Future,
+        started: float,
+        on_loser: Optional[Callable[[Any], None]]
+    ) -> None:
+        stats.losers += 1
+        self._losers.add(attempt)
+
+        def finished(future: asyncio.Future) -> None:
+            self._losers.discard(future)
+            if future.cancelled() or future.exception() is not None:
+                return
+            stats.losers_completed += 1
+            stats.latencies.append(time.monotonic() - started)
+            if on_loser is not None:
+                try:
+                    on_loser(future.result())
+                except Exception:
+                    logger.exception("Hedge loser callback failed")
+
+        attempt.add_done_callback(finished)
+
+    async def run(
+        self,
+        kind: str,
+        call: Callable[[], Awaitable[T]],
+        on_loser: Optional[Callable[[T], None]] = None
+    ) -> T:
+        """
+        Run `call`, hedging it with a second attempt if it's slower than usual.
+
+        :param kind: Call family whose latency sets the hedge delay (e.g. "guardrail").
+        :type kind: str
+        :param call: Starts one attempt; invoked a second time for the hedge.
+        :type call: Callable[[], Awaitable[T]]
+        :param on_loser: Called with the losing attempt's result once it finishes in the
+            background, e.g. to record its token usage.
+        :type on_loser: Optional[Callable[[T], None]]
+        :return: The first successful attempt's result.
+        :rtype: T
+        """
+        stats = self._stats(kind)
+        stats.calls += 1
+        self._budget = min(self.burst, self._budget + self.budget_ratio)
+
+        started = time.monotonic()
+        primary = asyncio.ensure_future(call())
+        delay = stats.threshold()
+        if not settings.HEDGING_ENABLED or delay is None:
+            result = await primary
+            stats.latencies.append(time.monotonic() - started)
+            return result
+
+        pending = {primary}
+        hedge: Optional[asyncio.Future] = None
+        started_at = {primary: started}
+        answered = False
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                if self._take_budget():
+                    stats.hedged += 1
+                    hedge = asyncio.ensure_future(call())
+                    started_at[hedge] = time.monotonic()
+                    pending.add(hedge)
+                else:
+                    stats.budget_denied += 1
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next(iter(done))
+                if winner.exception() is not None and pending:
+                    # One attempt failed; the other may still succeed.
+                    continue
+                if winner is hedge:
+                    stats.hedge_wins += 1
+                result = winner.result()
+                answered = True
+                # Each attempt is timed from its own start; the loser adds its sample when done.
+                stats.latencies.append(time.monotonic() - started_at[winner])
+                for loser in pending:
+                    self._let_finish(stats, loser, started_at[loser], on_loser)
+                return result
+        finally:
+            if not answered:
+                # The caller gave up (deadline, cancellation) or both attempts failed.
+                for attempt in (primary, hedge):
+                    if attempt is not None and not attempt.done():
+                        attempt.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"enabled": settings.HEDGING_ENABLED, "budget": round(self._budget, 2)}
+        for kind, stats in self._calls.items():
+            threshold = stats.threshold()
+            result[kind] = {
+                "calls": stats.calls,
+                "hedged": stats.hedged,
+                "hedge_wins": stats.hedge_wins,
+                "budget_denied": stats.budget_denied,
+                "losers": stats.losers,
+                "losers_completed": stats.losers_completed,
+                "hedge_rate": round(stats.hedged / stats.calls, 4) if stats.calls else 0.0,
+                "win_rate": round(stats.hedge_wins / stats.hedged, 4) if stats.hedged else 0.0,
+                "hedge_after_seconds": round(threshold, 3) if threshold is not None else None
+            }
+        return result
+
+
+_policy: Optional[HedgePolicy] = None
+
+
+def get_hedge_policy() -> HedgePolicy:
+    global _policy
+    if _policy is None:
+        _policy = HedgePolicy()
+    return _policy
+
+
+async def hedged(
+    kind: str,
+    call: Callable[[], Awaitable[T]],
+    on_loser: Optional[Callable[[T], None]] = None
+) -> T:
+    """
+    Shortcut for `get_hedge_policy().run(kind, call, on_loser)`.
+    """
+    return await get_hedge_policy().run(kind, call, on_loser)
+
+
+def get_hedging_stats() -> Dict[str, Any]:
+    return get_hedge_policy().stats() if _policy is not None else {"enabled": settings.HEDGING_ENABLED}
@@ -0,0 +1,126 @@
+"""
+Process-wide `httpx.AsyncClient` shared by the OpenAI clients (Agents SDK model
+provider, extraction) and the Supabase client, so every outbound call reuses one
+tuned connection pool instead of each library opening its own.
+"""
+from typing import Any, Dict, Iterable, Optional
+from importlib.util import find_spec
+from collections import Counter
+import logging
+import asyncio
+import httpx
+
+from components.utils.LLMScheduler import SchedulerTransport
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_http_client: Optional[httpx.AsyncClient] = None
+_STATS = {
+    "requests": 0,
+    "clients_created": 0
+}
+
+
+def get_http_timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        settings.HTTP_READ_TIMEOUT_SECONDS,
+        connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS
+    )
+
+
+async def _count_request(request: httpx.Request) -> None:
+    _STATS["requests"] += 1
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared HTTP client, creating it on first use.
+
+    Pool size, keep-alive expiry, HTTP/2 and timeouts come from the `HTTP_*` settings.
+    HTTP/2 is silently skipped when the `h2` package isn't installed.
+
+    :return: Shared async HTTP client.
+    :rtype: httpx.AsyncClient
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        http2 = settings.HTTP2_ENABLED and find_spec("h2") is not None
+        if settings.HTTP2_ENABLED and not http2:
+            logger.warning("HTTP2_ENABLED is set but `h2` isn't installed; using HTTP/1.1")
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+            ),
+            http2=http2
+        )
+        _http_client = httpx.AsyncClient(
+            # Model calls are admitted by the process-wide LLM scheduler; other requests pass through.
+            transport=SchedulerTransport(transport),
+            timeout=get_http_timeout(),
+            follow_redirects=True,
+            event_hooks={"request": [_count_request]}
+        )
+        _STATS["clients_created"] += 1
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
+
+async def prewarm_connections(urls: Iterable[str], timeout: float = 5.0) -> Dict[str, bool]:
+    """
+    Open (TCP + TLS) a pooled connection to each URL with a cheap HEAD request so the
+    first real call doesn't pay the handshake. The response status is irrelevant.
+
+    :return: Whether a connection could be opened, per URL.
+    :rtype: Dict[str, bool]
+    """
+    client = get_http_client()
+
+    async def _open(url: str) -> bool:
+        try:
+            await client.head(url, timeout=timeout)
+            return True
+        except httpx.HTTPError as e:
+            logger.warning("Could not prewarm connection to %s: %s", url, e)
+            return False
+
+    urls = [url for url in urls if url]
+    results = await asyncio.gather(*(_open(url) for url in urls))
+    return dict(zip(urls, results))
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Pool utilization snapshot: open/idle/active connections per origin and queued requests.
+    """
+    stats: Dict[str, Any] = {
+        **_STATS,
+        "max_connections": settings.HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.HTTP_MAX_KEEPALIVE_CONNECTIONS
+    }
+    transport = getattr(_http_client, "_transport", None)
+    pool = getattr(getattr(transport, "transport", transport), "_pool", None)
+    if pool is None:
+        return {**stats, "open": 0, "idle": 0, "active": 0, "queued": 0, "by_origin": {}}
+
+    connections = list(pool.connections)
+    idle = sum(1 for conn in connections if conn.is_idle())
+    by_origin = Counter(str(getattr(conn, "_origin", "unknown")) for conn in connections)
+    queued = sum(1 for request in getattr(pool, "_requests", []) if request.is_queued())
+    return {
+        **stats,
+        "open": len(connections),
+        "idle": idle,
+        "active": len(connections) - idle,
+        "queued": queued,
+        "utilization": round(len(connections) / settings.HTTP_MAX_CONNECTIONS, 3),
+        "by_origin": dict(by_origin)
+    }
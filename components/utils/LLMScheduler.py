@@ -0,0 +1,431 @@
+"""
+Process-wide scheduler for OpenAI model calls.
+
+Every model call (manager agent, sub-agents, guardrail, extraction) goes through the shared
+HTTP client, so the scheduler sits there as a transport: before a `/responses` or
+`/chat/completions` request is sent it waits for a concurrency slot and for room in the
+model's rolling one-minute RPM/TPM budget (using an up-front token estimate), and after the
+response it reconciles the estimate with the actual usage. A 429 pauses the whole model
+for every caller instead of each call backing off on its own.
+
+Waiting calls are ordered by priority class (booking > mechanic > FAQ > guardrail >
+background), taken from the `llm_priority` context variable, and within a class by deficit
+round-robin over `llm_user`, so one chatty user can't starve the rest.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+import asyncio
+import logging
+import json
+import time
+
+import httpx
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = 60.0
+MODEL_PATHS = ("/responses", "/chat/completions")
+
+
+
+class Priority(IntEnum):
+    """
+    Scheduling class of a model call; lower value is served first.
+    """
+    BOOKING = 0
+    MECHANIC = 1
+    FAQ = 2
+    GUARDRAIL = 3
+    BACKGROUND = 4
+
+
+llm_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.FAQ)
+llm_user: ContextVar[str] = ContextVar("llm_user", default="anonymous")
+
+
+@contextmanager
+def llm_call_scope(priority: Optional[Priority] = None, user_id: Optional[str] = None) -> Iterator[None]:
+    """
+    Tag every model call made inside the block (including nested tasks) with a priority
+    class and/or user id for the scheduler.
+    """
+    tokens = []
+    if priority is not None:
+        tokens.append((llm_priority, llm_priority.set(priority)))
+    if user_id is not None:
+        tokens.append((llm_user, llm_user.set(user_id)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+_STATS: Dict[str, float] = {
+    "granted": 0,
+    "waited": 0,
+    "wait_seconds": 0.0,
+    "rate_limited": 0,
+    "estimated_tokens": 0,
+    "actual_tokens": 0
+}
+
+
+@dataclass
+class _Usage:
+    at: float
+    tokens: int
+
+
+@dataclass
+class Ticket:
+    model: str
+    usage: _Usage
+    waited: float = 0.0
+
+
+@dataclass
+class _Waiter:
+    model: str
+    tokens: int
+    future: asyncio.Future
+    priority: Priority = Priority.FAQ
+    user: str = "anonymous"
+    enqueued: float = field(default_factory=time.monotonic)
+
+
+_MAX_WAIT_SAMPLES = 500
+
+
+class LLMScheduler:
+    """
+    Admission control for model calls: a global concurrency cap plus rolling per-model
+    RPM/TPM windows, and a shared per-model pause after rate-limit responses.
+
+    :param max_concurrency: Max model calls in flight.
+    :param limits: Model -> {"rpm": int, "tpm": int}.
+    :param quantum: Deficit round-robin credit (tokens) a user earns per round.
+    :param aging: Seconds after which a waiting call is served ahead of every class.
+    """
+    def __init__(
+        self,
+        max_concurrency: int = settings.LLM_MAX_CONCURRENCY,
+        limits: Optional[Dict[str, Dict[str, int]]] = None,
+        quantum: int = settings.LLM_FAIRNESS_QUANTUM_TOKENS,
+        aging: float = settings.LLM_PRIORITY_AGING_SECONDS
+    ):
+        self.max_concurrency = max_concurrency
+        self.limits = limits if limits is not None else settings.LLM_MODEL_LIMITS
+        self.quantum = quantum
+        self.aging = aging
+        self._active = 0
+        # priority -> user -> that user's waiting calls (round-robin order)
+        self._queues: Dict[Priority, "OrderedDict[str, Deque[_Waiter]]"] = {p: OrderedDict() for p in Priority}
+        self._deficits: Dict[Priority, Dict[str, int]] = {p: {} for p in Priority}
+        self._waits: Dict[Priority, Deque[float]] = {p: deque(maxlen=_MAX_WAIT_SAMPLES) for p in Priority}
+        self._windows: Dict[str, Deque[_Usage]] = {}
+        self._paused_until: Dict[str, float] = {}
+        self._backoff: Dict[str, float] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _limit(self, model: str, key: str) -> int:
+        default = settings.LLM_DEFAULT_RPM if key == "rpm" else settings.LLM_DEFAULT_TPM
+        return self.limits.get(model, {}).get(key, default)
+
+    def _window(self, model: str, now: float) -> Deque[_Usage]:
+        window = self._windows.setdefault(model, deque())
+        while window and window[0].at <= now - WINDOW_SECONDS:
+            window.popleft()
+        return window
+
+    def _ready_at(self, model: str, tokens: int, now: float) -> float:
+        """
+        Earliest time a call for `model` fits its budget (`now` if it fits already).
+        """
+        paused = self._paused_until.get(model, 0.0)
+        if paused > now:
+            return paused
+        window = self._window(model, now)
+        used = sum(entry.tokens for entry in window)
+        # An empty window always admits, so a single oversized request can't wait forever.
+        if window and (len(window) >= self._limit(model, "rpm") or used + tokens > self._limit(model, "tpm")):
+            return window[0].at + WINDOW_SECONDS
+        return now
+
+    def _waiters(self) -> List[_Waiter]:
+        return [w for queue in self._queues.values() for waiters in queue.values() for w in waiters]
+
+    def _remove(self, waiter: _Waiter) -> None:
+        queue = self._queues[waiter.priority]
+        waiters = queue.get(waiter.user)
+        if waiters is None or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        if not waiters:
+            del queue[waiter.user]
+            self._deficits[waiter.priority].pop(waiter.user, None)
+
+    def _select_fair(self, priority: Priority, now: float) -> Optional[_Waiter]:
+        """
+        Deficit round-robin over the users waiting in one class: a user's head call is
+        served once their accumulated credit covers its token estimate.
+        """
+        queue = self._queues[priority]
+        deficits = self._deficits[priority]
+        blocked = 0
+        while queue and blocked < len(queue):
+            user, waiters = next(iter(queue.items()))
+            head = waiters[0]
+            if self._ready_at(head.model, head.tokens, now) > now:
+                queue.move_to_end(user)
+                blocked += 1
+                continue
+            blocked = 0
+            if deficits.get(user, 0) < head.tokens:
+                deficits[user] = deficits.get(user, 0) + self.quantum
+                queue.move_to_end(user)
+                continue
+            deficits[user] -= head.tokens
+            return head
+        return None
+
+    def _select(self, now: float) -> Optional[_Waiter]:
+        """
+        Next waiter to admit: any call waiting longer than `aging` first (so low classes
+        can't starve), then the highest class with a user whose model has budget left.
+        """
+        aged = [
+            queue_waiters[0] for queue in self._queues.values() for queue_waiters in queue.values()
+            if now - queue_waiters[0].enqueued >= self.aging
+            and self._ready_at(queue_waiters[0].model, queue_waiters[0].tokens, now) <= now
+        ]
+        if aged:
+            return min(aged, key=lambda w: w.enqueued)
+        for priority in Priority:
+            waiter = self._select_fair(priority, now)
+            if waiter is not None:
+                return waiter
+        return None
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        while self._active < self.max_concurrency:
+            waiter = self._select(now)
+            if waiter is None:
+                break
+            self._remove(waiter)
+            if waiter.future.done(): # caller gave up while queued
+                continue
+            usage = _Usage(at=now, tokens=waiter.tokens)
+            self._window(waiter.model, now).append(usage)
+            self._active += 1
+            self._waits[waiter.priority].append(now - waiter.enqueued)
+            waiter.future.set_result(Ticket(model=waiter.model, usage=usage, waited=now - waiter.enqueued))
+
+        waiting = self._waiters()
+        if waiting and self._active < self.max_concurrency:
+            # Blocked on budgets only; wake up when the earliest one frees.
+            wake = min(self._ready_at(w.model, w.tokens, now) for w in waiting)
+            self._timer = asyncio.get_running_loop().call_later(max(0.01, wake - now), self._dispatch)
+
+    async def acquire(self, model: str, tokens: int) -> Ticket:
+        """
+        Wait until a call for `model` estimated at `tokens` may be sent. The priority class
+        and user come from the `llm_priority` / `llm_user` context variables.
+
+        :param model: Model name from the request body.
+        :type model: str
+        :param tokens: Up-front token estimate (input + max output).
+        :type tokens: int
+        :return: Ticket to pass to `release` once the response is in.
+        :rtype: Ticket
+        """
+        waiter = _Waiter(
+            model=model,
+            tokens=tokens,
+            future=asyncio.get_running_loop().create_future(),
+            priority=llm_priority.get(),
+            user=llm_user.get()
+        )
+        self._queues[waiter.priority].setdefault(waiter.user, deque()).append(waiter)
+        self._dispatch()
+        try:
+            ticket = await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(waiter.future.result())
+            else:
+                self._remove(waiter)
+            raise
+
+        _STATS["granted"] += 1
+        _STATS["estimated_tokens"] += tokens
+        if ticket.waited > 0.001:
+            _STATS["waited"] += 1
+            _STATS["wait_seconds"] += ticket.waited
+        return ticket
+
+    def release(self, ticket: Ticket, actual_tokens: Optional[int] = None) -> None:
+        """
+        Free the concurrency slot and replace the estimate with the actual token usage.
+        """
+        self._active = max(0, self._active - 1)
+        if actual_tokens is not None:
+            ticket.usage.tokens = actual_tokens
+            _STATS["actual_tokens"] += actual_tokens
+            self._backoff.pop(ticket.model, None)
+        self._dispatch()
+
+    def rate_limited(self, model: str, retry_after: Optional[float]) -> float:
+        """
+        Pause every call for `model` after a 429, using the server's retry-after when given
+        and an exponential per-model backoff otherwise.
+
+        :return: The pause applied, in seconds.
+        :rtype: float
+        """
+        if retry_after is None:
+            retry_after = self._backoff.get(model, settings.LLM_RATE_LIMIT_BACKOFF_SECONDS)
+            self._backoff[model] = min(retry_after * 2, settings.LLM_RATE_LIMIT_MAX_BACKOFF_SECONDS)
+        retry_after = min(retry_after, settings.LLM_RATE_LIMIT_MAX_BACKOFF_SECONDS)
+        until = time.monotonic() + retry_after
+        self._paused_until[model] = max(self._paused_until.get(model, 0.0), until)
+        _STATS["rate_limited"] += 1
+        logger.warning("Rate limited on %s; pausing all calls for %.2fs", model, retry_after)
+        return retry_after
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        models = {}
+        for model in self._windows:
+            window = self._window(model, now)
+            models[model] = {
+                "requests_last_minute": len(window),
+                "tokens_last_minute": sum(entry.tokens for entry in window),
+                "rpm_limit": self._limit(model, "rpm"),
+                "tpm_limit": self._limit(model, "tpm"),
+                "paused_for": round(max(0.0, self._paused_until.get(model, 0.0) - now), 2)
+            }
+        classes = {}
+        for priority in Priority:
+            waits = sorted(self._waits[priority])
+            classes[priority.name.lower()] = {
+                "queued": sum(len(w) for w in self._queues[priority].values()),
+                "served": len(waits),
+                "avg_wait_seconds": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "p95_wait_seconds": round(waits[int(0.95 * (len(waits) - 1))], 3) if waits else 0.0
+            }
+        return {"active": self._active, "queued": len(self._waiters()), "models": models, "classes": classes}
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        if "retry-after-ms" in response.headers:
+            return float(response.headers["retry-after-ms"]) / 1000
+        if "retry-after" in response.headers:
+            return float(response.headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+def estimate_tokens(body: Dict[str, Any], size: int) -> int:
+    """
+    Rough up-front estimate: ~4 bytes per input token plus the requested output budget.
+    """
+    output = (
+        body.get("max_output_tokens")
+        or body.get("max_completion_tokens")
+        or body.get("max_tokens")
+        or settings.LLM_DEFAULT_OUTPUT_TOKENS
+    )
+    return size // 4 + int(output)
+
+
+class SchedulerTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport that admits OpenAI model calls through the `LLMScheduler` and passes
+    every other request (Supabase, health checks) straight through.
+    """
+    def __init__(self, transport: httpx.AsyncBaseTransport, scheduler: Optional["LLMScheduler"] = None):
+        self.transport = transport
+        self._scheduler = scheduler
+
+    @property
+    def scheduler(self) -> "LLMScheduler":
+        return self._scheduler or get_llm_scheduler()
+
+    @staticmethod
+    def _model_call(request: httpx.Request) -> Optional[Dict[str, Any]]:
+        if request.method != "POST" or not request.url.path.endswith(MODEL_PATHS):
+            return None
+        try:
+            body = json.loads(request.content or b"{}")
+        except (ValueError, httpx.RequestNotRead):
+            return None
+        return body if isinstance(body, dict) and body.get("model") else None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = self._model_call(request) if settings.LLM_SCHEDULER_ENABLED else None
+        if body is None:
+            return await self.transport.handle_async_request(request)
+
+        model = str(body["model"])
+        scheduler = self.scheduler
+        ticket = await scheduler.acquire(model, estimate_tokens(body, len(request.content)))
+        actual: Optional[int] = None
+        try:
+            response = await self.transport.handle_async_request(request)
+            if response.status_code == 429:
+                scheduler.rate_limited(model, _retry_after(response))
+                return response
+            if body.get("stream") or response.status_code != 200:
+                return response
+
+            await response.aread()
+            try:
+                actual = int(response.json()["usage"]["total_tokens"])
+            except (ValueError, KeyError, TypeError):
+                pass
+            # The body is already decoded here, so drop the encoding headers that described the wire form.
+            headers = [
+                (k, v) for k, v in response.headers.multi_items()
+                if k.lower() not in ("content-encoding", "content-length")
+            ]
+            return httpx.Response(
+                response.status_code,
+                headers=headers,
+                content=response.content,
+                extensions=response.extensions
+            )
+        finally:
+            scheduler.release(ticket, actual)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+_scheduler: Optional[LLMScheduler] = None
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler()
+    return _scheduler
+
+
+def get_llm_scheduler_stats() -> Dict[str, Any]:
+    return {
+        **{k: round(v, 3) if isinstance(v, float) else v for k, v in _STATS.items()},
+        **(_scheduler.stats() if _scheduler else {"active": 0, "queued": 0, "models": {}, "classes": {}})
+    }
@@ -1,12 +1,14 @@
 from typing import Callable, Dict, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from importlib import import_module
 
 @dataclass(frozen=True)
 class ToolEntry:
-    func: Callable[..., Any]
+    func: Optional[Callable[..., Any]]
     category: str
     description: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
+    target: Optional[str] = None # "package.module:attr", imported on first `get_tool`
 
 class ToolRegistry:
     _tools: Dict[str, ToolEntry] = {}
@@ -29,9 +31,38 @@ class ToolRegistry:
             metadata=metadata or {}
         )
 
+    @classmethod
+    def register_lazy(
+        cls,
+        name: str,
+        target: str,
+        *,
+        category: str,
+        description: str = "",
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Declare a tool by import path (`"package.module:attr"`) without importing it.
+
+        The module is imported the first time the tool is requested through `get_tool`,
+        so heavy dependencies are only paid for when the tool is actually used.
+        """
+        cls._tools[name] = ToolEntry(
+            func=None,
+            category=category,
+            description=description,
+            metadata=metadata or {},
+            target=target
+        )
+
     @classmethod
     def get_tool(cls, name: str) -> Callable[..., Any]:
-        return cls._tools[name].func
+        entry = cls._tools[name]
+        if entry.func is None:
+            module_name, _, attr = entry.target.partition(":")
+            entry = replace(entry, func=getattr(import_module(module_name), attr))
+            cls._tools[name] = entry
+        return entry.func
 
     @classmethod
     def list_tools(cls, category: Optional[str] = None) -> Dict[str, ToolEntry]:
@@ -45,4 +76,4 @@ class ToolRegistry:
 
     @classmethod
     def get_agent(cls, name: str) -> Callable[..., Any]:
-        return cls._agents[name]
\ No newline at end of file
+        return cls._agents[name]
@@ -0,0 +1,133 @@
+from components.common import RunHooks, AgentsException, RunContextWrapper, Agent
+from components.utils.usage_tracking import agent_model, track_usage
+from dataclasses import dataclass, field, asdict
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from difflib import SequenceMatcher
+from collections import deque
+from config import settings
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+_MAX_EVENTS = 200
+_EVENTS: Deque[Dict[str, Any]] = deque(maxlen=_MAX_EVENTS)
+_COUNTERS: Dict[str, int] = {
+    "runs": 0,
+    "aborted": 0,
+    "repeated_tool_call": 0,
+    "similar_output": 0,
+    "token_budget": 0,
+    "max_turns": 0
+}
+
+
+@dataclass(frozen=True)
+class RunMonitorConfig:
+    max_repeated_tool_calls: int = settings.RUN_MONITOR_MAX_REPEATED_TOOL_CALLS
+    max_similar_outputs: int = settings.RUN_MONITOR_MAX_SIMILAR_OUTPUTS
+    similarity_threshold: float = settings.RUN_MONITOR_SIMILARITY_THRESHOLD
+    max_run_tokens: int = settings.RUN_MONITOR_MAX_RUN_TOKENS
+
+
+@dataclass
+class RunMonitorEvent:
+    agent: str
+    reason: str
+    detail: str
+    prompt: str
+    tokens: int
+    timestamp: float = field(default_factory=time.time)
+
+
+class RunLoopAborted(AgentsException):
+    """
+    Raised from the run hooks to stop a looping sub-agent run.
+
+    Subclasses `AgentsException` so the SDK re-raises it as-is instead of wrapping it
+    as a tool error.
+    """
+    def __init__(self, reason: str, detail: str):
+        self.reason = reason
+        self.detail = detail
+        super().__init__(f"{reason}: {detail}")
+
+
+class RunMonitor(RunHooks):
+    """
+    Per-run hooks that watch a nested sub-agent run for loops and token overspend.
+
+    Tracks repeated tool calls with identical arguments, consecutive near-identical
+    tool/model outputs, and the total tokens spent, raising `RunLoopAborted` once a
+    threshold is crossed.
+    """
+    def __init__(self, agent_name: str, prompt: str = "", config: Optional[RunMonitorConfig] = None):
+        self.agent_name = agent_name
+        self.prompt = prompt
+        self.config = config or RunMonitorConfig()
+        self.tokens = 0
+        self._tool_calls: Dict[Tuple[str, str], int] = {}
+        self._last_output: Optional[str] = None
+        self._similar_streak = 0
+        _COUNTERS["runs"] += 1
+
+    def _abort(self, reason: str, detail: str) -> None:
+        record(self.agent_name, reason, detail, self.prompt, self.tokens)
+        raise RunLoopAborted(reason, detail)
+
+    def _check_output(self, source: str, output: str) -> None:
+        if not output:
+            return
+        if self._last_output is not None:
+            ratio = SequenceMatcher(None, self._last_output, output).ratio()
+            if ratio >= self.config.similarity_threshold:
+                self._similar_streak += 1
+            else:
+                self._similar_streak = 0
+        self._last_output = output
+        if self._similar_streak >= self.config.max_similar_outputs:
+            self._abort("similar_output", f"{source} repeated {self._similar_streak + 1}x")
+
+    async def on_tool_start(self, context: RunContextWrapper[Any], agent: Agent, tool: Any) -> None:
+        arguments = getattr(context, "tool_arguments", "") or ""
+        key = (getattr(tool, "name", str(tool)), arguments)
+        self._tool_calls[key] = self._tool_calls.get(key, 0) + 1
+        if self._tool_calls[key] > self.config.max_repeated_tool_calls:
+            self._abort("repeated_tool_call", f"{key[0]}({arguments[:200]}) x{self._tool_calls[key]}")
+
+    async def on_tool_end(self, context: RunContextWrapper[Any], agent: Agent, tool: Any, result: str) -> None:
+        self._check_output(f"tool {getattr(tool, 'name', tool)}", str(result))
+
+    async def on_llm_end(self, context: RunContextWrapper[Any], agent: Agent, response: Any) -> None:
+        usage = getattr(response, "usage", None)
+        # Recorded per generation so runs aborted below are still accounted for.
+        track_usage(context.context, self.agent_name, agent_model(agent), [usage])
+        self.tokens += getattr(usage, "total_tokens", 0) or 0
+        if self.tokens > self.config.max_run_tokens:
+            self._abort("token_budget", f"{self.tokens} tokens > {self.config.max_run_tokens}")
+
+        texts: List[str] = []
+        for item in getattr(response, "output", None) or []:
+            for block in getattr(item, "content", None) or []:
+                text = getattr(block, "text", None)
+                if text:
+                    texts.append(text)
+        self._check_output("model output", " ".join(texts))
+
+
+def record(agent: str, reason: str, detail: str, prompt: str = "", tokens: int = 0) -> None:
+    """
+    Emit a run-monitor event (logged and kept in a bounded in-memory buffer).
+    """
+    event = RunMonitorEvent(agent=agent, reason=reason, detail=detail, prompt=prompt[:300], tokens=tokens)
+    _EVENTS.append(asdict(event))
+    _COUNTERS["aborted"] += 1
+    _COUNTERS[reason] = _COUNTERS.get(reason, 0) + 1
+    logger.warning(
+        "Sub-agent run aborted: agent=%s reason=%s detail=%s tokens=%d prompt=%r",
+        agent, reason, detail, tokens, event.prompt
+    )
+
+
+def get_run_monitor_stats() -> Dict[str, Any]:
+    return {**_COUNTERS, "recent_events": list(_EVENTS)[-20:]}
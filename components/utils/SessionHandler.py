@@ -3,11 +3,67 @@ from __future__ import annotations
 from collections import defaultdict
 import json
 from typing import Any, List, Optional, Dict
+from datetime import datetime, timezone
+import hashlib
 import asyncio
+import logging
+import weakref
 import time
 
 from components.common import SessionABC, TResponseInputItem
 from components.utils import get_supabase_client
+from components.utils.SupabaseClient import supabase_call
+from components.utils.CircuitBreaker import get_circuit_breaker
+from components.utils.Deadline import DeadlineExceeded, has_budget, mark_degraded
+from components.utils.history_window import TOOL_NOTE_PREFIX, is_tool_note, item_text
+from components.utils.history_compaction import compact_items
+from components.schemas import MechaniGoContext
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# `session_context` and `session_summary` are created by
+# docs/migrations/001_session_context_and_summary.sql.
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+def item_hash(item: TResponseInputItem, position: int) -> str:
+    """
+    Identity of the item at `position` in the session history, used to track what a summary
+    covers. The position keeps repeated messages ("oo", "salamat po") apart; the content
+    keeps a reordered history from matching the wrong item.
+    """
+    role = item.get("role") or item.get("type") if isinstance(item, dict) else None
+    return hashlib.sha1(f"{position}|{role}|{item_text(item)}".encode("utf-8")).hexdigest()[:16]
+
+_STATS = {
+    "history_local_reads": 0,
+    "writes_deferred": 0,
+    "writes_replayed": 0,
+    "context_conflicts": 0
+}
+
+# Sessions holding writes that failed while Supabase was down; replayed once it recovers.
+_AWAITING_REPLAY: "weakref.WeakSet[SessionHandler]" = weakref.WeakSet()
+_REPLAY_TASKS: "set[asyncio.Task]" = set()
+
+
+def _replay_deferred_writes() -> None:
+    sessions = list(_AWAITING_REPLAY)
+    _AWAITING_REPLAY.clear()
+    for session in sessions:
+        _STATS["writes_replayed"] += 1
+        task = asyncio.get_running_loop().create_task(session.persist_items())
+        _REPLAY_TASKS.add(task)
+        task.add_done_callback(_REPLAY_TASKS.discard)
+
+
+get_circuit_breaker("supabase").on_close(_replay_deferred_writes)
+
+
+def get_session_stats() -> Dict[str, int]:
+    return {**_STATS, "sessions_awaiting_replay": len(_AWAITING_REPLAY)}
 
 
 class SessionHandler(SessionABC):
@@ -18,12 +74,32 @@ class SessionHandler(SessionABC):
         session_id: str,
         user_id: Optional[str] = None,
         table: str = "session_history",
+        context_table: str = settings.SESSION_CONTEXT_TABLE,
+        summary_table: str = settings.SESSION_SUMMARY_TABLE,
     ):
         self.session_id = session_id
         self.user_id = user_id or session_id
         self.table = table
-
+        self.context_table = context_table
+        self.summary_table = summary_table
+
+        # Rolling summary of older turns and the hashes of the raw items it replaces.
+        self.summary: Optional[str] = None
+        self.summary_covers: List[str] = []
+        self._summary_loaded = False
+        self._summary_retry_at = 0.0
+
+        # Version of the stored context this worker last loaded or wrote.
+        self.context_version = 0
+        self._pending_context: Optional[Dict[str, Any]] = None
+        # Context the pending snapshot was taken from; refreshed in place on a write conflict.
+        self._live_context: Optional[MechaniGoContext] = None
+
+        # Items the Runner handed over during the current run; collected together by `end_turn`.
+        self._turn_items: List[TResponseInputItem] = []
         self._pending_items: List[TResponseInputItem] = []
+        # Last history read from Supabase plus every item collected since; served when Supabase is unavailable.
+        self._local_history: List[TResponseInputItem] = []
         self._cache: Dict[Optional[int], tuple[float, list[TResponseInputItem]]] = {}
         self._cache_lock = asyncio.Lock()
         self._write_lock = asyncio.Lock()
@@ -32,6 +108,14 @@ class SessionHandler(SessionABC):
     def _extract_role(item: TResponseInputItem) -> Optional[str]:
         return item.get("role") if isinstance(item, dict) else None
 
+    @classmethod
+    def _stored_role(cls, item: TResponseInputItem) -> Optional[str]:
+        """
+        Row an item is stored in. Tool notes go in the assistant row, the only place their
+        position within the turn survives; `_restore_turn_order` reads them back as notes.
+        """
+        return "assistant" if is_tool_note(item) else cls._extract_role(item)
+
     @staticmethod
     def _extract_message(item: TResponseInputItem) -> Optional[str]:
         if not isinstance(item, dict):
@@ -91,26 +175,144 @@ class SessionHandler(SessionABC):
             self._cache.clear()
 
     async def collect_items(self, items: list[TResponseInputItem]):
+        # Only conversation text and short tool notes are worth replaying on later turns.
+        await self._collect(compact_items(items))
+
+    async def _collect(self, items: list[TResponseInputItem]):
         if items:
             self._pending_items.extend(items)
+            self._local_history.extend(items)
+
+    def _local_items(self, limit: Optional[int]) -> list[TResponseInputItem]:
+        _STATS["history_local_reads"] += 1
+        history = list(self._local_history)
+        return history[-limit:] if limit is not None else history
+
+    def _defer(self, error: Exception) -> None:
+        _STATS["writes_deferred"] += 1
+        _AWAITING_REPLAY.add(self)
+        logger.warning("Deferred session writes for %s until Supabase recovers: %s", self.session_id, error)
 
     async def persist_items(self):
         async with self._write_lock:
+            if self._pending_context is not None:
+                snapshot = self._pending_context
+                self._pending_context = None
+                await self._write_context_to_supabase(snapshot)
+
             if not self._pending_items:
                 return
 
             items = self._pending_items
             self._pending_items = []
 
-            await self._write_items_to_supabase(items)
+            try:
+                await self._write_items_to_supabase(items)
+            except Exception as e:
+                # Keep them (ahead of anything collected meanwhile) for replay.
+                self._pending_items = items + self._pending_items
+                self._defer(e)
+                return
             await self._invalidate_cache()
 
+    async def load_context(self, context: MechaniGoContext) -> bool:
+        """
+        Rehydrate `context` in place from the stored snapshot, if one newer than this
+        worker's copy exists.
+
+        Lets a user hop between workers/nodes without losing booking progress: a fresh
+        worker starts from an empty context and picks up the stored one on the first turn.
+        Sync failures are logged and the local context is used as-is.
+
+        :param context: The worker's current context for this session.
+        :type context: MechaniGoContext
+        :return: Whether the context was replaced by the stored snapshot.
+        :rtype: bool
+        """
+        if not settings.SESSION_CONTEXT_SYNC:
+            return False
+        try:
+            client = await get_supabase_client()
+            rows = await supabase_call(
+                client.table(self.context_table)
+                .select("context, version")
+                .eq("session_id", self.session_id)
+                .gt("version", self.context_version)
+                .limit(1)
+                .execute
+            )
+        except Exception as e:
+            logger.warning("Could not load context for session %s: %s", self.session_id, e)
+            return False
+
+        if not rows.data:
+            return False
+
+        stored = MechaniGoContext.model_validate(rows.data[0]["context"])
+        for name, field in MechaniGoContext.model_fields.items():
+            if field.exclude:
+                continue
+            setattr(context, name, getattr(stored, name))
+        self.context_version = rows.data[0]["version"]
+        # The session moved on elsewhere; its summary may have too.
+        self._summary_loaded = False
+        return True
+
+    async def stage_context(self, context: MechaniGoContext) -> None:
+        """
+        Snapshot `context` to be written with the next `persist_items`.
+        """
+        if settings.SESSION_CONTEXT_SYNC:
+            self._pending_context = context.model_dump(mode="json")
+            self._live_context = context
+
+    async def _write_context_to_supabase(self, snapshot: Dict[str, Any]) -> None:
+        """
+        Write `snapshot` as the next context version, only if the stored row is still at
+        the version this worker last loaded or wrote (compare-and-swap). If another worker
+        got there first, its snapshot wins: this one is dropped and the stored context is
+        reloaded into the live one.
+        """
+        version = self.context_version + 1
+        row = {
+            "session_id": self.session_id,
+            "user_id": self.user_id,
+            "context": snapshot,
+            "version": version,
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        }
+        try:
+            client = await get_supabase_client()
+            table = client.table(self.context_table)
+            if self.context_version:
+                query = table.update(row).eq("session_id", self.session_id).eq("version", self.context_version)
+            else:
+                # First write for the session; a row inserted meanwhile is a conflict.
+                query = table.upsert(row, on_conflict="session_id", ignore_duplicates=True)
+            result = await supabase_call(query.execute)
+        except Exception as e:
+            if self._pending_context is None:
+                self._pending_context = snapshot
+            self._defer(e)
+            return
+
+        if not result.data:
+            _STATS["context_conflicts"] += 1
+            logger.warning(
+                "Context for session %s changed elsewhere since version %s; reloading the stored one",
+                self.session_id, self.context_version
+            )
+            if self._live_context is not None:
+                await self.load_context(self._live_context)
+            return
+        self.context_version = version
+
     async def _write_items_to_supabase(self, items: list[TResponseInputItem]):
         role_messages: Dict[str, List[str]] = defaultdict(list)
 
         # group by role
         for item in items:
-            role = self._extract_role(item)
+            role = self._stored_role(item)
             message = self._extract_message(item)
             if role and message:
                 role_messages[role].append(message)
@@ -121,14 +323,14 @@ class SessionHandler(SessionABC):
         client = await get_supabase_client()
 
         for role, messages in role_messages.items():
-            existing = await (
+            existing = await supabase_call(
                 client.table(self.table)
                 .select("id, content")
                 .eq("session_id", self.session_id)
                 .eq("user_id", self.user_id)
                 .eq("role", role)
                 .limit(1)
-                .execute()
+                .execute
             )
 
             if existing.data:
@@ -136,28 +338,67 @@ class SessionHandler(SessionABC):
                 current_content = self._ensure_list(record.get("content"))
                 updated = current_content + messages
 
-                await (
+                await supabase_call(
                     client.table(self.table)
                     .update({"content": updated})
                     .eq("id", record["id"])
-                    .execute()
+                    .execute
                 )
 
             else:
-                await client.table(self.table).insert(
+                await supabase_call(client.table(self.table).insert(
                     {
                         "session_id": self.session_id,
                         "user_id": self.user_id,
                         "role": role,
                         "content": messages,
                     }
-                ).execute()
+                ).execute)
 
-    async def get_items(self, limit: Optional[int] = None) -> list[TResponseInputItem]:
-        cached = await self._get_cached(limit)
-        if cached is not None:
-            return cached
+    @staticmethod
+    def _restore_turn_order(by_role: Dict[str, List[str]]) -> list[TResponseInputItem]:
+        """
+        Rebuild the conversation order from the per-role rows.
+
+        Rows keep one message list per role, so the stored history reads as every user
+        message followed by every assistant one. Each turn is one user message answered by
+        zero or more tool notes and one reply, so the turns are paired back up in order, with
+        the notes (stored among the replies) restored as developer items.
+        When the counts don't pair up (e.g. a reply that was never stored), the grouped order
+        is kept; `is_chronological` tells readers not to cut it into turns.
+        """
+        user = by_role.pop("user", [])
+        replies: List[List[str]] = [[]]
+        for message in by_role.pop("assistant", []):
+            replies[-1].append(message)
+            if not message.startswith(TOOL_NOTE_PREFIX):
+                replies.append([])
+        if not replies[-1]:
+            replies.pop()
+
+        history: list[TResponseInputItem] = [
+            {"role": role, "content": message} for role, messages in by_role.items() for message in messages
+        ]
+        if len(replies) in (len(user), len(user) - 1):
+            # The last message may still be waiting for its reply.
+            replies += [[]] * (len(user) - len(replies))
+            for message, turn in zip(user, replies):
+                history.append({"role": "user", "content": message})
+                history.extend(SessionHandler._stored_reply(reply) for reply in turn)
+        else:
+            history.extend({"role": "user", "content": message} for message in user)
+            history.extend(SessionHandler._stored_reply(reply) for turn in replies for reply in turn)
+        return history
 
+    @staticmethod
+    def _stored_reply(message: str) -> TResponseInputItem:
+        role = "developer" if message.startswith(TOOL_NOTE_PREFIX) else "assistant"
+        return {"role": role, "content": message}
+
+    async def _fetch_history(self, limit: Optional[int] = None) -> list[TResponseInputItem]:
+        """
+        Read the session history from Supabase (raises on failure).
+        """
         client = await get_supabase_client()
         query = (
             client.table(self.table)
@@ -170,45 +411,183 @@ class SessionHandler(SessionABC):
         if limit is not None:
             query = query.limit(limit)
 
-        rows = await query.execute()
+        rows = await supabase_call(query.execute)
 
-        history: list[TResponseInputItem] = []
+        by_role: Dict[str, List[str]] = defaultdict(list)
         for row in rows.data or []:
-            role = row.get("role")
-            messages = self._ensure_list(row.get("content"))
-            for msg in messages:
-                history.append({"role": role, "content": msg})
+            by_role[row.get("role")].extend(self._ensure_list(row.get("content")))
+        history = self._restore_turn_order(by_role)
 
         if limit is not None:
             history = history[-limit:]
+        return history
+
+    async def get_items(self, limit: Optional[int] = None) -> list[TResponseInputItem]:
+        """
+        Session history, with the raw items covered by the rolling summary replaced by a
+        single pinned summary item.
+        """
+        if not settings.SESSION_SUMMARY_ENABLED:
+            return await self._read_items(limit)
+        # Summary coverage is by position in the whole history, so read all of it.
+        items = await self._read_items()
+        await self.load_summary()
+        items = self._apply_summary(items)
+        return items[-limit:] if limit is not None else items
+
+    async def get_raw_items(self, limit: Optional[int] = None) -> list[TResponseInputItem]:
+        """
+        Session history without summary substitution.
+        """
+        return await self._read_items(limit)
+
+    def local_prompt_items(self) -> list[TResponseInputItem]:
+        """
+        The history as it would be sent next turn, from the local copy (no I/O).
+        """
+        return self._apply_summary(self._local_history)
+
+    def uncovered_items(self, items: list[TResponseInputItem]) -> list[tuple[int, TResponseInputItem]]:
+        """
+        `(position, item)` for the items of the full history `items` not yet folded into the summary.
+        """
+        covered = set(self.summary_covers)
+        return [(n, item) for n, item in enumerate(items) if item_hash(item, n) not in covered]
+
+    def _apply_summary(self, items: list[TResponseInputItem]) -> list[TResponseInputItem]:
+        if not self.summary:
+            return items
+        kept = [item for _, item in self.uncovered_items(items)]
+        return [{"role": "developer", "content": SUMMARY_PREFIX + self.summary}] + kept
+
+    async def load_summary(self) -> bool:
+        """
+        Fetch the stored summary, once (again after `load_context` replaced the context).
+
+        After a failed read the summary table isn't queried again for
+        `settings.SUMMARY_LOAD_RETRY_SECONDS`; reads in between go on without the summary.
+
+        :return: Whether the stored summary is loaded.
+        :rtype: bool
+        """
+        if self._summary_loaded:
+            return True
+        if time.monotonic() < self._summary_retry_at:
+            return False
+        try:
+            client = await get_supabase_client()
+            rows = await supabase_call(
+                client.table(self.summary_table)
+                .select("summary, covered")
+                .eq("session_id", self.session_id)
+                .limit(1)
+                .execute
+            )
+        except Exception as e:
+            logger.warning("Could not load summary for session %s: %s", self.session_id, e)
+            self._summary_retry_at = time.monotonic() + settings.SUMMARY_LOAD_RETRY_SECONDS
+            return False
+        self._summary_loaded = True
+        if rows.data:
+            self.summary = rows.data[0].get("summary")
+            self.summary_covers = self._ensure_list(rows.data[0].get("covered"))
+        return True
+
+    async def save_summary(self, summary: str, covers: List[str]) -> None:
+        """
+        Store a new rolling summary replacing the raw items whose hashes are in `covers`.
+
+        The summary applies to reads right away; the Supabase write failing only means
+        another worker won't see it yet.
+        """
+        self.summary = summary
+        self.summary_covers = list(covers)
+        self._summary_loaded = True
+        try:
+            client = await get_supabase_client()
+            await supabase_call(client.table(self.summary_table).upsert(
+                {
+                    "session_id": self.session_id,
+                    "user_id": self.user_id,
+                    "summary": summary,
+                    "covered": self.summary_covers,
+                    "updated_at": datetime.now(timezone.utc).isoformat()
+                },
+                on_conflict="session_id"
+            ).execute)
+        except Exception as e:
+            logger.warning("Could not save summary for session %s: %s", self.session_id, e)
+
+    async def _read_items(self, limit: Optional[int] = None) -> list[TResponseInputItem]:
+        cached = await self._get_cached(limit)
+        if cached is not None:
+            return cached
+
+        if not has_budget(settings.DEADLINE_HISTORY_MIN_SECONDS):
+            # Too little time left in the request; answer this turn from the local copy only.
+            mark_degraded("history_skipped")
+            return self._local_items(limit)
+
+        try:
+            history = await self._fetch_history(limit)
+        except DeadlineExceeded:
+            mark_degraded("history_skipped")
+            return self._local_items(limit)
+        except Exception as e:
+            # Supabase down or circuit open: keep chatting on the (reduced) local history.
+            logger.warning("History read for session %s served locally: %s", self.session_id, e)
+            return self._local_items(limit)
+
+        if limit is None:
+            # Items still waiting to be written aren't in Supabase yet.
+            self._local_history = history + self._pending_items
 
         await self._set_cached(limit, history)
 
         return history
 
     async def add_items(self, items):
-        await self.collect_items(items)
+        # The Runner calls this with its input at the start of a run and again after every
+        # step. Relays and repeats only show once the final reply is in, so the turn's items
+        # are buffered and compacted together by `end_turn`.
+        self._turn_items.extend(items)
+
+    async def _collect_turn(self, items: Optional[list[TResponseInputItem]]) -> None:
+        turn = self._turn_items + list(items or [])
+        self._turn_items = []
+        await self.collect_items(turn)
+
+    async def end_turn(self, items: Optional[list[TResponseInputItem]] = None) -> None:
+        """
+        Collect everything the Runner handed over during the turn, plus `items`, as one
+        compacted batch, and persist it.
+
+        :param items: Items produced outside the run (e.g. a degraded reply), appended after
+            the run's own.
+        :type items: Optional[list[TResponseInputItem]]
+        """
+        await self._collect_turn(items)
         await self.persist_items()
 
     async def pop_item(self) -> Optional[TResponseInputItem]:
-        history = await self.get_items()
+        history = await self.get_raw_items()
         if not history:
             return None
 
         last = history[-1]
-        role = self._extract_role(last)
+        role = self._stored_role(last)
         if not role:
             return last
 
         client = await get_supabase_client()
-        existing = await (
+        existing = await supabase_call(
             client.table(self.table)
             .select("id, content")
             .eq("session_id", self.session_id)
             .eq("user_id", self.user_id)
             .eq("role", role)
             .limit(1)
-            .execute()
+            .execute
         )
 
         if existing.data:
@@ -216,23 +595,25 @@ class SessionHandler(SessionABC):
             content = self._ensure_list(record.get("content"))
             if content:
                 content.pop()
-                await (
+                await supabase_call(
                     client.table(self.table)
                     .update({"content": content})
                     .eq("id", record["id"])
-                    .execute()
+                    .execute
                 )
 
+        self._local_history = self._local_history[:-1]
         await self._invalidate_cache()
         return last
 
     async def clear_session(self) -> None:
         client = await get_supabase_client()
-        await (
+        await supabase_call(
             client.table(self.table)
             .delete()
             .eq("session_id", self.session_id)
             .eq("user_id", self.user_id)
-            .execute()
+            .execute
         )
+        self._local_history = []
         await self._invalidate_cache()
\ No newline at end of file
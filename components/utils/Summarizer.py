@@ -0,0 +1,202 @@
+"""
+Background conversation summarization.
+
+Long sessions (multi-turn diagnostics with the mechanic agent especially) have their older
+turns folded into a rolling summary so the prompt stops growing with every turn. A session
+is summarized off the hot path, in a background task on the cheap `SUMMARY_MODEL`, when its
+prompt history crosses `SUMMARY_TRIGGER_TOKENS` after a turn, or when it goes idle for
+`SUMMARY_IDLE_SECONDS` with at least `SUMMARY_MIN_TOKENS` of history. The summary is stored
+with the session (`SessionHandler.save_summary`) and replaces the raw turns it covers on
+later reads; the last `SUMMARY_KEEP_TURNS` turns always stay verbatim.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+import contextvars
+import asyncio
+import logging
+import time
+
+from components.utils.history_window import estimate_tokens, is_chronological, item_text, split_turns
+from components.utils.SessionHandler import item_hash
+from components.utils.LLMScheduler import Priority, llm_call_scope
+from components.utils.usage_tracking import track_usage
+from config import settings
+
+if TYPE_CHECKING:
+    from components.common import TResponseInputItem
+    from components.utils.SessionHandler import SessionHandler
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """
+You maintain the running summary of a customer chat with MechaniGo.ph, a mobile auto service company in the Philippines.
+Merge the previous summary (if any) with the new conversation excerpt into one updated summary.
+
+Keep, in short plain sentences:
+- The car (make, model, year) and the customer's details already given.
+- Reported symptoms, when they happen, and the answers to diagnostic questions already asked.
+- The current diagnosis / leading hypotheses and what was ruled out.
+- Booking progress: service, schedule, payment, what is still missing or was confirmed.
+- Any open question the assistant is waiting on.
+
+Drop greetings, small talk and repeated content. Write in English, at most 180 words, no bullet nesting.
+"""
+
+_STATS: Dict[str, Any] = {
+    "scheduled": 0,
+    "summaries": 0,
+    "failures": 0,
+    "items_folded": 0,
+    "tokens_folded": 0,
+    "summary_seconds": 0.0
+}
+
+
+class SessionSummarizer:
+    """
+    Schedules and runs background summaries, at most one at a time per session.
+    """
+    def __init__(self):
+        self._running: Dict[str, asyncio.Task] = {}
+        self._idle_timers: Dict[str, asyncio.TimerHandle] = {}
+
+    def after_turn(self, session: "SessionHandler") -> None:
+        """
+        Called once a turn is done: summarize now if the session is over the size
+        threshold, otherwise (re)arm its idle timer.
+        """
+        if not settings.SESSION_SUMMARY_ENABLED:
+            return
+        session_id = session.session_id
+        timer = self._idle_timers.pop(session_id, None)
+        if timer is not None:
+            timer.cancel()
+
+        if estimate_tokens(session.local_prompt_items()) >= settings.SUMMARY_TRIGGER_TOKENS:
+            self._schedule(session)
+            return
+        loop = asyncio.get_running_loop()
+        self._idle_timers[session_id] = loop.call_later(
+            settings.SUMMARY_IDLE_SECONDS, self._on_idle, session
+        )
+
+    def _on_idle(self, session: "SessionHandler") -> None:
+        self._idle_timers.pop(session.session_id, None)
+        if estimate_tokens(session.local_prompt_items()) >= settings.SUMMARY_MIN_TOKENS:
+            self._schedule(session)
+
+    def _schedule(self, session: "SessionHandler") -> None:
+        running = self._running.get(session.session_id)
+        if running is not None and not running.done():
+            return
+        _STATS["scheduled"] += 1
+        # Fresh context: not bound by the triggering request's deadline or priority.
+        task = asyncio.get_running_loop().create_task(
+            self.summarize(session), context=contextvars.Context()
+        )
+        self._running[session.session_id] = task
+        task.add_done_callback(lambda _: self._running.pop(session.session_id, None))
+
+    async def summarize(self, session: "SessionHandler") -> bool:
+        """
+        Fold everything but the last `SUMMARY_KEEP_TURNS` turns into the session's summary.
+
+        :return: Whether a new summary was stored.
+        :rtype: bool
+        """
+        if not await session.load_summary():
+            # Summarizing without the stored summary would overwrite what it already covers.
+            return False
+        history = await session.get_raw_items()
+        if not is_chronological(history):
+            # Without turn boundaries there's no telling which turns are the recent ones.
+            return False
+        pending = session.uncovered_items(history)
+        turns = split_turns([item for _, item in pending])
+        if len(turns) <= settings.SUMMARY_KEEP_TURNS:
+            return False
+        folded_count = sum(len(turn) for turn in turns[:-settings.SUMMARY_KEEP_TURNS])
+        folded = [item for _, item in pending[:folded_count]]
+
+        started = time.perf_counter()
+        try:
+            with llm_call_scope(priority=Priority.BACKGROUND, user_id=session.user_id):
+                summary = await _summarize(session.summary, folded)
+        except Exception as e:
+            _STATS["failures"] += 1
+            logger.warning("Summarization failed for session %s: %s", session.session_id, e)
+            return False
+        if not summary:
+            return False
+
+        await session.save_summary(
+            summary, session.summary_covers + [item_hash(item, n) for n, item in pending[:folded_count]]
+        )
+        _STATS["summaries"] += 1
+        _STATS["items_folded"] += len(folded)
+        _STATS["tokens_folded"] += estimate_tokens(folded)
+        _STATS["summary_seconds"] += time.perf_counter() - started
+        logger.info("Summarized %d items for session %s", len(folded), session.session_id)
+        return True
+
+    async def stop(self) -> None:
+        for timer in self._idle_timers.values():
+            timer.cancel()
+        self._idle_timers.clear()
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _transcript(items: List["TResponseInputItem"]) -> str:
+    lines = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        label = item.get("role") or item.get("type") or "item"
+        text = item_text(item).strip()
+        if text:
+            lines.append(f"{label}: {text}")
+    return "\n".join(lines)
+
+
+async def _summarize(previous: Optional[str], items: List["TResponseInputItem"]) -> str:
+    from components.tools.clients import get_openai_client
+
+    client = await get_openai_client()
+    response = await client.responses.create(
+        model=settings.SUMMARY_MODEL,
+        input=[
+            {"role": "developer", "content": SUMMARY_PROMPT.strip()},
+            {
+                "role": "user",
+                "content": f"Previous summary:\n{previous or '(none)'}\n\nNew conversation excerpt:\n{_transcript(items)}"
+            }
+        ],
+        max_output_tokens=settings.SUMMARY_MAX_TOKENS
+    )
+    # Background work: counted in the process totals, not in any turn.
+    track_usage(None, "summarizer", settings.SUMMARY_MODEL, [response.usage])
+    return (response.output_text or "").strip()
+
+
+_summarizer: Optional[SessionSummarizer] = None
+
+
+def get_summarizer() -> SessionSummarizer:
+    global _summarizer
+    if _summarizer is None:
+        _summarizer = SessionSummarizer()
+    return _summarizer
+
+
+def get_summarizer_stats() -> Dict[str, Any]:
+    summaries = _STATS["summaries"]
+    return {
+        **{key: value for key, value in _STATS.items() if key != "summary_seconds"},
+        "avg_summary_seconds": round(_STATS["summary_seconds"] / summaries, 3) if summaries else None,
+        "running": len(_summarizer._running) if _summarizer else 0,
+        "idle_timers": len(_summarizer._idle_timers) if _summarizer else 0
+    }
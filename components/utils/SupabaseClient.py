@@ -1,7 +1,36 @@
-from supabase import acreate_client
+from supabase import acreate_client, AsyncClientOptions
+from postgrest.exceptions import APIError
+from components.utils.HttpPool import get_http_client
+from components.utils.CircuitBreaker import get_circuit_breaker
+from components.utils.Deadline import within_deadline
+from typing import Awaitable, Callable, TypeVar
 from functools import lru_cache
 from config import settings
 
+T = TypeVar("T")
+
+# PostgREST codes for "database unreachable / pool exhausted" (503/504) and Postgres
+# SQLSTATE classes for connection, resource, shutdown and internal errors. Any other coded
+# error (missing table or column, constraint violation, bad filter) is the request's fault.
+_OUTAGE_CODES = ("PGRST000", "PGRST001", "PGRST002", "PGRST003")
+_OUTAGE_SQLSTATE_CLASSES = ("08", "53", "57", "58", "XX")
+
+def is_supabase_outage(error: Exception) -> bool:
+    """
+    Whether `error` means Supabase itself is unhealthy: transport errors, timeouts and 5xx
+    responses, but not 4xx-style rejections of the request.
+    """
+    if not isinstance(error, APIError):
+        return True
+    if isinstance(error.code, int):
+        # No JSON body; postgrest reports the HTTP status instead.
+        return error.code >= 500
+    code = error.code or ""
+    if code.startswith("PGRST"):
+        return code in _OUTAGE_CODES
+    # No code at all (e.g. a gateway error page) is treated as an outage.
+    return not code or code[:2] in _OUTAGE_SQLSTATE_CLASSES
+
 @lru_cache
 def _supabase_settings():
     return settings.SUPABASE_URL, settings.SUPABASE_API_KEY
@@ -12,5 +41,25 @@ async def get_supabase_client():
     global _supabase_client
     if _supabase_client is None:
         url, api_key = _supabase_settings()
-        _supabase_client = await acreate_client(url, api_key)
-    return _supabase_client
\ No newline at end of file
+        _supabase_client = await acreate_client(
+            url,
+            api_key,
+            options=AsyncClientOptions(httpx_client=get_http_client())
+        )
+    return _supabase_client
+
+async def supabase_call(call: Callable[[], Awaitable[T]]) -> T:
+    """
+    Run one Supabase request through the shared circuit breaker, bounded by the request deadline.
+
+    :param call: Starts the request, e.g. `query.execute`.
+    :type call: Callable[[], Awaitable[T]]
+    :raises CircuitOpenError: While Supabase is considered down.
+    :return: The request's result.
+    :rtype: T
+    """
+    # Deadline outside the breaker: running out of request budget isn't a Supabase failure.
+    return await within_deadline(
+        get_circuit_breaker("supabase").call(call, is_failure=is_supabase_outage),
+        stage="supabase"
+    )
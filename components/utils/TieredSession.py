@@ -0,0 +1,271 @@
+"""
+Tiered session store.
+
+- L1: process-wide LRU of full session histories (per worker, sub-millisecond).
+- L2: local SQLite file in WAL mode (the SDK's `SQLiteSession`), shared by the workers on
+  a node and surviving restarts.
+- L3: Supabase, the system of record (`SessionHandler`).
+
+Reads fall through L1 -> L2 -> L3 and fill the tiers above on the way back. New items land
+in L1/L2 right away and reach Supabase through a short write-behind (or the next
+`persist_items`). L1 entries and L2 each remember the context version they match; when
+`load_context` finds a newer version written elsewhere, each local tier behind it for that
+session is dropped and refilled from Supabase. The two are checked separately: L2 is shared
+by the node's workers, so another worker's write can bring L2 up to date while this
+worker's L1 copy is still stale.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from pathlib import Path
+import contextvars
+import asyncio
+import logging
+import sqlite3
+import time
+
+from components.common import SQLiteSession, TResponseInputItem
+from components.utils.SessionHandler import SessionHandler
+from components.utils.Deadline import DeadlineExceeded, has_budget, mark_degraded
+from components.schemas import MechaniGoContext
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_META_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tiered_session_meta (
+    session_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+# session_id -> (context version the entry was filled at, items)
+_L1: "OrderedDict[str, Tuple[int, List[TResponseInputItem]]]" = OrderedDict()
+_META_READY: set = set()
+
+_STATS: Dict[str, Any] = {
+    "l1_hits": 0,
+    "l2_hits": 0,
+    "l3_reads": 0,
+    "write_behind_flushes": 0,
+    "invalidations": 0,
+    "l2_errors": 0,
+    "read_seconds": {"l1": 0.0, "l2": 0.0, "l3": 0.0}
+}
+
+
+def _meta(path: str, query: str, params: tuple = ()) -> List[sqlite3.Row]:
+    if path not in _META_READY:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=5)
+    try:
+        if path not in _META_READY:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_META_SCHEMA)
+            _META_READY.add(path)
+        with conn:
+            return conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+
+
+class TieredSession(SessionHandler):
+    """
+    `SessionHandler` with an in-process LRU and a local SQLite tier in front of Supabase.
+    """
+    def __init__(
+        self,
+        session_id: str,
+        user_id: Optional[str] = None,
+        l2_path: str = settings.SESSION_L2_PATH,
+        **kwargs: Any
+    ):
+        super().__init__(session_id, user_id, **kwargs)
+        self.l2_path = l2_path
+        self._l2: Optional[SQLiteSession] = None
+        self._tiers_loaded = False
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _l1_put(self, items: List[TResponseInputItem]) -> None:
+        _L1[self.session_id] = (self.context_version, list(items))
+        _L1.move_to_end(self.session_id)
+        while len(_L1) > settings.SESSION_L1_MAX_SESSIONS:
+            _L1.popitem(last=False)
+
+    def _l2_session(self) -> SQLiteSession:
+        if self._l2 is None:
+            Path(self.l2_path).parent.mkdir(parents=True, exist_ok=True)
+            self._l2 = SQLiteSession(self.session_id, db_path=self.l2_path)
+        return self._l2
+
+    async def _l2_version(self) -> Optional[int]:
+        rows = await asyncio.to_thread(
+            _meta, self.l2_path, "SELECT version FROM tiered_session_meta WHERE session_id = ?", (self.session_id,)
+        )
+        return rows[0][0] if rows else None
+
+    async def _set_l2_version(self, version: int) -> None:
+        await asyncio.to_thread(
+            _meta, self.l2_path,
+            "INSERT INTO tiered_session_meta (session_id, version, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET version = excluded.version, updated_at = excluded.updated_at",
+            (self.session_id, version, time.time())
+        )
+
+    async def _read_l2(self) -> Optional[List[TResponseInputItem]]:
+        try:
+            if await self._l2_version() is None:
+                return None
+            session = await asyncio.to_thread(self._l2_session)
+            return await session.get_items()
+        except (sqlite3.Error, OSError) as e:
+            _STATS["l2_errors"] += 1
+            logger.warning("L2 session read failed for %s: %s", self.session_id, e)
+            return None
+
+    async def _write_l2(self, items: List[TResponseInputItem], append: bool = False) -> None:
+        try:
+            session = await asyncio.to_thread(self._l2_session)
+            if not append:
+                await session.clear_session()
+            if items:
+                await session.add_items(items)
+            if not append:
+                await self._set_l2_version(self.context_version)
+        except (sqlite3.Error, OSError) as e:
+            _STATS["l2_errors"] += 1
+            logger.warning("L2 session write failed for %s: %s", self.session_id, e)
+
+    async def invalidate_local(self) -> None:
+        """
+        Drop this session from L1 and L2; the next read refills them from Supabase.
+        """
+        _STATS["invalidations"] += 1
+        _L1.pop(self.session_id, None)
+        self._tiers_loaded = False
+        try:
+            await asyncio.to_thread(
+                _meta, self.l2_path, "DELETE FROM tiered_session_meta WHERE session_id = ?", (self.session_id,)
+            )
+        except (sqlite3.Error, OSError) as e:
+            _STATS["l2_errors"] += 1
+            logger.warning("L2 session invalidation failed for %s: %s", self.session_id, e)
+
+    async def _read_items(self, limit: Optional[int] = None) -> list[TResponseInputItem]:
+        started = time.perf_counter()
+        entry = _L1.get(self.session_id)
+        if entry is not None and entry[0] < self.context_version:
+            _L1.pop(self.session_id, None)
+            entry = None
+        items = entry[1] if entry is not None else None
+        tier = "l1"
+        if items is not None:
+            _L1.move_to_end(self.session_id)
+            _STATS["l1_hits"] += 1
+        else:
+            items = await self._read_l2()
+            tier = "l2"
+            if items is not None:
+                _STATS["l2_hits"] += 1
+            else:
+                if not has_budget(settings.DEADLINE_HISTORY_MIN_SECONDS):
+                    mark_degraded("history_skipped")
+                    return self._local_items(limit)
+                try:
+                    history = await self._fetch_history()
+                except DeadlineExceeded:
+                    mark_degraded("history_skipped")
+                    return self._local_items(limit)
+                except Exception as e:
+                    logger.warning("History read for session %s served locally: %s", self.session_id, e)
+                    return self._local_items(limit)
+                tier = "l3"
+                _STATS["l3_reads"] += 1
+                # Items still waiting to be written aren't in Supabase yet.
+                items = history + self._pending_items
+                await self._write_l2(items)
+            self._l1_put(items)
+
+        self._tiers_loaded = True
+        self._local_history = list(items)
+        _STATS["read_seconds"][tier] += time.perf_counter() - started
+        return items[-limit:] if limit is not None else list(items)
+
+    async def _collect(self, items: list[TResponseInputItem]):
+        await super()._collect(items)
+        if not items or not self._tiers_loaded:
+            return
+        cached = _L1.get(self.session_id)
+        if cached is not None:
+            cached[1].extend(items)
+        await self._write_l2(items, append=True)
+
+    async def end_turn(self, items: Optional[List[TResponseInputItem]] = None) -> None:
+        # Keep it local and let Supabase catch up.
+        await self._collect_turn(items)
+        self._schedule_write_behind()
+
+    def _schedule_write_behind(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        # Fresh context so the flush isn't bound by the turn's deadline.
+        self._flush_task = asyncio.get_running_loop().create_task(
+            self._write_behind(), context=contextvars.Context()
+        )
+
+    async def _write_behind(self) -> None:
+        await asyncio.sleep(settings.SESSION_WRITE_BEHIND_SECONDS)
+        _STATS["write_behind_flushes"] += 1
+        await self.persist_items()
+
+    async def persist_items(self):
+        await super().persist_items()
+        if self._tiers_loaded and not self._pending_items and self._pending_context is None:
+            # L1 and L2 now match what Supabase holds at this context version.
+            cached = _L1.get(self.session_id)
+            if cached is not None:
+                _L1[self.session_id] = (self.context_version, cached[1])
+            try:
+                await self._set_l2_version(self.context_version)
+            except (sqlite3.Error, OSError) as e:
+                _STATS["l2_errors"] += 1
+                logger.warning("L2 session version update failed for %s: %s", self.session_id, e)
+
+    async def load_context(self, context: MechaniGoContext) -> bool:
+        replaced = await super().load_context(context)
+        if replaced:
+            cached = _L1.get(self.session_id)
+            if cached is not None and cached[0] < self.context_version:
+                # Filled before the version just loaded, whatever the shared L2 says.
+                _L1.pop(self.session_id, None)
+            try:
+                local_version = await self._l2_version()
+            except (sqlite3.Error, OSError):
+                local_version = None
+            if local_version is None or local_version < self.context_version:
+                # Another worker/node moved the session on; the local history may be stale.
+                await self.invalidate_local()
+        return replaced
+
+    async def pop_item(self) -> Optional[TResponseInputItem]:
+        item = await super().pop_item()
+        await self.invalidate_local()
+        return item
+
+    async def clear_session(self) -> None:
+        await super().clear_session()
+        await self.invalidate_local()
+
+
+def get_tiered_session_stats() -> Dict[str, Any]:
+    reads = {"l1": _STATS["l1_hits"], "l2": _STATS["l2_hits"], "l3": _STATS["l3_reads"]}
+    return {
+        **{key: value for key, value in _STATS.items() if key != "read_seconds"},
+        "l1_sessions": len(_L1),
+        "avg_read_ms": {
+            tier: round(1000 * _STATS["read_seconds"][tier] / count, 3) if count else None
+            for tier, count in reads.items()
+        }
+    }
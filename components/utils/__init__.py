@@ -1,16 +1,129 @@
-from components.utils.AgentFactory import AgentFactory, build_agent
-from components.utils.SupabaseClient import get_supabase_client
-from components.utils.context_helpers import merge_user_memory
-from components.utils.GuardRail import mechanigo_guardrail
-from components.utils.SessionHandler import SessionHandler
+from typing import TYPE_CHECKING
+from components.lazy import lazy_exports
 from components.utils.Registry import ToolRegistry
 
+# Resolved on first access (PEP 562) so e.g. `parse_schedule` doesn't load the Agents SDK or Supabase.
+_EXPORTS = {
+    "AgentFactory": ("components.utils.AgentFactory", "AgentFactory"),
+    "build_agent": ("components.utils.AgentFactory", "build_agent"),
+    "RunMonitor": ("components.utils.RunMonitor", "RunMonitor"),
+    "RunLoopAborted": ("components.utils.RunMonitor", "RunLoopAborted"),
+    "get_run_monitor_stats": ("components.utils.RunMonitor", "get_run_monitor_stats"),
+    "get_http_client": ("components.utils.HttpPool", "get_http_client"),
+    "close_http_client": ("components.utils.HttpPool", "close_http_client"),
+    "prewarm_connections": ("components.utils.HttpPool", "prewarm_connections"),
+    "get_pool_stats": ("components.utils.HttpPool", "get_pool_stats"),
+    "LLMScheduler": ("components.utils.LLMScheduler", "LLMScheduler"),
+    "get_llm_scheduler": ("components.utils.LLMScheduler", "get_llm_scheduler"),
+    "get_llm_scheduler_stats": ("components.utils.LLMScheduler", "get_llm_scheduler_stats"),
+    "Deadline": ("components.utils.Deadline", "Deadline"),
+    "DeadlineExceeded": ("components.utils.Deadline", "DeadlineExceeded"),
+    "deadline_scope": ("components.utils.Deadline", "deadline_scope"),
+    "get_deadline_stats": ("components.utils.Deadline", "get_deadline_stats"),
+    "hedged": ("components.utils.Hedging", "hedged"),
+    "get_hedging_stats": ("components.utils.Hedging", "get_hedging_stats"),
+    "get_supabase_client": ("components.utils.SupabaseClient", "get_supabase_client"),
+    "supabase_call": ("components.utils.SupabaseClient", "supabase_call"),
+    "CircuitBreaker": ("components.utils.CircuitBreaker", "CircuitBreaker"),
+    "CircuitOpenError": ("components.utils.CircuitBreaker", "CircuitOpenError"),
+    "get_circuit_breaker": ("components.utils.CircuitBreaker", "get_circuit_breaker"),
+    "get_circuit_breaker_stats": ("components.utils.CircuitBreaker", "get_circuit_breaker_stats"),
+    "merge_user_memory": ("components.utils.context_helpers", "merge_user_memory"),
+    "parse_schedule": ("components.utils.schedule_parser", "parse_schedule"),
+    "resolve_follow_up": ("components.utils.schedule_parser", "resolve_follow_up"),
+    "ScheduleParse": ("components.utils.schedule_parser", "ScheduleParse"),
+    "history_window": ("components.utils.history_window", "history_window"),
+    "window_history": ("components.utils.history_window", "window_history"),
+    "get_history_window_stats": ("components.utils.history_window", "get_history_window_stats"),
+    "get_usage_stats": ("components.utils.usage_tracking", "get_usage_stats"),
+    "get_prompt_cache_stats": ("components.utils.prompt_cache", "get_prompt_cache_stats"),
+    "compact_history": ("components.utils.history_compaction", "compact_history"),
+    "get_history_compaction_stats": ("components.utils.history_compaction", "get_history_compaction_stats"),
+    "extract_local_fields": ("components.utils.local_extraction", "extract_local_fields"),
+    "missing_user_fields": ("components.utils.local_extraction", "missing_user_fields"),
+    "mechanigo_guardrail": ("components.utils.GuardRail", "mechanigo_guardrail"),
+    "SessionHandler": ("components.utils.SessionHandler", "SessionHandler"),
+    "get_session_stats": ("components.utils.SessionHandler", "get_session_stats"),
+    "get_summarizer": ("components.utils.Summarizer", "get_summarizer"),
+    "get_summarizer_stats": ("components.utils.Summarizer", "get_summarizer_stats"),
+    "TieredSession": ("components.utils.TieredSession", "TieredSession"),
+    "get_tiered_session_stats": ("components.utils.TieredSession", "get_tiered_session_stats"),
+    "BookingOutbox": ("components.utils.BookingOutbox", "BookingOutbox"),
+    "idempotency_key": ("components.utils.BookingOutbox", "idempotency_key")
+}
+
+__getattr__, __dir__ = lazy_exports(globals(), _EXPORTS)
+
+if TYPE_CHECKING:
+    from components.utils.AgentFactory import AgentFactory, build_agent
+    from components.utils.RunMonitor import RunMonitor, RunLoopAborted, get_run_monitor_stats
+    from components.utils.HttpPool import get_http_client, close_http_client, prewarm_connections, get_pool_stats
+    from components.utils.LLMScheduler import LLMScheduler, get_llm_scheduler, get_llm_scheduler_stats
+    from components.utils.Deadline import Deadline, DeadlineExceeded, deadline_scope, get_deadline_stats
+    from components.utils.Hedging import hedged, get_hedging_stats
+    from components.utils.SupabaseClient import get_supabase_client, supabase_call
+    from components.utils.CircuitBreaker import (
+        CircuitBreaker, CircuitOpenError, get_circuit_breaker, get_circuit_breaker_stats
+    )
+    from components.utils.context_helpers import merge_user_memory
+    from components.utils.schedule_parser import parse_schedule, resolve_follow_up, ScheduleParse
+    from components.utils.history_window import history_window, window_history, get_history_window_stats
+    from components.utils.prompt_cache import get_prompt_cache_stats
+    from components.utils.usage_tracking import get_usage_stats
+    from components.utils.history_compaction import compact_history, get_history_compaction_stats
+    from components.utils.local_extraction import extract_local_fields, missing_user_fields
+    from components.utils.GuardRail import mechanigo_guardrail
+    from components.utils.SessionHandler import SessionHandler, get_session_stats
+    from components.utils.Summarizer import get_summarizer, get_summarizer_stats
+    from components.utils.TieredSession import TieredSession, get_tiered_session_stats
+    from components.utils.BookingOutbox import BookingOutbox, idempotency_key
+
 __all__ = [
     "get_supabase_client",
+    "supabase_call",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "get_circuit_breaker",
+    "get_circuit_breaker_stats",
+    "get_http_client",
+    "close_http_client",
+    "prewarm_connections",
+    "get_pool_stats",
+    "LLMScheduler",
+    "get_llm_scheduler",
+    "get_llm_scheduler_stats",
+    "Deadline",
+    "DeadlineExceeded",
+    "deadline_scope",
+    "get_deadline_stats",
+    "hedged",
+    "get_hedging_stats",
     "mechanigo_guardrail",
     "merge_user_memory",
+    "history_window",
+    "window_history",
+    "get_history_window_stats",
+    "get_prompt_cache_stats",
+    "get_usage_stats",
+    "compact_history",
+    "get_history_compaction_stats",
+    "extract_local_fields",
+    "missing_user_fields",
+    "parse_schedule",
+    "resolve_follow_up",
+    "ScheduleParse",
     "SessionHandler",
+    "get_session_stats",
+    "get_summarizer",
+    "get_summarizer_stats",
+    "TieredSession",
+    "get_tiered_session_stats",
+    "BookingOutbox",
+    "idempotency_key",
     "ToolRegistry",
     "AgentFactory",
+    "RunMonitor",
+    "RunLoopAborted",
+    "get_run_monitor_stats",
     "build_agent"
-]
\ No newline at end of file
+]
@@ -1,4 +1,4 @@
-from components.schemas import User, MechaniGoContext
+from components.schemas import User, UserCarDetails, MechaniGoContext
 
 def merge_user_memory(
     context: MechaniGoContext,
@@ -8,8 +8,22 @@ def merge_user_memory(
         return
     
     user: User = context.user_ctx.user_memory or User()
+
+    # Only known, non-empty fields overwrite memory so a partial extraction
+    # never wipes values captured on an earlier turn.
+    update = {
+        k: v for k, v in (payload or {}).items()
+        if k in User.model_fields and v not in (None, "")
+    }
+
+    car = update.pop("car", None)
+    if isinstance(car, dict):
+        current_car = user.car.model_dump() if user.car else {}
+        current_car.update({k: v for k, v in car.items() if v not in (None, "")})
+        update["car"] = UserCarDetails(**{k: v for k, v in current_car.items() if v is not None})
+
     updated = user.model_copy(
-        update=payload,
+        update=update,
         deep=True
     )
-    context.user_ctx.user_memory = updated
\ No newline at end of file
+    context.user_ctx.user_memory = updated
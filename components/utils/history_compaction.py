@@ -0,0 +1,201 @@
+"""
+Compaction of a turn's items before they enter the session history.
+
+A run's items carry much more than the conversation: reasoning items, function calls with
+their raw JSON arguments, sub-agent outputs that the manager then relays verbatim, and
+provider ids. Everything kept is replayed (and paid for) on every later turn, so before
+items are collected into the session they are reduced to:
+
+- user/assistant messages as plain `{"role", "content"}` text;
+- one short developer note per tool call (`[tool name(args)] output`), with the output cut
+  to `HISTORY_TOOL_SUMMARY_CHARS`, so the model never reads it as a reply of its own;
+- nothing at all for tool calls whose output the assistant relayed in its reply, reasoning
+  items, hosted-tool items, calls without an output, and repeated messages.
+
+The Runner hands items over one step at a time; the session buffers them and compacts the
+whole turn at once (`SessionHandler.end_turn`), since a relayed tool output only shows as
+such next to the final reply.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from difflib import SequenceMatcher
+import json
+import re
+
+from components.utils.history_window import TOOL_NOTE_PREFIX, estimate_tokens, item_text
+from config import settings
+
+if TYPE_CHECKING:
+    from components.common import TResponseInputItem
+
+_MESSAGE_ROLES = ("user", "assistant", "system", "developer")
+_TEXT_BLOCKS = ("input_text", "output_text", "text", "refusal")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_STATS = {
+    "batches": 0,
+    "items_in": 0,
+    "items_out": 0,
+    "bytes_in": 0,
+    "bytes_out": 0,
+    "tokens_in": 0,
+    "tokens_out": 0,
+    "tool_calls_collapsed": 0,
+    "relays_dropped": 0,
+    "duplicates_dropped": 0,
+    "reasoning_dropped": 0
+}
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def _clip(text: str, limit: int) -> str:
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def _size(items: List[Any]) -> int:
+    return len(json.dumps(items, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def _message_text(item: Dict[str, Any]) -> Optional[str]:
+    """
+    The message's text, or None when it has non-text content (images, files) to keep as-is.
+    """
+    content = item.get("content")
+    if isinstance(content, str):
+        return content
+    if not isinstance(content, list):
+        return None
+    parts = []
+    for block in content:
+        if isinstance(block, str):
+            parts.append(block)
+        elif isinstance(block, dict) and block.get("type", "text") in _TEXT_BLOCKS:
+            parts.append(str(block.get("text") or block.get("refusal") or ""))
+        else:
+            return None
+    return "".join(parts)
+
+
+def _is_relayed(output: str, replies: List[str]) -> bool:
+    """
+    Whether a tool output reappears (verbatim or nearly) in one of the assistant replies.
+    """
+    output = _normalize(output)
+    if not output:
+        return True
+    for reply in replies:
+        reply = _normalize(reply)
+        if not reply:
+            continue
+        if output in reply or reply in output:
+            return True
+        matcher = SequenceMatcher(None, output, reply, autojunk=False)
+        if matcher.quick_ratio() >= settings.HISTORY_RELAY_SIMILARITY \
+                and matcher.ratio() >= settings.HISTORY_RELAY_SIMILARITY:
+            return True
+    return False
+
+
+def _tool_note(call: Dict[str, Any], output: str) -> TResponseInputItem:
+    limit = settings.HISTORY_TOOL_SUMMARY_CHARS
+    arguments = call.get("arguments") or ""
+    if not isinstance(arguments, str):
+        arguments = json.dumps(arguments, ensure_ascii=False, default=str)
+    return {
+        "role": "developer",
+        "content": f"{TOOL_NOTE_PREFIX}{call.get('name', 'unknown')}({_clip(arguments, limit // 3)})] {_clip(output, limit)}"
+    }
+
+
+def compact_history(items: List[TResponseInputItem]) -> Tuple[List[TResponseInputItem], Dict[str, int]]:
+    """
+    Reduce a run's items to what is worth replaying on later turns.
+
+    :param items: All items of one turn (run input and new items), oldest first.
+    :type items: List[TResponseInputItem]
+    :return: The compacted items and counters of what was collapsed or dropped.
+    :rtype: Tuple[List[TResponseInputItem], Dict[str, int]]
+    """
+    outputs: Dict[str, str] = {}
+    replies: List[str] = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        if item.get("type") == "function_call_output":
+            output = item.get("output")
+            outputs[item.get("call_id")] = output if isinstance(output, str) else item_text(item)
+        elif item.get("role") == "assistant":
+            replies.append(item_text(item))
+
+    counts = {"tool_calls_collapsed": 0, "relays_dropped": 0, "duplicates_dropped": 0, "reasoning_dropped": 0}
+    compacted: List[TResponseInputItem] = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        kind = item.get("type")
+        if kind == "reasoning":
+            counts["reasoning_dropped"] += 1
+            continue
+        if kind == "function_call":
+            output = outputs.get(item.get("call_id"))
+            if output is None:
+                continue
+            if _is_relayed(output, replies):
+                counts["relays_dropped"] += 1
+                continue
+            counts["tool_calls_collapsed"] += 1
+            compacted.append(_tool_note(item, output))
+            continue
+
+        role = item.get("role")
+        if role not in _MESSAGE_ROLES or kind not in (None, "message"):
+            # function_call_output (folded into its call's note) and hosted-tool items.
+            continue
+        text = _message_text(item)
+        if text is None:
+            compacted.append(item)
+            continue
+        if not text.strip():
+            continue
+        message = {"role": role, "content": text}
+        if compacted and compacted[-1] == message:
+            counts["duplicates_dropped"] += 1
+            continue
+        compacted.append(message)
+
+    return compacted, {
+        **counts,
+        "items_in": len(items),
+        "items_out": len(compacted),
+        "bytes_in": _size(items),
+        "bytes_out": _size(compacted),
+        "tokens_in": estimate_tokens(items),
+        "tokens_out": estimate_tokens(compacted)
+    }
+
+
+def compact_items(items: List[TResponseInputItem]) -> List[TResponseInputItem]:
+    """
+    `compact_history` for items about to be collected into a session; records the savings.
+    """
+    if not items or not settings.HISTORY_COMPACTION_ENABLED:
+        return items
+    compacted, stats = compact_history(items)
+    _STATS["batches"] += 1
+    for key, value in stats.items():
+        _STATS[key] += value
+    return compacted
+
+
+def get_history_compaction_stats() -> Dict[str, Any]:
+    return {
+        **_STATS,
+        "bytes_saved": _STATS["bytes_in"] - _STATS["bytes_out"],
+        "tokens_saved": _STATS["tokens_in"] - _STATS["tokens_out"],
+        "byte_ratio": round(_STATS["bytes_out"] / _STATS["bytes_in"], 3) if _STATS["bytes_in"] else None
+    }
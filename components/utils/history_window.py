@@ -0,0 +1,202 @@
+"""
+Token-budgeted history window for model input.
+
+Plugged into the Runner as `RunConfig.session_input_callback`: the session history is cut
+down to the most recent whole turns that fit the agent's token budget, while pinned items
+(system/developer notes such as conversation summaries, and booking summaries) are always
+kept. Token counts come from a local estimate, so no tokenizer or API call is needed.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+import logging
+import json
+import re
+
+if TYPE_CHECKING:
+    from components.common import TResponseInputItem
+
+logger = logging.getLogger(__name__)
+
+PINNED_ROLES = ("system", "developer")
+# Starts the developer notes `history_compaction` leaves for collapsed tool calls.
+TOOL_NOTE_PREFIX = "[tool "
+# Rendered by `BookingSlotTracker.summary`; the details the user already confirmed.
+BOOKING_SUMMARY_RE = re.compile(r"Name:.*\n.*Payment:", re.DOTALL)
+
+# Per-message framing the API adds on top of the content.
+_ITEM_OVERHEAD_TOKENS = 4
+
+_STATS = {
+    "turns": 0,
+    "windowed_turns": 0,
+    "history_tokens": 0,
+    "sent_tokens": 0,
+    "tokens_saved": 0,
+    "items_dropped": 0
+}
+
+
+def item_text(item: TResponseInputItem) -> str:
+    """
+    The text an item contributes to the prompt (message content, tool arguments or output).
+    """
+    if not isinstance(item, dict):
+        return str(item)
+    content = item.get("content")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = []
+        for block in content:
+            if isinstance(block, dict):
+                parts.append(str(block.get("text") or block.get("content") or ""))
+            else:
+                parts.append(str(block))
+        return " ".join(parts)
+    for key in ("arguments", "output"):
+        if key in item:
+            value = item[key]
+            return value if isinstance(value, str) else json.dumps(value, default=str)
+    return json.dumps(item, default=str)
+
+
+def estimate_item_tokens(item: TResponseInputItem) -> int:
+    """
+    Rough token count for one input item (~4 characters per token).
+    """
+    return len(item_text(item)) // 4 + _ITEM_OVERHEAD_TOKENS
+
+
+def estimate_tokens(items: List[TResponseInputItem]) -> int:
+    return sum(estimate_item_tokens(item) for item in items)
+
+
+def is_tool_note(item: TResponseInputItem) -> bool:
+    return isinstance(item, dict) and item.get("role") == "developer" and item_text(item).startswith(TOOL_NOTE_PREFIX)
+
+
+def is_pinned(item: TResponseInputItem) -> bool:
+    if not isinstance(item, dict):
+        return False
+    if item.get("role") in PINNED_ROLES:
+        # A tool note belongs to its turn and is dropped with it.
+        return not is_tool_note(item)
+    return item.get("role") == "assistant" and bool(BOOKING_SUMMARY_RE.search(item_text(item)))
+
+
+def split_turns(history: List[TResponseInputItem]) -> List[List[TResponseInputItem]]:
+    """
+    Group items into turns, each starting at a user message, so a window never opens with
+    a tool output whose call was cut off.
+    """
+    turns: List[List[TResponseInputItem]] = []
+    for item in history:
+        if not turns or (isinstance(item, dict) and item.get("role") == "user"):
+            turns.append([])
+        turns[-1].append(item)
+    return turns
+
+
+def is_chronological(history: List[TResponseInputItem]) -> bool:
+    """
+    Whether `history` is in conversation order, so it can be cut into turns.
+
+    Histories read back in role-grouped order (several user messages in a single run, with
+    the replies after them) are not: `split_turns` would treat them as one turn.
+    """
+    roles = [item.get("role") for item in history if isinstance(item, dict) and item.get("role") in ("user", "assistant")]
+    if roles.count("user") < 2 or "assistant" not in roles:
+        return True
+    user_runs = sum(1 for n, role in enumerate(roles) if role == "user" and (n == 0 or roles[n - 1] != "user"))
+    return user_runs > 1
+
+
+def window_history(
+    history: List[TResponseInputItem],
+    new_input: List[TResponseInputItem],
+    budget: int,
+    min_turns: int = 1
+) -> Tuple[List[TResponseInputItem], Dict[str, int]]:
+    """
+    Fit `history` into `budget` tokens ahead of `new_input`.
+
+    :param history: Full session history, oldest first.
+    :type history: List[TResponseInputItem]
+    :param new_input: This turn's input; always sent.
+    :type new_input: List[TResponseInputItem]
+    :param budget: Token budget for history plus new input.
+    :type budget: int
+    :param min_turns: Most recent turns kept even when they exceed the budget.
+    :type min_turns: int
+    :return: The model input and `{"history_tokens", "sent_tokens", "tokens_saved", "items_dropped"}`.
+    :rtype: Tuple[List[TResponseInputItem], Dict[str, int]]
+    """
+    history_tokens = estimate_tokens(history)
+    if not is_chronological(history):
+        # No turn boundaries to cut at; send it whole rather than reorder the conversation.
+        return history + new_input, {
+            "history_tokens": history_tokens,
+            "sent_tokens": history_tokens,
+            "tokens_saved": 0,
+            "items_dropped": 0
+        }
+    pinned = [item for item in history if is_pinned(item)]
+    remaining = budget - estimate_tokens(new_input) - estimate_tokens(pinned)
+
+    kept: List[List[TResponseInputItem]] = []
+    for turn in reversed(split_turns(history)):
+        cost = estimate_tokens([item for item in turn if not is_pinned(item)])
+        if cost > remaining and len(kept) >= min_turns:
+            break
+        kept.insert(0, turn)
+        remaining -= cost
+
+    kept_items = [item for turn in kept for item in turn]
+    kept_ids = {id(item) for item in kept_items}
+    # Pinned items from dropped turns go first, in their original order.
+    window = [item for item in pinned if id(item) not in kept_ids] + kept_items
+
+    sent_tokens = estimate_tokens(window)
+    return window + new_input, {
+        "history_tokens": history_tokens,
+        "sent_tokens": sent_tokens,
+        "tokens_saved": history_tokens - sent_tokens,
+        "items_dropped": len(history) - len(window)
+    }
+
+
+def history_window(
+    budget: int,
+    agent_name: Optional[str] = None,
+    min_turns: int = 1
+) -> Callable[[List[TResponseInputItem], List[TResponseInputItem]], List[TResponseInputItem]]:
+    """
+    Build a `session_input_callback` that windows the history to `budget` tokens and
+    records the tokens saved.
+    """
+    def callback(history: List[TResponseInputItem], new_input: List[TResponseInputItem]) -> List[TResponseInputItem]:
+        items, stats = window_history(history, new_input, budget, min_turns)
+        _STATS["turns"] += 1
+        _STATS["history_tokens"] += stats["history_tokens"]
+        _STATS["sent_tokens"] += stats["sent_tokens"]
+        _STATS["tokens_saved"] += stats["tokens_saved"]
+        _STATS["items_dropped"] += stats["items_dropped"]
+        if stats["items_dropped"]:
+            _STATS["windowed_turns"] += 1
+            logger.info(
+                "History window (%s): sent ~%d of ~%d history tokens, saved ~%d, dropped %d items",
+                agent_name, stats["sent_tokens"], stats["history_tokens"],
+                stats["tokens_saved"], stats["items_dropped"]
+            )
+        return items
+
+    return callback
+
+
+def get_history_window_stats() -> Dict[str, Any]:
+    turns = _STATS["turns"]
+    return {
+        **_STATS,
+        "avg_tokens_saved_per_turn": round(_STATS["tokens_saved"] / turns, 1) if turns else 0.0
+    }
@@ -0,0 +1,221 @@
+"""
+Deterministic (rule-based) extraction of booking details.
+
+Runs before the LLM extractor so that well-structured fields (emails, PH mobile numbers,
+car year, payment type, known car makes/models) never need a model call.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+import re
+
+from components.utils.schedule_parser import ScheduleParse, parse_schedule
+from components.schemas import User
+
+# Known makes/models in the PH market; models are matched case-insensitively and
+# tolerate spaces/hyphens (e.g. "crv", "cr-v", "CR V").
+CAR_CATALOG: Dict[str, List[str]] = {
+    "Toyota": [
+        "Vios", "Wigo", "Innova", "Fortuner", "Hilux", "Corolla Altis", "Corolla Cross", "Corolla",
+        "Rush", "Avanza", "Veloz", "Raize", "Hiace", "Camry", "Land Cruiser", "Yaris"
+    ],
+    "Honda": ["City", "Civic", "CR-V", "BR-V", "HR-V", "Jazz", "Brio", "Accord", "Mobilio"],
+    "Mitsubishi": ["Mirage G4", "Mirage", "Montero Sport", "Xpander", "Strada", "L300", "Adventure", "Lancer"],
+    "Nissan": ["Almera", "Navara", "Terra", "Sentra", "Patrol", "Urvan", "Kicks"],
+    "Ford": ["Ranger", "Everest", "EcoSport", "Territory", "Fiesta", "Explorer"],
+    "Hyundai": ["Accent", "Tucson", "Santa Fe", "Creta", "Stargazer", "Reina", "Starex", "Eon"],
+    "Suzuki": ["Ertiga", "Swift", "Dzire", "Celerio", "Jimny", "XL7", "S-Presso", "APV", "Ciaz"],
+    "Mazda": ["Mazda2", "Mazda3", "CX-30", "CX-5", "CX-3", "CX-9", "BT-50"],
+    "Kia": ["Picanto", "Soluto", "Seltos", "Sportage", "Sorento", "Stonic", "Rio", "Carnival"],
+    "Isuzu": ["D-Max", "mu-X", "Crosswind", "Traviz"],
+    "Chevrolet": ["Trailblazer", "Spark", "Sail", "Colorado", "Captiva"],
+    "Subaru": ["Forester", "XV", "Outback", "BRZ"],
+    "Geely": ["Coolray", "Okavango", "Emgrand", "Azkarra"],
+    "MG": ["ZS", "MG5", "MG3"],
+}
+
+# Models that double as everyday words or place names ("Quezon City", "Rush hour");
+# these only count when the make is mentioned too.
+AMBIGUOUS_MODELS = {
+    "City", "Rush", "Jazz", "Adventure", "Terra", "Patrol", "Kicks", "Explorer", "Territory",
+    "Swift", "Rio", "Carnival", "Spark", "Sail", "Colorado", "Outback", "Eon", "Reina"
+}
+
+PAYMENT_OPTIONS = ("GCash", "Cash", "Card")
+
+EMAIL_PATTERN = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+PH_MOBILE_PATTERN = re.compile(r"(?<![\d+])(?:\+?63|0)[\s-]?(9\d{2})[\s-]?(\d{3})[\s-]?(\d{4})(?!\d)")
+YEAR_PATTERN = re.compile(r"(?<!\d)((?:19[6-9]|20[0-9])\d)(?!\d)")
+YEAR_HINT_PATTERN = re.compile(r"\b(?:year|model|taon|yr)\b", re.IGNORECASE)
+PAYMENT_PATTERNS: List[Tuple[str, re.Pattern]] = [
+    ("GCash", re.compile(r"\bg[\s-]?cash\b", re.IGNORECASE)),
+    ("Card", re.compile(r"\b(?:credit|debit)?\s?card\b|\bcredit\b", re.IGNORECASE)),
+    ("Cash", re.compile(r"(?<![\w-])cash\b", re.IGNORECASE)),
+]
+
+
+def _model_pattern(model: str) -> re.Pattern:
+    parts = [re.escape(p) for p in re.split(r"[\s-]+", model)]
+    return re.compile(r"\b" + r"[\s-]?".join(parts) + r"\b", re.IGNORECASE)
+
+
+_MAKE_PATTERNS: List[Tuple[str, re.Pattern]] = [
+    (make, re.compile(rf"\b{re.escape(make)}\b", re.IGNORECASE)) for make in CAR_CATALOG
+]
+# Longest names first so "Mirage G4" wins over "Mirage" and "Corolla Altis" over "Corolla".
+_MODEL_PATTERNS: List[Tuple[str, str, re.Pattern]] = sorted(
+    [(make, model, _model_pattern(model)) for make, models in CAR_CATALOG.items() for model in models],
+    key=lambda entry: len(entry[1]),
+    reverse=True
+)
+
+
+@dataclass
+class LocalExtraction:
+    """
+    Result of the rule-based pass.
+
+    `payload` is shaped like `User` (so it can go straight through `merge_user_memory`) and
+    `residual` is the input text with every matched span removed.
+    """
+    payload: Dict[str, Any] = field(default_factory=dict)
+    residual: str = ""
+    schedule: Optional[ScheduleParse] = None
+
+    @property
+    def found(self) -> List[str]:
+        keys = [k for k in self.payload if k != "car"]
+        keys.extend(f"car.{k}" for k in (self.payload.get("car") or {}))
+        return keys
+
+
+def _normalize_mobile(match: re.Match) -> str:
+    return "0" + "".join(match.groups())
+
+
+def _find_car(text: str) -> Tuple[Dict[str, Any], List[Tuple[int, int]]]:
+    car: Dict[str, Any] = {}
+    spans: List[Tuple[int, int]] = []
+
+    mentioned_make = None
+    for make, pattern in _MAKE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            mentioned_make = make
+            car["make"] = make
+            spans.append(match.span())
+            break
+
+    for make, model, pattern in _MODEL_PATTERNS:
+        if model in AMBIGUOUS_MODELS and make != mentioned_make:
+            continue
+        match = pattern.search(text)
+        if match:
+            if mentioned_make not in (None, make):
+                # Conflicting make/model (e.g. "Honda Vios"); leave it to the LLM.
+                return {}, []
+            car["make"] = make
+            car["model"] = model
+            spans.append(match.span())
+            break
+
+    return car, spans
+
+
+def _strip_spans(text: str, spans: List[Tuple[int, int]]) -> str:
+    if not spans:
+        return text.strip()
+    pieces: List[str] = []
+    cursor = 0
+    for start, end in sorted(spans):
+        if start < cursor:
+            start = cursor
+        pieces.append(text[cursor:start])
+        cursor = max(cursor, end)
+    pieces.append(text[cursor:])
+    residual = " ".join(piece.strip(" ,;:/") for piece in pieces)
+    return re.sub(r"\s{2,}", " ", residual).strip(" ,;:/")
+
+
+def extract_local_fields(text: str, now: Optional[datetime] = None) -> LocalExtraction:
+    """
+    Extract explicitly stated booking fields from free text without calling a model.
+
+    :param text: Raw user message.
+    :type text: str
+    :param now: Reference time for relative schedules; defaults to the current PH time.
+    :type now: Optional[datetime]
+    :return: User-shaped payload of the fields found plus the unmatched residual text.
+    :rtype: LocalExtraction
+    """
+    if not text:
+        return LocalExtraction()
+
+    payload: Dict[str, Any] = {}
+    spans: List[Tuple[int, int]] = []
+
+    schedule = parse_schedule(text, now)
+    if schedule is not None:
+        payload.update(schedule.to_payload())
+        spans.extend(schedule.spans)
+
+    email = EMAIL_PATTERN.search(text)
+    if email:
+        payload["email"] = email.group(0)
+        spans.append(email.span())
+
+    mobile = PH_MOBILE_PATTERN.search(text)
+    if mobile:
+        payload["contact_num"] = _normalize_mobile(mobile)
+        spans.append(mobile.span())
+
+    for option, pattern in PAYMENT_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            payload["payment"] = option
+            spans.append(match.span())
+            break
+
+    car, car_spans = _find_car(text)
+    spans.extend(car_spans)
+
+    # Only treat a 4-digit year as the car year when the message is about the car;
+    # schedule spans are masked too, so "Dec 20 2025" is never read as a model year.
+    masked = text
+    for start, end in spans:
+        masked = masked[:start] + (" " * (end - start)) + masked[end:]
+    if car or YEAR_HINT_PATTERN.search(text):
+        max_year = datetime.now().year + 1
+        for match in YEAR_PATTERN.finditer(masked):
+            year = int(match.group(1))
+            if year <= max_year:
+                car["year"] = year
+                spans.append(match.span())
+                break
+
+    if car:
+        payload["car"] = car
+
+    if schedule is not None and not schedule.is_complete:
+        # Keep the schedule words in the residual so the LLM can confirm or correct them.
+        spans = [span for span in spans if span not in schedule.spans]
+    return LocalExtraction(payload=payload, residual=_strip_spans(text, spans), schedule=schedule)
+
+
+def missing_user_fields(user: Optional[User]) -> List[str]:
+    """
+    List the booking fields that are still empty on the user record.
+
+    Car details are reported as `car.make`, `car.model` and `car.year`.
+    """
+    flat = user.model_dump() if user else {}
+    car = flat.pop("car", None) or {}
+    missing = [
+        key for key in (
+            "name", "email", "address", "contact_num", "service_type",
+            "schedule_date", "schedule_time", "payment"
+        )
+        if not flat.get(key)
+    ]
+    missing.extend(f"car.{key}" for key in ("make", "model", "year") if not car.get(key))
+    return missing
@@ -0,0 +1,81 @@
+"""
+Prompt-cache friendly prompt assembly and cached-token tracking.
+
+Provider-side prompt caching only reuses an exact prefix of the request (tools, then
+instructions, then input), so anything that varies per user or per turn must come after
+the parts that don't. Agents keep their instructions static and return per-turn data
+from `AgentFactory.get_turn_context`; `turn_context_filter` appends it as a developer note
+at the end of the model input, after the (append-only) conversation history. Each agent
+also sends a stable `prompt_cache_key` so requests sharing its prefix are routed together.
+
+`record_prompt_cache` collects `cached_tokens` from every model response per agent, to
+check hit rates in production. Prompts under ~1024 tokens are never cached by the API.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Optional
+
+from config import settings
+
+if TYPE_CHECKING:
+    from agents.run import CallModelData, ModelInputData
+
+_STATS: Dict[str, Dict[str, int]] = {}
+
+
+def prompt_cache_key(agent_name: str) -> str:
+    return f"mechanigo:{agent_name}"
+
+
+def turn_context_filter(
+    render: Callable[[Any], Optional[str]]
+) -> Callable[["CallModelData[Any]"], "ModelInputData"]:
+    """
+    Build a `RunConfig.call_model_input_filter` that appends `render(context)` to the end of
+    the model input, leaving the instructions and history prefix untouched.
+
+    :param render: Returns the per-turn note for the run context, or None for none.
+    :type render: Callable[[Any], Optional[str]]
+    """
+    def apply(data: "CallModelData[Any]") -> "ModelInputData":
+        note = render(data.context)
+        if note:
+            data.model_data.input.append({"role": "developer", "content": note})
+        return data.model_data
+
+    return apply
+
+
+def record_prompt_cache(agent_name: str, usages: Iterable[Any]) -> None:
+    """
+    Add the input and cached token counts of model responses to `agent_name`'s totals.
+
+    :param usages: `usage` objects of the responses (Agents SDK or OpenAI client; both
+        carry `input_tokens` and `input_tokens_details.cached_tokens`).
+    :type usages: Iterable[Any]
+    """
+    stats = _STATS.setdefault(agent_name, {"calls": 0, "input_tokens": 0, "cached_tokens": 0, "calls_with_hits": 0})
+    for usage in usages:
+        if usage is None:
+            continue
+        details = getattr(usage, "input_tokens_details", None)
+        cached = getattr(details, "cached_tokens", 0) or 0
+        stats["calls"] += 1
+        stats["input_tokens"] += getattr(usage, "input_tokens", 0) or 0
+        stats["cached_tokens"] += cached
+        if cached:
+            stats["calls_with_hits"] += 1
+
+
+def get_prompt_cache_stats() -> Dict[str, Any]:
+    return {
+        "cache_keys": settings.PROMPT_CACHE_KEY_ENABLED,
+        **{
+            agent: {
+                **stats,
+                "cached_ratio": round(stats["cached_tokens"] / stats["input_tokens"], 4) if stats["input_tokens"] else 0.0,
+                "hit_rate": round(stats["calls_with_hits"] / stats["calls"], 4) if stats["calls"] else 0.0
+            }
+            for agent, stats in _STATS.items()
+        }
+    }
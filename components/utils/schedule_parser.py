@@ -0,0 +1,492 @@
+"""
+Local date/time normalization for booking schedules.
+
+Resolves English, Tagalog and Taglish expressions ("bukas ng 3pm", "sa Sabado umaga",
+"next Monday 10", "Dec 20 alas-dos ng hapon") into Asia/Manila datetimes. When an
+expression can't be pinned down, `ambiguity` is set together with a single, precise
+`follow_up` question for the agent to ask; `resolve_follow_up` reads the user's answer
+("PM po", "yung susunod") against what was already understood.
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import re
+
+from config import PH_TZ
+
+# Service window used to decide AM/PM for bare hours ("bukas 3" -> 3PM, "Monday 10" -> 10AM).
+BUSINESS_HOURS: Tuple[int, int] = (8, 17)
+
+_WEEKDAYS: Dict[str, int] = {
+    "monday": 0, "lunes": 0,
+    "tuesday": 1, "tues": 1, "tue": 1, "martes": 1,
+    "wednesday": 2, "wed": 2, "miyerkules": 2, "miyerkoles": 2, "myerkules": 2,
+    "thursday": 3, "thurs": 3, "thu": 3, "huwebes": 3,
+    "friday": 4, "fri": 4, "biyernes": 4, "byernes": 4,
+    "saturday": 5, "sat": 5, "sabado": 5,
+    "sunday": 6, "linggo": 6,
+}
+# Everyday words too ("Linggo" is also "week"), so they only count next to a scheduling cue.
+_WEAK_DAY_WORDS = {"ngayon", "mamaya", "linggo"} | set(_WEEKDAYS)
+_WEEKDAY_LABELS = ["Lunes", "Martes", "Miyerkules", "Huwebes", "Biyernes", "Sabado", "Linggo"]
+
+_MONTHS: Dict[str, int] = {
+    "january": 1, "jan": 1, "enero": 1,
+    "february": 2, "feb": 2, "pebrero": 2, "febrero": 2,
+    "march": 3, "mar": 3, "marso": 3,
+    "april": 4, "apr": 4, "abril": 4,
+    "mayo": 5,
+    "june": 6, "jun": 6, "hunyo": 6,
+    "july": 7, "jul": 7, "hulyo": 7,
+    "august": 8, "aug": 8, "agosto": 8,
+    "september": 9, "sept": 9, "sep": 9, "setyembre": 9,
+    "october": 10, "oct": 10, "oktubre": 10,
+    "november": 11, "nov": 11, "nobyembre": 11,
+    "december": 12, "dec": 12, "disyembre": 12,
+}
+
+_TAGALOG_HOURS: Dict[str, int] = {
+    "una": 1, "dos": 2, "tres": 3, "kwatro": 4, "kuwatro": 4, "singko": 5, "sais": 6,
+    "siyete": 7, "syete": 7, "otso": 8, "nuwebe": 9, "diyes": 10, "dyes": 10, "onse": 11, "dose": 12,
+}
+
+# Day parts map to a meridiem and, when no hour is given, to the slots we suggest.
+_DAY_PARTS: Dict[str, str] = {
+    "umaga": "morning", "morning": "morning",
+    "tanghali": "noon", "noon": "noon", "lunch": "noon",
+    "hapon": "afternoon", "afternoon": "afternoon",
+    "gabi": "evening", "evening": "evening", "tonight": "evening", "night": "evening",
+}
+_DAY_PART_SUGGESTIONS: Dict[str, str] = {
+    "morning": "8AM, 9AM, 10AM o 11AM",
+    "afternoon": "1PM, 2PM, 3PM o 4PM",
+    "evening": "hanggang 5PM lang po ang schedule namin, pwede po ba 3PM o 4PM",
+}
+
+_MONTH_NAMES = "|".join(sorted(_MONTHS, key=len, reverse=True))
+_WEEKDAY_NAMES = "|".join(sorted(_WEEKDAYS, key=len, reverse=True))
+_DAY_PART_NAMES = "|".join(sorted(_DAY_PARTS, key=len, reverse=True))
+_TAGALOG_HOUR_NAMES = "|".join(sorted(_TAGALOG_HOURS, key=len, reverse=True))
+
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_SLASH_DATE = re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{2}|\d{4}))?\b")
+_MONTH_DAY = re.compile(
+    rf"\b(?P<mon>{_MONTH_NAMES})\.?\s+(?P<day>\d{{1,2}})(?:st|nd|rd|th)?\b(?:,?\s+(?P<year>\d{{4}})\b)?"
+)
+_DAY_MONTH = re.compile(
+    rf"\b(?P<day>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+|ng\s+)?(?P<mon>{_MONTH_NAMES})\b\.?(?:,?\s+(?P<year>\d{{4}})\b)?"
+)
+# "may" is also the Tagalog word for "there is", so only a capitalized "May <day>" counts.
+_MAY_DAY = re.compile(r"\bMay\s+(?P<day>\d{1,2})(?:st|nd|rd|th)?\b(?:,?\s+(?P<year>\d{4})\b)?")
+_RELATIVE_DAY = re.compile(
+    r"\b(?P<word>day after tomorrow|sa makalawa|makalawa|kinabukasan|tomorrow|bukas|"
+    r"ngayong araw|ngayon|today|mamaya)\b"
+)
+_WEEK_ONLY = re.compile(
+    r"\b(?:(?:sa\s+)?(?:susunod|darating)\s+na\s+linggo|sa\s+isang\s+linggo|next\s+week|this\s+week|ngayong\s+linggo)\b"
+)
+_WEEKDAY = re.compile(rf"\b(?P<day>{_WEEKDAY_NAMES})\b")
+_CUE_BEFORE = re.compile(
+    r"(?:\bsa|\bthis|\bnext|\bon|\bngayong|\bsusunod\s+na|\bdarating\s+na|\bby|\buntil|\bhanggang)\s*$"
+)
+_NEXT_MODIFIER = re.compile(r"(?:\bnext|\bsusunod\s+na|\bdarating\s+na)\s*$")
+
+_TIME_MERIDIEM = re.compile(r"\b(?P<hour>\d{1,2})(?::(?P<minute>[0-5]\d))?\s*(?P<mer>a\.?m\.?|p\.?m\.?)(?![a-z])")
+_TIME_24H = re.compile(r"\b(?P<hour>[01]?\d|2[0-3]):(?P<minute>[0-5]\d)\b")
+_TIME_ALAS = re.compile(
+    rf"\balas[\s-]*(?P<hour>\d{{1,2}}|{_TAGALOG_HOUR_NAMES})\b(?P<half>\s+y\s+medya)?(?::(?P<minute>[0-5]\d))?"
+)
+_TIME_PREFIXED = re.compile(r"(?:\bat|@|\bmga|\baround)\s*(?P<hour>\d{1,2})(?::(?P<minute>[0-5]\d))?\b(?!\s*[/-]\d)")
+_TIME_AFTER_DAY = re.compile(r"^\s*,?\s*(?:ng\s+|at\s+|@\s*)?(?P<hour>\d{1,2})(?::(?P<minute>[0-5]\d))?\b(?!\s*[/-]\d)")
+_DAY_PART = re.compile(rf"\b(?:ng\s+|sa\s+|in\s+the\s+)?(?P<part>{_DAY_PART_NAMES})\b")
+
+# Answers to the follow-up questions.
+_MERIDIEM_ANSWER = re.compile(rf"\b(?P<mer>a\.?m\.?|p\.?m\.?|{_DAY_PART_NAMES})(?![a-z])")
+_THIS_ANSWER = re.compile(r"\b(?:ngayong|ito|itong|this|yung\s+una|una|nearest|pinakamalapit)\b")
+_NEXT_ANSWER = re.compile(r"\b(?:susunod|sunod|next|darating|following|after)\b")
+
+
+@dataclass
+class ScheduleParse:
+    """
+    Normalized schedule found in a message.
+
+    `date`/`time` hold whatever could be resolved; `ambiguity` names what could not
+    ("meridiem", "time_of_day", "week_only", "this_or_next", "past_date", "past_time")
+    and `follow_up` is the one question that resolves it.
+    """
+    date: Optional[date] = None
+    time: Optional[time] = None
+    ambiguity: Optional[str] = None
+    follow_up: Optional[str] = None
+    spans: List[Tuple[int, int]] = field(default_factory=list)
+    alternative: Optional[date] = None # the other reading of "this_or_next"
+    written: Optional[Tuple[int, int]] = None # (hour, minute) as written, for "meridiem"
+    part: Optional[str] = None # day part mentioned, for "time_of_day"
+
+    @property
+    def is_complete(self) -> bool:
+        return self.date is not None and self.time is not None and self.ambiguity is None
+
+    @property
+    def datetime(self) -> Optional[datetime]:
+        if self.date is None or self.time is None:
+            return None
+        return PH_TZ.localize(datetime.combine(self.date, self.time))
+
+    def to_payload(self) -> Dict[str, str]:
+        """
+        `User`-shaped schedule fields (`schedule_date` as YYYY-MM-DD, `schedule_time` as HH:MM).
+        """
+        payload: Dict[str, str] = {}
+        if self.ambiguity in ("week_only", "this_or_next", "past_date"):
+            return payload
+        if self.date is not None:
+            payload["schedule_date"] = self.date.isoformat()
+        if self.time is not None and self.ambiguity not in ("meridiem", "time_of_day", "past_time"):
+            payload["schedule_time"] = self.time.strftime("%H:%M")
+        return payload
+
+    def pending(self) -> Dict[str, Any]:
+        """
+        JSON-ready state of an unresolved parse, kept with the session until
+        `resolve_follow_up` reads the answer against it.
+        """
+        return {
+            "ambiguity": self.ambiguity,
+            "date": self.date.isoformat() if self.date else None,
+            "time": self.time.strftime("%H:%M") if self.time else None,
+            "alternative": self.alternative.isoformat() if self.alternative else None,
+            "written": list(self.written) if self.written else None,
+            "part": self.part
+        }
+
+
+def _label(day: date) -> str:
+    return f"{_WEEKDAY_LABELS[day.weekday()]}, {day:%b} {day.day}"
+
+
+def _hour_label(hour: int, minute: int) -> str:
+    return f"{hour}:{minute:02d}" if minute else f"{hour}"
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _upcoming(today: date, month: int, day: int) -> Optional[date]:
+    candidate = _safe_date(today.year, month, day)
+    if candidate is not None and candidate < today:
+        candidate = _safe_date(today.year + 1, month, day)
+    return candidate
+
+
+def _has_time_cue(text: str) -> bool:
+    """
+    Whether the message also states a time or a part of the day.
+    """
+    return any(
+        pattern.search(text)
+        for pattern in (_TIME_MERIDIEM, _TIME_24H, _TIME_ALAS, _TIME_PREFIXED, _DAY_PART)
+    )
+
+
+def _is_schedule_word(text: str, match: re.Match, word: str) -> bool:
+    """
+    Weak day words ("ngayon", "linggo", weekday names) only count when preceded by a cue
+    (sa/this/next/on, ...) or when the message also states a time.
+    """
+    if word not in _WEAK_DAY_WORDS:
+        return True
+    return bool(_CUE_BEFORE.search(text[:match.start()])) or _has_time_cue(text)
+
+
+def _find_date(text: str, raw: str, today: date) -> Tuple[Optional[date], Optional[str], Optional[date], List[Tuple[int, int]]]:
+    """
+    Returns (date, ambiguity, alternative date, spans).
+    """
+    for pattern in (_MONTH_DAY, _DAY_MONTH):
+        match = pattern.search(text)
+        if match:
+            month = _MONTHS[match.group("mon")]
+            day = int(match.group("day"))
+            if match.group("year"):
+                found = _safe_date(int(match.group("year")), month, day)
+                if found is not None and found < today:
+                    return found, "past_date", None, [match.span()]
+            else:
+                found = _upcoming(today, month, day)
+            if found is not None:
+                return found, None, None, [match.span()]
+
+    match = _MAY_DAY.search(raw)
+    if match:
+        year = match.group("year")
+        found = _safe_date(int(year), 5, int(match.group("day"))) if year else _upcoming(today, 5, int(match.group("day")))
+        if found is not None:
+            return found, ("past_date" if found < today else None), None, [match.span()]
+
+    match = _ISO_DATE.search(text)
+    if match:
+        found = _safe_date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        if found is not None:
+            return found, ("past_date" if found < today else None), None, [match.span()]
+
+    match = _SLASH_DATE.search(text)
+    if match:
+        first, second, year = int(match.group(1)), int(match.group(2)), match.group(3)
+        # PH convention is MM/DD; fall back to DD/MM when the first number can't be a month.
+        month, day = (first, second) if first <= 12 else (second, first)
+        if year:
+            full_year = int(year) + (2000 if len(year) == 2 else 0)
+            found = _safe_date(full_year, month, day)
+            if found is not None and found < today:
+                return found, "past_date", None, [match.span()]
+        else:
+            found = _upcoming(today, month, day)
+        if found is not None:
+            return found, None, None, [match.span()]
+
+    for match in _RELATIVE_DAY.finditer(text):
+        word = match.group("word")
+        if not _is_schedule_word(text, match, word):
+            continue
+        offset = 0
+        if word in ("tomorrow", "bukas", "kinabukasan"):
+            offset = 1
+        elif word in ("day after tomorrow", "sa makalawa", "makalawa"):
+            offset = 2
+        return today + timedelta(days=offset), None, None, [match.span()]
+
+    week = _WEEK_ONLY.search(text)
+
+    for match in _WEEKDAY.finditer(text):
+        if week and week.start() <= match.start() < week.end():
+            continue
+        if not _is_schedule_word(text, match, match.group("day")):
+            continue
+        target = _WEEKDAYS[match.group("day")]
+        days_ahead = (target - today.weekday()) % 7 or 7
+        upcoming = today + timedelta(days=days_ahead)
+        if _NEXT_MODIFIER.search(text[:match.start()]):
+            next_week_start = today + timedelta(days=7 - today.weekday())
+            following = next_week_start + timedelta(days=target)
+            if following != upcoming:
+                # "next Friday" said on a Monday: this week's Friday or the one after?
+                return following, "this_or_next", upcoming, [match.span()]
+            return following, None, None, [match.span()]
+        return upcoming, None, None, [match.span()]
+
+    if week:
+        return None, "week_only", None, [week.span()]
+
+    return None, None, None, []
+
+
+def _resolve_hour(hour: int, minute: int, part: Optional[str]) -> Tuple[Optional[time], bool]:
+    """
+    Resolve a bare hour (no AM/PM) using the day part or the service window.
+    Returns (time, ambiguous).
+    """
+    if hour > 23 or minute > 59:
+        return None, False
+    if hour >= 13 or hour == 0:
+        return time(hour, minute), False
+    if part == "morning":
+        return time(hour % 12, minute), False
+    if part == "noon":
+        return time(hour if hour in (11, 12) else hour + 12, minute), False
+    if part in ("afternoon", "evening"):
+        return time(hour % 12 + 12, minute), False
+
+    start, end = BUSINESS_HOURS
+    as_am, as_pm = hour % 12, hour % 12 + 12
+    am_open = start <= as_am < end
+    pm_open = start <= as_pm < end
+    if hour == 12:
+        return time(12, minute), False
+    if am_open != pm_open:
+        return time(as_am if am_open else as_pm, minute), False
+    return time(as_am, minute), True
+
+
+def _find_time(text: str, date_end: Optional[int], part: Optional[str]) -> Tuple[Optional[time], bool, Optional[Tuple[int, int]], List[Tuple[int, int]]]:
+    """
+    Returns (time, ambiguous, (hour, minute) as written, spans).
+    """
+    match = _TIME_MERIDIEM.search(text)
+    if match:
+        hour = int(match.group("hour"))
+        minute = int(match.group("minute") or 0)
+        if 1 <= hour <= 12:
+            is_pm = match.group("mer").startswith("p")
+            return time(hour % 12 + (12 if is_pm else 0), minute), False, (hour, minute), [match.span()]
+
+    match = _TIME_24H.search(text)
+    if match:
+        hour, minute = int(match.group("hour")), int(match.group("minute"))
+        if hour >= 13 or match.group("hour").startswith("0"):
+            return time(hour, minute), False, (hour, minute), [match.span()]
+        resolved, ambiguous = _resolve_hour(hour, minute, part)
+        return resolved, ambiguous, (hour, minute), [match.span()]
+
+    match = _TIME_ALAS.search(text)
+    if match:
+        raw_hour = match.group("hour")
+        hour = _TAGALOG_HOURS.get(raw_hour) or int(raw_hour)
+        minute = 30 if match.group("half") else int(match.group("minute") or 0)
+        resolved, ambiguous = _resolve_hour(hour, minute, part)
+        return resolved, ambiguous, (hour, minute), [match.span()]
+
+    candidates = []
+    if date_end is not None:
+        after = _TIME_AFTER_DAY.match(text[date_end:])
+        if after:
+            candidates.append((after, date_end))
+    prefixed = _TIME_PREFIXED.search(text)
+    if prefixed:
+        candidates.append((prefixed, 0))
+
+    for match, offset in candidates:
+        hour = int(match.group("hour"))
+        minute = int(match.group("minute") or 0)
+        if 1 <= hour <= 12:
+            resolved, ambiguous = _resolve_hour(hour, minute, part)
+            start, end = match.span()
+            return resolved, ambiguous, (hour, minute), [(start + offset, end + offset)]
+
+    return None, False, None, []
+
+
+def parse_schedule(text: str, now: Optional[datetime] = None) -> Optional[ScheduleParse]:
+    """
+    Parse a schedule expression out of a user message.
+
+    :param text: Raw user message (English, Tagalog or Taglish).
+    :type text: str
+    :param now: Reference time; defaults to the current time in `PH_TZ`.
+    :type now: Optional[datetime]
+    :return: The normalized schedule, or `None` when the message has no schedule expression.
+    :rtype: Optional[ScheduleParse]
+    """
+    if not text:
+        return None
+
+    now = now.astimezone(PH_TZ) if now is not None else datetime.now(PH_TZ)
+    today = now.date()
+    lowered = text.lower()
+
+    found_date, ambiguity, alternative, spans = _find_date(lowered, text, today)
+
+    # Blank out the date so its digits aren't read as an hour.
+    masked = lowered
+    for start, end in spans:
+        masked = masked[:start] + (" " * (end - start)) + masked[end:]
+
+    part_match = _DAY_PART.search(masked)
+    part = _DAY_PARTS[part_match.group("part")] if part_match else None
+    if part_match:
+        spans.append(part_match.span())
+        if part_match.group("part") == "tonight" and found_date is None:
+            found_date = today
+
+    date_end = max((end for _, end in spans), default=None) if found_date else None
+    found_time, meridiem_ambiguous, written, time_spans = _find_time(masked, date_end, part)
+    spans.extend(time_spans)
+
+    if found_time is None and part == "noon":
+        found_time = time(12, 0)
+
+    if found_date is None and found_time is None and ambiguity is None and part is None:
+        return None
+
+    result = ScheduleParse(
+        date=found_date, time=found_time, ambiguity=ambiguity, spans=spans,
+        alternative=alternative, written=written, part=part
+    )
+    day_text = f" sa {_label(found_date)}" if found_date else ""
+
+    if ambiguity == "past_date":
+        result.follow_up = f"Lumipas na po ang {_label(found_date)}. Anong petsa po ang gusto niyo?"
+    elif ambiguity == "week_only":
+        result.follow_up = "Anong araw po sa linggong iyon kayo available?"
+    elif ambiguity == "this_or_next":
+        result.follow_up = (
+            f"Ngayong {_label(alternative)} po ba, o sa susunod na linggo ({_label(found_date)})?"
+        )
+    elif meridiem_ambiguous and written is not None:
+        hour_text = _hour_label(*written)
+        result.ambiguity = "meridiem"
+        result.follow_up = f"{hour_text}AM po ba o {hour_text}PM{day_text}?"
+    elif found_time is None and part in _DAY_PART_SUGGESTIONS:
+        result.ambiguity = "time_of_day"
+        result.follow_up = f"Anong oras po{day_text}? ({_DAY_PART_SUGGESTIONS[part]})"
+    elif result.datetime is not None and result.datetime <= now:
+        result.ambiguity = "past_time"
+        result.follow_up = f"Lumipas na po ang {found_time:%I:%M %p}{day_text}. Anong oras po ang gusto niyo?"
+
+    return result
+
+
+def _time_text(value: time) -> str:
+    return value.strftime("%I:%M%p").lower()
+
+
+def resolve_follow_up(pending: Dict[str, Any], text: str, now: Optional[datetime] = None) -> Optional[ScheduleParse]:
+    """
+    Read the answer to a schedule follow-up question.
+
+    The answer usually only carries what was asked ("PM po", "yung susunod na linggo", "mga 9"),
+    so it is combined with what the earlier message already pinned down and parsed again.
+
+    :param pending: `ScheduleParse.pending()` of the message that raised the question.
+    :type pending: Dict[str, Any]
+    :param text: The user's next message.
+    :type text: str
+    :param now: Reference time; defaults to the current time in `PH_TZ`.
+    :type now: Optional[datetime]
+    :return: The schedule read from the answer (possibly with a new follow-up), or `None` when
+        the message doesn't answer the question.
+    :rtype: Optional[ScheduleParse]
+    """
+    if not text or not pending:
+        return None
+    lowered = text.lower()
+    ambiguity = pending.get("ambiguity")
+    # Only what the earlier message got right carries over.
+    known_date = pending.get("date") if ambiguity not in ("week_only", "this_or_next", "past_date") else None
+    known_time = pending.get("time") if ambiguity not in ("meridiem", "time_of_day", "past_time") else None
+    answered = False
+
+    if ambiguity == "meridiem" and pending.get("written"):
+        match = _MERIDIEM_ANSWER.search(lowered)
+        if match:
+            hour, minute = pending["written"]
+            word = match.group("mer").replace(".", "")
+            resolved, _ = _resolve_hour(hour, minute, {"am": "morning", "pm": "afternoon"}.get(word) or _DAY_PARTS[word])
+            if resolved is not None:
+                known_time, answered = resolved.strftime("%H:%M"), True
+    elif ambiguity == "this_or_next" and pending.get("alternative"):
+        if _NEXT_ANSWER.search(lowered):
+            known_date, answered = pending.get("date"), True
+        elif _THIS_ANSWER.search(lowered):
+            known_date, answered = pending["alternative"], True
+    elif ambiguity == "time_of_day" and pending.get("part"):
+        # "mga 9" / "9 po": a bare hour counts, read within the day part already given.
+        part_word = next(word for word, part in _DAY_PARTS.items() if part == pending["part"])
+        text = f"at {text} {part_word}"
+
+    own = parse_schedule(text, now)
+    if own is None and not answered:
+        return None
+    parts = []
+    if known_date and (own is None or own.date is None):
+        parts.append(known_date)
+    if own is not None:
+        parts.append(text)
+    if known_time and (own is None or own.time is None):
+        parts.append(_time_text(time.fromisoformat(known_time)))
+    return parse_schedule(" ".join(parts), now)
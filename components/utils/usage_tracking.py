@@ -0,0 +1,63 @@
+"""
+Per-request and process-wide model usage accounting.
+
+Every call site that talks to a model (the manager run, the guardrail run, nested sub-agent
+runs, `extract_user_info`, the background summarizer) reports the responses' usage through
+`track_usage`. It lands in the turn's `MechaniGoContext.usage` collector (returned with the
+reply), in the process-wide totals served by `/metrics`, and in the per-agent cached-token
+stats (`prompt_cache`).
+"""
+from typing import Any, Dict, Iterable, Optional
+
+from components.schemas.Usage import UsageCollector
+from components.utils.prompt_cache import record_prompt_cache
+from config import settings
+
+_TOTALS = UsageCollector()
+_STATS = {"turns": 0}
+
+
+def agent_model(agent: Any) -> str:
+    """
+    Model an SDK agent runs on (agents built without one use `settings.OPENAI_MODEL`).
+    """
+    model = getattr(agent, "model", None)
+    if isinstance(model, str) and model:
+        return model
+    return getattr(model, "model", None) or settings.OPENAI_MODEL
+
+
+def track_usage(context: Optional[Any], agent_name: str, model: str, usages: Iterable[Any]) -> None:
+    """
+    Record the usage of model responses made on behalf of `agent_name`.
+
+    :param context: Run context carrying a `usage` collector (the turn's), or None for calls
+        outside a turn.
+    :type context: Optional[Any]
+    :param agent_name: Agent (or call site) that made the calls.
+    :type agent_name: str
+    :param model: Model the calls went to.
+    :type model: str
+    :param usages: `usage` objects of the responses.
+    :type usages: Iterable[Any]
+    """
+    usages = [usage for usage in usages if usage is not None]
+    collector = getattr(context, "usage", None)
+    for usage in usages:
+        _TOTALS.add(agent_name, model, usage)
+        if collector is not None:
+            collector.add(agent_name, model, usage)
+    record_prompt_cache(agent_name, usages)
+
+
+def count_turn() -> None:
+    _STATS["turns"] += 1
+
+
+def get_usage_stats() -> Dict[str, Any]:
+    turns = _STATS["turns"]
+    return {
+        "turns": turns,
+        "avg_cost_usd_per_turn": round(_TOTALS.total.cost_usd / turns, 6) if turns else None,
+        **_TOTALS.breakdown()
+    }
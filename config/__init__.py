@@ -1,4 +1,4 @@
-from config.settings import BaseConfiguration, Environment, ProductionSettings, DevelopmentSettings, get_settings
+from config.settings import BaseConfiguration, Environment, ProductionSettings, DevelopmentSettings, get_settings, PH_TZ
 
 settings = get_settings()
 
@@ -8,5 +8,6 @@ __all__ = [
     "BaseConfiguration",
     "Environment",
     "get_settings",
+    "PH_TZ",
     "settings"
 ]
\ No newline at end of file
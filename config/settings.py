@@ -1,10 +1,13 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 from functools import lru_cache
-from typing import Optional
+from typing import Optional, Dict
 from enum import Enum
+import pytz
 import os
 
+PH_TZ = pytz.timezone("Asia/Manila")
+
 class Environment(str, Enum):
     DEV = "development"
     PROD = "production"
@@ -27,6 +30,10 @@ class BaseConfiguration(BaseSettings):
     API_HOST: str = Field(default="0.0.0.0", description="API host")
     API_PORT: int = Field(default=8000, description="API port")
     API_RELOAD: bool = Field(default=True, description="Enable auto-reload")
+    API_WORKERS: Optional[int] = Field(default=None, description="Worker processes in production mode; defaults to the usable CPU count.")
+    API_MAX_WORKERS: int = Field(default=8, description="Upper bound for the auto-detected worker count.")
+    API_PRELOAD: bool = Field(default=True, description="Load the app and build the read-only knowledge indexes once in the master before forking workers (gunicorn only).")
+    API_GRACEFUL_TIMEOUT_SECONDS: int = Field(default=30, description="Time a stopping worker gets to finish in-flight turns and flush session writes.")
 
     # OpenAI configurations
     OPENAI_API_KEY: str = Field(...)
@@ -40,6 +47,7 @@ class BaseConfiguration(BaseSettings):
     )
     MAIN_AGENT_TEMPERATURE: Optional[float] = Field(default=0.2, description="Control for determining the model's response.")
     SUB_AGENT_TEMPERATURE: Optional[float] = Field(default=0.1, description="Control for determining the model's response.")
+    SUB_AGENT_MAX_TURNS: int = Field(default=6, description="Max turns for a nested sub-agent (`as_tool`) run.")
     FAQ_VECTOR_STORE_ID: Optional[str] = Field(default=None, description="Chatbot knowledgebase for FAQs.")
     MECHANIC_VECTOR_STORE_ID: Optional[str] = Field(default=None, description="Chatbot knowledgebase for mechanic.")
 
@@ -47,6 +55,125 @@ class BaseConfiguration(BaseSettings):
     SUPABASE_API_KEY: str = Field(..., description="The unique Supabase Key which is supplied when you create a new project in your project dashboard.")
     SUPABASE_URL: str = Field(..., description="The unique Supabase URL which is supplied when you create a new project in your project dashboard.")
 
+    # Shared HTTP connection pool (OpenAI + Supabase)
+    HTTP_MAX_CONNECTIONS: int = Field(default=100, description="Max open connections in the shared HTTP pool.")
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = Field(default=20, description="Max idle keep-alive connections kept in the shared HTTP pool.")
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = Field(default=30.0, description="Idle time before a keep-alive connection is closed.")
+    HTTP2_ENABLED: bool = Field(default=True, description="Negotiate HTTP/2 when the `h2` package is installed.")
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = Field(default=5.0, description="Connect timeout for outbound HTTP calls.")
+    HTTP_READ_TIMEOUT_SECONDS: float = Field(default=60.0, description="Read timeout for outbound HTTP calls.")
+
+    # Session context sync (lets any worker pick up a user's booking progress)
+    SESSION_CONTEXT_SYNC: bool = Field(default=True, description="Persist `MechaniGoContext` to Supabase with the session history and rehydrate it on any worker.")
+    SESSION_CONTEXT_TABLE: str = Field(default="session_context", description="Supabase table holding one serialized context per session (see docs/migrations).")
+    SESSION_TIERED_STORE: bool = Field(default=True, description="Serve session history from an in-process LRU and a local SQLite file before Supabase.")
+    SESSION_L1_MAX_SESSIONS: int = Field(default=2000, description="Session histories kept in the per-worker LRU.")
+    SESSION_L2_PATH: str = Field(default="data/session_cache.db", description="Local SQLite (WAL) file for the L2 session tier.")
+    SESSION_SUMMARY_ENABLED: bool = Field(default=True, description="Fold older turns of long sessions into a rolling summary in the background.")
+    SESSION_SUMMARY_TABLE: str = Field(default="session_summary", description="Supabase table holding one rolling summary per session (see docs/migrations).")
+    SUMMARY_MODEL: str = Field(default="gpt-4o-mini", description="Cheap model used for background summaries.")
+    SUMMARY_TRIGGER_TOKENS: int = Field(default=2500, description="Summarize right after a turn once the session's prompt history reaches this size.")
+    SUMMARY_IDLE_SECONDS: float = Field(default=120.0, description="Summarize a session that has been idle this long...")
+    SUMMARY_MIN_TOKENS: int = Field(default=1200, description="...if its prompt history is at least this large.")
+    SUMMARY_KEEP_TURNS: int = Field(default=3, description="Most recent turns never folded into the summary.")
+    SUMMARY_MAX_TOKENS: int = Field(default=400, description="Max output tokens for a summary.")
+    SUMMARY_LOAD_RETRY_SECONDS: float = Field(default=60.0, description="Wait this long before re-reading a session's summary after a failed read.")
+    SESSION_WRITE_BEHIND_SECONDS: float = Field(default=0.5, description="Delay before new history items are flushed to Supabase.")
+
+    # Per-session turn queue (serializes turns, merges message bursts)
+    TURN_DEBOUNCE_SECONDS: float = Field(default=0.8, description="Quiet period after a message before the turn runs; messages arriving within it are merged. 0 disables merging.")
+    TURN_DEBOUNCE_MAX_SECONDS: float = Field(default=2.5, description="Longest a message waits for more of the burst before its turn runs anyway.")
+    TURN_MAX_BATCH_MESSAGES: int = Field(default=4, description="Max messages merged into one turn.")
+
+    # Idempotent send-message (retries attach to the in-flight turn or replay its result)
+    IDEMPOTENCY_TTL_SECONDS: float = Field(default=600.0, description="How long a result is replayed for a repeated `Idempotency-Key`.")
+    IDEMPOTENCY_MAX_ENTRIES: int = Field(default=5000, description="Max cached results kept per worker.")
+
+    # Process-wide LLM call scheduler (concurrency + per-model RPM/TPM budgets)
+    LLM_SCHEDULER_ENABLED: bool = Field(default=True, description="Route every OpenAI model call through the process-wide scheduler.")
+    LLM_MAX_CONCURRENCY: int = Field(default=16, description="Max concurrent OpenAI model calls per worker.")
+    LLM_MODEL_LIMITS: Dict[str, Dict[str, int]] = Field(
+        default={
+            "gpt-4.1": {"rpm": 500, "tpm": 30000},
+            "gpt-4.1-mini": {"rpm": 500, "tpm": 200000},
+            "gpt-4o-mini": {"rpm": 500, "tpm": 200000}
+        },
+        description="Per-model `rpm`/`tpm` budgets for this worker (JSON in env); split your org limits across workers."
+    )
+    LLM_DEFAULT_RPM: int = Field(default=500, description="Requests-per-minute budget for models not in `LLM_MODEL_LIMITS`.")
+    LLM_DEFAULT_TPM: int = Field(default=200000, description="Tokens-per-minute budget for models not in `LLM_MODEL_LIMITS`.")
+    LLM_DEFAULT_OUTPUT_TOKENS: int = Field(default=512, description="Output tokens assumed when a request sets no max output tokens.")
+    LLM_RATE_LIMIT_BACKOFF_SECONDS: float = Field(default=1.0, description="Pause applied to a model after a 429 without retry-after; doubles on consecutive 429s.")
+    LLM_RATE_LIMIT_MAX_BACKOFF_SECONDS: float = Field(default=30.0, description="Upper bound for the coordinated 429 pause.")
+    LLM_FAIRNESS_QUANTUM_TOKENS: int = Field(default=2000, description="Deficit round-robin credit per user per round within a priority class.")
+    LLM_PRIORITY_AGING_SECONDS: float = Field(default=10.0, description="A call waiting this long is served ahead of higher classes, so no class starves.")
+
+    # Request rate limiting (token buckets, checked before any route dependency runs)
+    RATE_LIMIT_ENABLED: bool = Field(default=True, description="Apply token-bucket limits to `/send` endpoints.")
+    RATE_LIMIT_USER_PER_MINUTE: float = Field(default=20.0, description="Sustained requests per minute per `X-User-Id` (client IP when absent).")
+    RATE_LIMIT_USER_BURST: int = Field(default=6, description="Requests a single user may send back-to-back.")
+    RATE_LIMIT_GLOBAL_PER_SECOND: float = Field(default=20.0, description="Sustained requests per second across all users, per worker.")
+    RATE_LIMIT_GLOBAL_BURST: int = Field(default=40, description="Global burst capacity, per worker.")
+    RATE_LIMIT_MAX_TRACKED_USERS: int = Field(default=10000, description="Per-user buckets kept in memory (least recently seen are dropped).")
+
+    # Request deadline budget (per /send-message turn)
+    REQUEST_DEADLINE_SECONDS: float = Field(default=25.0, description="Time budget for one turn; keep it below the client's timeout.")
+    DEADLINE_RESERVE_SECONDS: float = Field(default=1.0, description="Budget held back to build a degraded reply when a step runs out of time.")
+    DEADLINE_AGENT_MIN_SECONDS: float = Field(default=4.0, description="Below this much budget the turn skips the model and answers locally.")
+    DEADLINE_HISTORY_MIN_SECONDS: float = Field(default=8.0, description="Below this much budget the Supabase history read is skipped.")
+    DEADLINE_SUB_AGENT_MIN_SECONDS: float = Field(default=3.0, description="Below this much budget a sub-agent tool isn't started.")
+    DEADLINE_FAQ_MIN_SCORE: float = Field(default=0.35, description="Minimum match score for a local FAQ answer to be used as a degraded reply.")
+
+    # Hedged guardrail/extraction calls (opt-in)
+    HEDGING_ENABLED: bool = Field(default=False, description="Fire a duplicate guardrail/extraction call when the first is slower than usual.")
+    HEDGE_PERCENTILE: float = Field(default=0.9, description="Observed latency percentile after which a call is hedged.")
+    HEDGE_MIN_SAMPLES: int = Field(default=20, description="Latency samples needed per call kind before hedging starts.")
+    HEDGE_MIN_DELAY_SECONDS: float = Field(default=0.3, description="Never hedge earlier than this.")
+    HEDGE_WINDOW: int = Field(default=200, description="Recent latency samples kept per call kind.")
+    HEDGE_BUDGET_RATIO: float = Field(default=0.1, description="Hedges allowed per call, capping the extra request cost.")
+    HEDGE_BUDGET_BURST: float = Field(default=5.0, description="Hedges that may be spent back-to-back after a quiet period.")
+
+    # Supabase circuit breaker
+    SUPABASE_BREAKER_FAILURE_THRESHOLD: int = Field(default=5, description="Consecutive Supabase failures that open the circuit.")
+    SUPABASE_BREAKER_RESET_SECONDS: float = Field(default=15.0, description="How long the circuit stays open before a half-open probe.")
+    SUPABASE_BREAKER_HALF_OPEN_PROBES: int = Field(default=1, description="Concurrent probe calls allowed while half-open.")
+
+    # History window (model input token budget)
+    HISTORY_TOKEN_BUDGET: int = Field(default=3000, description="Estimated tokens of session history (plus the new message) sent per turn.")
+    HISTORY_TOKEN_BUDGETS: Dict[str, int] = Field(default_factory=dict, description='Per-agent overrides by agent name, e.g. {"MechaniGo Bot": 4000}.')
+    HISTORY_MIN_TURNS: int = Field(default=1, description="Most recent turns always kept, even over budget.")
+    HISTORY_COMPACTION_ENABLED: bool = Field(default=True, description="Strip reasoning, tool-call payloads and relayed sub-agent output before items enter the session history.")
+    HISTORY_TOOL_SUMMARY_CHARS: int = Field(default=240, description="Max characters of tool output kept in a collapsed tool-call note.")
+    HISTORY_RELAY_SIMILARITY: float = Field(default=0.8, description="Tool output at least this similar to an assistant reply counts as relayed and is dropped.")
+
+    # Prompt caching
+    PROMPT_CACHE_KEY_ENABLED: bool = Field(default=True, description="Send a per-agent prompt_cache_key so requests sharing an agent's static prefix hit the same cache.")
+
+    # Usage accounting (USD per 1M tokens; dated snapshots match by prefix)
+    MODEL_PRICING: Dict[str, Dict[str, float]] = Field(
+        default_factory=lambda: {
+            "gpt-4.1": {"input": 2.00, "cached_input": 0.50, "output": 8.00},
+            "gpt-4.1-mini": {"input": 0.40, "cached_input": 0.10, "output": 1.60},
+            "gpt-4.1-nano": {"input": 0.10, "cached_input": 0.025, "output": 0.40},
+            "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+            "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60}
+        },
+        description="Per-model token prices used to estimate the cost of each call."
+    )
+
+    # Sub-agent run monitor (loop / turn-budget detection)
+    RUN_MONITOR_MAX_REPEATED_TOOL_CALLS: int = Field(default=2, description="Abort a sub-agent run once the same tool is called with identical arguments more than this many times.")
+    RUN_MONITOR_MAX_SIMILAR_OUTPUTS: int = Field(default=2, description="Abort a sub-agent run after this many consecutive near-identical tool/model outputs.")
+    RUN_MONITOR_SIMILARITY_THRESHOLD: float = Field(default=0.95, description="Similarity ratio (0-1) above which two outputs count as near-identical.")
+    RUN_MONITOR_MAX_RUN_TOKENS: int = Field(default=15000, description="Total token budget for a single sub-agent run.")
+
+    # Booking outbox (queue booking writes locally and deliver in the background)
+    BOOKING_OUTBOX_ENABLED: bool = Field(default=False, description="Queue `save_user_info` writes in a local SQLite outbox instead of writing to Supabase inline.")
+    BOOKING_OUTBOX_PATH: str = Field(default="data/booking_outbox.db", description="SQLite file for the booking outbox.")
+    BOOKING_OUTBOX_MAX_ATTEMPTS: int = Field(default=8, description="Delivery attempts before an outbox entry is marked failed.")
+    BOOKING_OUTBOX_BASE_DELAY_SECONDS: float = Field(default=1.0, description="First retry delay; doubles on every failed attempt.")
+    BOOKING_OUTBOX_MAX_DELAY_SECONDS: float = Field(default=300.0, description="Upper bound for the retry delay.")
+
     LOG_LEVEL: str = Field(default="INFO", description="logging level")
     LOG_FORMAT: str = "%(asctime)s - %(name)s  - %(levelname)s - %(message)s"
 
@@ -0,0 +1,26 @@
+-- Tables used by `SessionHandler` next to `session_history`.
+-- Run once in the Supabase SQL editor before enabling
+-- SESSION_CONTEXT_SYNC / SESSION_SUMMARY_ENABLED (both on by default).
+
+-- One row per session: the latest `MechaniGoContext` snapshot. `version` is the
+-- compare-and-swap counter that lets only one worker write each version.
+create table if not exists public.session_context (
+    session_id text primary key,
+    user_id text not null,
+    context jsonb not null,
+    version bigint not null default 1,
+    updated_at timestamptz not null default now()
+);
+
+-- One row per session: the rolling summary of its older turns. `covered` lists the
+-- `item_hash` of every history item the summary replaces.
+create table if not exists public.session_summary (
+    session_id text primary key,
+    user_id text not null,
+    summary text not null,
+    covered jsonb not null default '[]'::jsonb,
+    updated_at timestamptz not null default now()
+);
+
+create index if not exists session_context_user_id_idx on public.session_context (user_id);
+create index if not exists session_summary_user_id_idx on public.session_summary (user_id);
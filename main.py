@@ -1,10 +1,98 @@
-from config import settings
+"""
+API launcher.
+
+`python main.py` runs a single auto-reloading process (development). With
+`ENV=production` (or `--prod`) it starts one worker per usable CPU instead:
+under gunicorn when it is installed (with optional preload of the read-only
+knowledge indexes, shared copy-on-write by the forked workers), otherwise with
+uvicorn's own process manager.
+"""
+from importlib.util import find_spec
+from config import settings, Environment
+import argparse
+import logging
 import uvicorn
+import os
 
-if __name__ == "__main__":
+logger = logging.getLogger(__name__)
+
+APP_PATH = "api.app:app"
+
+
+def worker_count() -> int:
+    """
+    `API_WORKERS` if set, else the CPUs this process may run on, capped at `API_MAX_WORKERS`.
+    """
+    if settings.API_WORKERS:
+        return settings.API_WORKERS
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError: # not available on macOS/Windows
+        cpus = os.cpu_count() or 1
+    return max(1, min(cpus, settings.API_MAX_WORKERS))
+
+
+def run_dev() -> None:
     uvicorn.run(
-        "api.app:app",
+        APP_PATH,
         host=settings.API_HOST,
         port=settings.API_PORT,
         reload=settings.API_RELOAD
-    )
\ No newline at end of file
+    )
+
+
+def _run_gunicorn(workers: int) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    worker_class = (
+        "uvicorn_worker.UvicornWorker" if find_spec("uvicorn_worker")
+        else "uvicorn.workers.UvicornWorker"
+    )
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{settings.API_HOST}:{settings.API_PORT}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", worker_class)
+            self.cfg.set("preload_app", settings.API_PRELOAD)
+            self.cfg.set("graceful_timeout", settings.API_GRACEFUL_TIMEOUT_SECONDS)
+
+        def load(self):
+            from api.app import app
+            if settings.API_PRELOAD:
+                # Built once here; forked workers find the indexes already cached.
+                from components.tools.knowledge import warm_knowledge_indexes
+                warm_knowledge_indexes()
+            return app
+
+    Application().run()
+
+
+def run_prod() -> None:
+    workers = worker_count()
+    if find_spec("gunicorn"):
+        logger.info("Starting %d gunicorn workers (preload=%s)", workers, settings.API_PRELOAD)
+        _run_gunicorn(workers)
+        return
+
+    if settings.API_PRELOAD:
+        logger.info("gunicorn not installed; preload skipped, each worker builds its own indexes")
+    logger.info("Starting %d uvicorn workers", workers)
+    uvicorn.run(
+        APP_PATH,
+        host=settings.API_HOST,
+        port=settings.API_PORT,
+        workers=workers,
+        timeout_graceful_shutdown=settings.API_GRACEFUL_TIMEOUT_SECONDS
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the MechaniGo Chatbot API.")
+    parser.add_argument("--prod", action="store_true", help="multi-worker production mode")
+    args = parser.parse_args()
+
+    if args.prod or settings.ENV == Environment.PROD:
+        run_prod()
+    else:
+        run_dev()
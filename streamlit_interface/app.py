@@ -31,7 +31,11 @@ def send_request(message: str) -> tuple[str, float, float]:
     response = requests.post(
         API_URL,
         json={"message": message},
-        headers={"X-User-Id": st.session_state.session_id},
+        headers={
+            "X-User-Id": st.session_state.session_id,
+            # Same key on a retry, so the API replays the reply instead of rerunning the turn.
+            "Idempotency-Key": str(uuid.uuid5(uuid.NAMESPACE_URL, f"{st.session_state.session_id}:{len(st.session_state.chat_history)}:{message}"))
+        },
         timeout=30
     )
     response.raise_for_status()
@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+from pathlib import Path
+import sys
+import os
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Settings require these; tests never make network calls with them.
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SUPABASE_API_KEY", "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+
+
+class FakeQuery:
+    """
+    Just enough of the PostgREST builder for the `session_context` reads and writes.
+    """
+    def __init__(self, rows, op="select", row=None, ignore_duplicates=False):
+        self.rows = rows
+        self.op = op
+        self.row = row
+        self.ignore_duplicates = ignore_duplicates
+        self.filters = []
+
+    def select(self, *_):
+        return self
+
+    def update(self, row):
+        return FakeQuery(self.rows, "update", row)
+
+    def upsert(self, row, on_conflict="", ignore_duplicates=False):
+        return FakeQuery(self.rows, "upsert", row, ignore_duplicates)
+
+    def eq(self, column, value):
+        self.filters.append(lambda stored: stored[column] == value)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda stored: stored[column] > value)
+        return self
+
+    def limit(self, _):
+        return self
+
+    async def execute(self):
+        if self.op == "upsert":
+            stored = self.rows.get(self.row["session_id"])
+            if stored is not None and self.ignore_duplicates:
+                return SimpleNamespace(data=[])
+            self.rows[self.row["session_id"]] = dict(self.row)
+            return SimpleNamespace(data=[dict(self.row)])
+        matched = [stored for stored in self.rows.values() if all(match(stored) for match in self.filters)]
+        if self.op == "update":
+            for stored in matched:
+                stored.update(self.row)
+        return SimpleNamespace(data=[dict(stored) for stored in matched])
+
+
+@pytest.fixture
+def supabase_rows(monkeypatch):
+    """
+    In-memory `session_context` rows behind the session's Supabase client.
+    """
+    rows = {}
+
+    async def client():
+        return SimpleNamespace(table=lambda _: FakeQuery(rows))
+
+    monkeypatch.setattr(sys.modules["components.utils.SessionHandler"], "get_supabase_client", client)
+    return rows
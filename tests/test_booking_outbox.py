@@ -0,0 +1,134 @@
+import asyncio
+import sys
+
+from components.schemas import MechaniGoContext, User, UserInfoContext
+from components.utils.BookingOutbox import BookingOutbox
+from config import settings
+import components.tools.booking  # noqa: F401
+
+booking = sys.modules["components.tools.booking"]
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_workers_sharing_the_file_deliver_a_row_once(tmp_path):
+    delivered = []
+
+    async def deliver(user_id, payload):
+        await asyncio.sleep(0.01)
+        delivered.append((user_id, payload))
+
+    async def scenario():
+        path = str(tmp_path / "outbox.db")
+        first = BookingOutbox(path=path, deliver=deliver)
+        second = BookingOutbox(path=path, deliver=deliver)
+        key = await first.enqueue("u1", {"name": "Juan"})
+        await first.stop()
+        await asyncio.gather(first.process_due(), second.process_due())
+        return await first.get_status(key)
+
+    status = run(scenario())
+    assert delivered == [("u1", {"name": "Juan"})]
+    assert status["status"] == "delivered"
+
+
+def test_settle_callback_reports_delivery_and_failure(tmp_path):
+    settled = []
+
+    async def fail(user_id, payload):
+        raise RuntimeError("supabase down")
+
+    async def scenario():
+        outbox = BookingOutbox(path=str(tmp_path / "outbox.db"), deliver=fail, max_attempts=1)
+        await outbox.enqueue("u1", {"name": "Juan"}, on_settled=settled.append)
+        await outbox.stop()
+        await outbox.process_due()
+
+        async def ok(user_id, payload):
+            return None
+
+        outbox.deliver = ok
+        await outbox.enqueue("u2", {"name": "Maria"}, on_settled=settled.append)
+        await outbox.stop()
+        await outbox.process_due()
+        # Enqueuing an already-settled write reports its status right away.
+        await outbox.enqueue("u2", {"name": "Maria"}, on_settled=settled.append)
+        await outbox.stop()
+
+    run(scenario())
+    assert settled == ["failed", "delivered", "delivered"]
+
+
+def test_expired_lease_is_retried(tmp_path):
+    delivered = []
+
+    async def deliver(user_id, payload):
+        delivered.append(user_id)
+
+    async def scenario():
+        outbox = BookingOutbox(path=str(tmp_path / "outbox.db"), deliver=deliver, lease_seconds=-1)
+        key = await outbox.enqueue("u1", {"name": "Juan"})
+        await outbox.stop()
+        # A worker that claimed the row and died leaves it 'sending'.
+        await outbox._run("UPDATE booking_outbox SET status = 'sending' WHERE id = ?", (key,))
+        await outbox.process_due()
+        return await outbox.get_status(key)
+
+    assert run(scenario())["status"] == "delivered"
+    assert delivered == ["u1"]
+
+
+def test_failed_write_is_retried_when_enqueued_again(tmp_path):
+    settled = []
+    outcomes = [RuntimeError("supabase down"), None]
+
+    async def deliver(user_id, payload):
+        outcome = outcomes.pop(0)
+        if outcome is not None:
+            raise outcome
+
+    async def scenario():
+        outbox = BookingOutbox(path=str(tmp_path / "outbox.db"), deliver=deliver, max_attempts=1)
+        outbox.start = lambda: None
+        key = await outbox.enqueue("u1", {"name": "Juan"}, on_settled=settled.append)
+        await outbox.process_due()
+        await outbox.enqueue("u1", {"name": "Juan"}, on_settled=settled.append)
+        await outbox.process_due()
+        return await outbox.get_status(key)
+
+    status = run(scenario())
+    assert settled == ["failed", "delivered"]
+    assert status["status"] == "delivered"
+    assert status["attempts"] == 1
+
+
+def test_revert_while_a_write_is_queued_is_queued_too(tmp_path, monkeypatch):
+    delivered = []
+
+    async def deliver(user_id, payload):
+        delivered.append(payload)
+
+    monkeypatch.setattr(settings, "BOOKING_OUTBOX_ENABLED", True)
+    outbox = BookingOutbox(path=str(tmp_path / "outbox.db"), deliver=deliver)
+    # Delivered below, one pass at a time, instead of by the background worker.
+    monkeypatch.setattr(outbox, "start", lambda: None)
+    monkeypatch.setattr(booking, "_outbox", outbox)
+    context = MechaniGoContext(user_ctx=UserInfoContext(user_memory=User(uid="u1", service_type="PMS")))
+    context.booking_row = {"user_id": "u1", "service_type": "PMS"}
+
+    async def scenario():
+        context.user_ctx.user_memory.service_type = "Aircon cleaning"
+        first = await booking.save_booking(context)
+        context.user_ctx.user_memory.service_type = "PMS"
+        second = await booking.save_booking(context)
+        await outbox.process_due()
+        await outbox.process_due()
+        return first, second
+
+    first, second = run(scenario())
+    assert first["status"] == second["status"] == "queued"
+    assert delivered == [{"service_type": "Aircon cleaning"}, {"service_type": "PMS"}]
+    assert context.booking_row["service_type"] == "PMS"
+    assert context.booking_queued is None
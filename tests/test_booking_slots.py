@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+import asyncio
+import json
+import sys
+
+import pytest
+from agents.tool_context import ToolContext
+
+from config import PH_TZ
+from components.schemas import (
+    BookingAction, BookingSlotTracker, BookingStage, MechaniGoContext, User, UserCarDetails, UserInfoContext
+)
+from components.sub_agents import BookingAgent
+import components.tools.booking  # noqa: F401
+
+booking = sys.modules["components.tools.booking"]
+
+
+def complete_user(**overrides) -> User:
+    when = datetime.now(PH_TZ) + timedelta(days=3)
+    fields = dict(
+        name="Juan Dela Cruz",
+        email="juan@example.com",
+        address="12 Mabini St, Makati",
+        contact_num="09171234567",
+        service_type="PMS",
+        schedule_date=when.date().isoformat(),
+        schedule_time="10:00",
+        payment="GCash",
+        car=UserCarDetails(make="Toyota", model="Vios", year=2018),
+    )
+    fields.update(overrides)
+    return User(**fields)
+
+
+def test_missing_fields_are_asked_for():
+    tracker = BookingSlotTracker()
+    assert tracker.update(User(name="Juan")) == BookingAction.ASK_MISSING
+    directive = tracker.directive(User(name="Juan"))
+    assert directive["next_action"] == "ask_missing"
+    assert "name" not in directive["ask_for"]
+    assert "email" in directive["ask_for"]
+
+
+def test_invalid_contact_is_pending():
+    tracker = BookingSlotTracker()
+    assert tracker.update(complete_user(contact_num="12345")) == BookingAction.ASK_MISSING
+    assert tracker.pending() == ["contact_num"]
+
+
+def test_ambiguous_schedule_is_pending():
+    tracker = BookingSlotTracker()
+    user = complete_user(schedule_time=None)
+    action = tracker.update(user, schedule_follow_up="7AM po ba o 7PM?")
+    assert action == BookingAction.ASK_MISSING
+    assert tracker.directive(user)["follow_up"] == "7AM po ba o 7PM?"
+
+
+def test_stale_follow_up_does_not_block_a_filled_schedule():
+    tracker = BookingSlotTracker()
+    assert tracker.update(complete_user(), schedule_follow_up="7AM po ba o 7PM?") == BookingAction.CONFIRM
+
+
+def test_complete_record_is_confirmed_then_saved():
+    tracker = BookingSlotTracker()
+    user = complete_user()
+    assert tracker.update(user) == BookingAction.CONFIRM
+    assert tracker.stage == BookingStage.CONFIRMING
+    assert tracker.update(user, message="oo, tama") == BookingAction.SAVE
+
+    tracker.mark_saved(user)
+    assert tracker.update(user, message="salamat") == BookingAction.DONE
+    assert not tracker.in_progress
+
+
+@pytest.mark.parametrize("message", ["g", "hindi, palitan ang oras", "wait lang"])
+def test_non_confirmations_do_not_save(message):
+    tracker = BookingSlotTracker()
+    user = complete_user()
+    tracker.update(user)
+    assert tracker.update(user, message=message) == BookingAction.CONFIRM
+
+
+def test_changed_record_needs_a_new_confirmation():
+    tracker = BookingSlotTracker()
+    tracker.update(complete_user())
+    assert tracker.update(complete_user(payment="Cash"), message="yes") == BookingAction.CONFIRM
+
+
+def test_rendering_the_booking_state_does_not_change_it():
+    context = MechaniGoContext(user_ctx=UserInfoContext(user_memory=complete_user()))
+    agent = BookingAgent(api_key="test", context=context)
+    before = context.booking.model_dump()
+    note = agent.get_turn_context(context)
+    assert note.startswith("# Booking State")
+    assert context.booking.model_dump() == before
+
+
+def test_save_user_info_does_not_save_before_confirmation(monkeypatch):
+    saved = []
+
+    async def save_booking(context):
+        saved.append(context)
+        return {"status": "saved"}
+
+    monkeypatch.setattr(booking, "save_booking", save_booking)
+    context = MechaniGoContext(user_ctx=UserInfoContext(user_memory=complete_user()))
+    arguments = json.dumps({"payment": "Cash"})
+    result = asyncio.run(booking.save_user_info.on_invoke_tool(
+        ToolContext(context=context, tool_name="save_user_info", tool_call_id="call_1", tool_arguments=arguments),
+        arguments
+    ))
+    assert result["status"] == "needs_confirmation"
+    assert result["next_action"] == "confirm"
+    assert saved == []
+    assert context.booking.stage == BookingStage.CONFIRMING
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+from postgrest.exceptions import APIError
+
+from components.utils.CircuitBreaker import CircuitBreaker, CircuitOpenError, CircuitState, get_circuit_breaker
+from components.utils.Deadline import Deadline, DeadlineExceeded, deadline_scope, within_deadline
+from components.utils.SupabaseClient import is_supabase_outage, supabase_call
+
+
+def test_failures_open_the_circuit():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60, half_open_probes=1)
+
+    async def down():
+        raise ConnectionError("supabase down")
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await breaker.call(down)
+        with pytest.raises(CircuitOpenError):
+            await breaker.call(down)
+
+    asyncio.run(scenario())
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_deadline_inside_the_breaker_is_not_a_failure():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60, half_open_probes=1)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def scenario():
+        with deadline_scope(Deadline.after(0.01)):
+            with pytest.raises(DeadlineExceeded):
+                await breaker.call(lambda: within_deadline(slow(), stage="test"))
+
+    asyncio.run(scenario())
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.stats()["failures"] == 0
+
+
+def test_slow_supabase_calls_past_the_deadline_keep_the_circuit_closed():
+    breaker = get_circuit_breaker("supabase")
+    failures = breaker.stats()["failures"]
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def scenario():
+        for _ in range(breaker.failure_threshold + 1):
+            with deadline_scope(Deadline.after(0.01)):
+                with pytest.raises(DeadlineExceeded):
+                    await supabase_call(slow)
+
+    asyncio.run(scenario())
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.stats()["failures"] == failures
+
+
+@pytest.mark.parametrize(("error", "outage"), [
+    (ConnectionError("connection refused"), True),
+    (APIError({"code": "PGRST000", "message": "Could not connect with the database"}), True),
+    (APIError({"code": "57P01", "message": "terminating connection due to administrator command"}), True),
+    (APIError({"code": 503, "message": "JSON could not be generated"}), True),
+    (APIError({"code": "42P01", "message": "relation \"session_summary\" does not exist"}), False),
+    (APIError({"code": "PGRST204", "message": "Could not find the 'covered' column"}), False),
+    (APIError({"code": "23505", "message": "duplicate key value violates unique constraint"}), False),
+])
+def test_only_outages_count_against_supabase(error, outage):
+    assert is_supabase_outage(error) is outage
+
+
+def test_rejected_requests_keep_the_circuit_closed():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60, half_open_probes=1)
+
+    async def missing_table():
+        raise APIError({"code": "42P01", "message": "relation \"session_context\" does not exist"})
+
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(APIError):
+                await breaker.call(missing_table, is_failure=is_supabase_outage)
+
+    asyncio.run(scenario())
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.stats()["failures"] == 0
@@ -0,0 +1,32 @@
+import asyncio
+
+from components.utils.Hedging import HedgePolicy
+from config import settings
+
+
+def test_losing_attempt_finishes_and_is_recorded(monkeypatch):
+    monkeypatch.setattr(settings, "HEDGING_ENABLED", True)
+    monkeypatch.setattr(settings, "HEDGE_MIN_SAMPLES", 1)
+    monkeypatch.setattr(settings, "HEDGE_MIN_DELAY_SECONDS", 0.01)
+    delays = [0.2, 0.0]
+    losers = []
+
+    async def call():
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return delay
+
+    async def scenario():
+        policy = HedgePolicy(budget_ratio=1.0, burst=1.0)
+        policy._stats("guardrail").latencies.append(0.01)
+        result = await policy.run("guardrail", call, on_loser=losers.append)
+        await asyncio.sleep(0.3)
+        return result, policy
+
+    result, policy = asyncio.run(scenario())
+    stats = policy._stats("guardrail")
+    assert result == 0.0
+    assert losers == [0.2]
+    assert stats.hedge_wins == stats.losers == stats.losers_completed == 1
+    # The slow primary's time is a sample too, not just the winner's.
+    assert max(stats.latencies) >= 0.2
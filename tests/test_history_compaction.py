@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+from components.utils.SessionHandler import SessionHandler
+from components.utils.history_compaction import compact_history
+
+BOOKED = "Booked na po! Reference no. MG-10293. Darating ang mechanic namin sa Saturday, 9:00 AM."
+
+
+class LocalSession(SessionHandler):
+    async def persist_items(self):
+        self._pending_items = []
+
+
+def tool_step(n: str, name: str, output: str) -> list:
+    return [
+        {"id": f"rs_{n}", "type": "reasoning", "summary": []},
+        {
+            "id": f"fc_{n}", "type": "function_call", "call_id": f"call_{n}",
+            "name": name, "arguments": json.dumps({"input": "confirm"}), "status": "completed"
+        },
+        {"type": "function_call_output", "call_id": f"call_{n}", "output": output}
+    ]
+
+
+def reply(text: str) -> dict:
+    return {
+        "id": "msg_1", "type": "message", "role": "assistant", "status": "completed",
+        "content": [{"type": "output_text", "text": text, "annotations": []}]
+    }
+
+
+def run_turn(session: SessionHandler, batches: list) -> list:
+    async def scenario():
+        # As the Runner does: its input first, then each step's new items.
+        for batch in batches:
+            await session.add_items(batch)
+        assert session._local_history == []
+        await session.end_turn()
+        return list(session._local_history)
+
+    return asyncio.run(scenario())
+
+
+def test_relayed_tool_output_is_dropped_across_steps():
+    batches = [
+        [{"role": "user", "content": "confirm"}],
+        tool_step("1", "booking_agent", BOOKED),
+        [reply(BOOKED + " Salamat po!")]
+    ]
+    # Compacted one step at a time, the tool step can't see the reply that relays it.
+    assert compact_history(batches[1])[0][0]["content"].startswith("[tool booking_agent(")
+
+    assert run_turn(LocalSession("s1"), batches) == [
+        {"role": "user", "content": "confirm"},
+        {"role": "assistant", "content": BOOKED + " Salamat po!"}
+    ]
+
+
+def test_unrelayed_tool_output_becomes_a_note():
+    faq = json.dumps({"answer": "PMS starts at PHP 3,500.", "matches": [{"score": 0.9}]})
+    batches = [
+        [{"role": "user", "content": "Magkano PMS?"}],
+        tool_step("2", "knowledge_faq_tool", faq),
+        [reply("Nasa PHP 3,500 po.")]
+    ]
+
+    history = run_turn(LocalSession("s1"), batches)
+    assert [item["role"] for item in history] == ["user", "developer", "assistant"]
+    assert history[1]["content"].startswith("[tool knowledge_faq_tool(")
+    assert history[2]["content"] == "Nasa PHP 3,500 po."
+    # Stored among the replies to keep its place in the turn, read back as a note.
+    assert SessionHandler._stored_role(history[1]) == "assistant"
+    assert SessionHandler._restore_turn_order({
+        "user": ["Magkano PMS?"], "assistant": [history[1]["content"], history[2]["content"]]
+    }) == history
+
+
+def test_degraded_reply_joins_the_buffered_input():
+    session = LocalSession("s1")
+
+    async def scenario():
+        await session.add_items([{"role": "user", "content": "oo"}])
+        # The run timed out; only the fallback reply is added to what it handed over.
+        await session.end_turn([{"role": "assistant", "content": "Sandali lang po."}])
+        return list(session._local_history)
+
+    assert asyncio.run(scenario()) == [
+        {"role": "user", "content": "oo"},
+        {"role": "assistant", "content": "Sandali lang po."}
+    ]
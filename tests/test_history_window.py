@@ -0,0 +1,58 @@
+from components.utils.SessionHandler import SessionHandler
+from components.utils.history_window import is_chronological, is_pinned, split_turns, window_history
+
+
+def user(text: str) -> dict:
+    return {"role": "user", "content": text}
+
+
+def assistant(text: str) -> dict:
+    return {"role": "assistant", "content": text}
+
+
+def note(text: str) -> dict:
+    return {"role": "developer", "content": text}
+
+
+def test_stored_rows_are_put_back_in_turn_order():
+    history = SessionHandler._restore_turn_order({
+        "user": ["hi", "PMS po", "oo"],
+        "assistant": ["hello po", "[tool knowledge_faq_tool(PMS)] PHP 3,500", "PHP 3,500 po", "Sige po"]
+    })
+    assert history == [
+        user("hi"), assistant("hello po"),
+        user("PMS po"), note("[tool knowledge_faq_tool(PMS)] PHP 3,500"), assistant("PHP 3,500 po"),
+        user("oo"), assistant("Sige po")
+    ]
+    assert [len(turn) for turn in split_turns(history)] == [2, 3, 2]
+    # Tool notes go with their turn; only summaries and the like are pinned.
+    assert not is_pinned(history[3])
+
+
+def test_latest_message_may_be_unanswered():
+    history = SessionHandler._restore_turn_order({"user": ["hi", "PMS po"], "assistant": ["hello po"]})
+    assert history == [user("hi"), assistant("hello po"), user("PMS po")]
+
+
+def test_unpairable_rows_stay_grouped_and_are_not_windowed():
+    history = SessionHandler._restore_turn_order({"user": ["a", "b", "c"], "assistant": ["x"]})
+    assert history == [user("a"), user("b"), user("c"), assistant("x")]
+    assert not is_chronological(history)
+
+    items, stats = window_history(history, [user("d")], budget=1)
+    assert items == history + [user("d")]
+    assert stats["items_dropped"] == 0
+
+
+def test_window_keeps_recent_turns_and_pinned_notes():
+    summary = {"role": "developer", "content": "Summary of the earlier conversation:\nBooked PMS."}
+    history = [summary]
+    for n in range(6):
+        history += [user(f"question {n} " + "x" * 200), assistant(f"answer {n} " + "y" * 200)]
+
+    items, stats = window_history(history, [user("next")], budget=300, min_turns=1)
+    assert items[0] == summary
+    assert items[-1] == user("next")
+    assert items[-3]["content"].startswith("question 5")
+    assert stats["items_dropped"] > 0
+    assert all(not item["content"].startswith("question 0") for item in items)
@@ -0,0 +1,67 @@
+import asyncio
+
+from api.idempotency import IdempotencyCache, request_key
+
+
+def test_keys_are_scoped_to_the_session():
+    assert request_key("s1", "oo")[0] != request_key("s2", "oo")[0]
+    assert request_key("s1", "oo", "abc")[0] != request_key("s2", "oo", "abc")[0]
+    assert request_key("s1", "oo", "abc")[0] != request_key("s1", "oo")[0]
+
+
+def test_only_explicit_keys_are_replayed_after_finishing():
+    _, implicit_ttl = request_key("s1", "oo")
+    _, explicit_ttl = request_key("s1", "oo", "abc")
+    assert implicit_ttl == 0
+    assert explicit_ttl > 0
+
+
+def test_repeated_implicit_message_is_a_new_turn():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return len(calls)
+
+    async def scenario():
+        cache = IdempotencyCache()
+        key, ttl = request_key("s1", "oo")
+        first = await cache.run(key, compute, ttl)
+        second = await cache.run(key, compute, ttl)
+        return first, second
+
+    assert asyncio.run(scenario()) == ((1, False), (2, False))
+
+
+def test_in_flight_duplicates_share_one_computation():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "reply"
+
+    async def scenario():
+        cache = IdempotencyCache()
+        key, ttl = request_key("s1", "oo")
+        return await asyncio.gather(cache.run(key, compute, ttl), cache.run(key, compute, ttl))
+
+    assert asyncio.run(scenario()) == [("reply", False), ("reply", True)]
+    assert len(calls) == 1
+
+
+def test_explicit_key_replays_the_stored_result():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return "reply"
+
+    async def scenario():
+        cache = IdempotencyCache()
+        key, ttl = request_key("s1", "oo", "retry-1")
+        await cache.run(key, compute, ttl)
+        return await cache.run(key, compute, ttl)
+
+    assert asyncio.run(scenario()) == ("reply", True)
+    assert len(calls) == 1
@@ -0,0 +1,131 @@
+from datetime import date, datetime, time
+import asyncio
+import json
+import sys
+
+import pytest
+from agents.tool_context import ToolContext
+
+from config import PH_TZ
+from components.schemas import MechaniGoContext, User, UserInfoContext
+from components.utils.schedule_parser import parse_schedule, resolve_follow_up
+from components.utils.local_extraction import extract_local_fields
+import components.tools.extraction  # noqa: F401
+
+extraction = sys.modules["components.tools.extraction"]
+
+# Monday, June 2 2025, 9:00 AM in Manila.
+NOW = PH_TZ.localize(datetime(2025, 6, 2, 9, 0))
+
+
+@pytest.mark.parametrize("text, expected_date, expected_time", [
+    ("bukas ng 3pm", date(2025, 6, 3), time(15, 0)),
+    ("sa Sabado alas-dos ng hapon", date(2025, 6, 7), time(14, 0)),
+    ("Dec 20 10am", date(2025, 12, 20), time(10, 0)),
+    ("ngayon 3pm", date(2025, 6, 2), time(15, 0)),
+    ("tomorrow at 10", date(2025, 6, 3), time(10, 0)),
+])
+def test_complete_schedules(text, expected_date, expected_time):
+    parsed = parse_schedule(text, NOW)
+    assert parsed is not None and parsed.is_complete
+    assert parsed.date == expected_date
+    assert parsed.time == expected_time
+
+
+@pytest.mark.parametrize("text", [
+    "Ako si Tom Reyes, 09171234567",
+    "may tagas yung sun roof ko",
+    "hindi lumalamig ngayon yung aircon",
+    "mon, ang ingay ng makina",
+    "isang linggo na yung ilaw sa dashboard",
+    "Friday ko pa napansin yung tunog",
+])
+def test_everyday_words_are_not_schedules(text):
+    assert parse_schedule(text, NOW) is None
+
+
+@pytest.mark.parametrize("text, expected_date", [
+    ("sa Linggo po", date(2025, 6, 8)),
+    ("next Friday 10am", date(2025, 6, 13)),
+    ("on Sunday morning", date(2025, 6, 8)),
+    ("Saturday 2pm", date(2025, 6, 7)),
+])
+def test_weekday_with_cue(text, expected_date):
+    parsed = parse_schedule(text, NOW)
+    assert parsed is not None
+    assert parsed.date == expected_date
+
+
+def test_ambiguous_hour_asks_meridiem():
+    parsed = parse_schedule("sa Sabado 7", NOW)
+    assert parsed.ambiguity == "meridiem"
+    assert parsed.follow_up
+    assert "schedule_time" not in parsed.to_payload()
+
+
+def test_name_survives_local_extraction():
+    local = extract_local_fields("Ako si Tom Reyes, 09171234567", NOW)
+    assert local.payload == {"contact_num": "09171234567"}
+    assert local.schedule is None
+    assert "Tom Reyes" in local.residual
+
+
+def test_incomplete_schedule_stays_in_residual():
+    local = extract_local_fields("sa Sabado po", NOW)
+    assert local.payload["schedule_date"] == "2025-06-07"
+    assert not local.schedule.is_complete
+    assert "Sabado" in local.residual
+
+
+def test_complete_schedule_is_stripped_from_residual():
+    local = extract_local_fields("bukas 3pm, GCash", NOW)
+    assert local.payload["schedule_time"] == "15:00"
+    assert local.payload["payment"] == "GCash"
+    assert local.residual == ""
+
+
+@pytest.mark.parametrize("first, answer, expected_date, expected_time", [
+    ("sa Sabado 7", "PM po", date(2025, 6, 7), time(19, 0)),
+    ("sa Sabado 7", "umaga", date(2025, 6, 7), time(7, 0)),
+    ("next Friday 10am", "yung susunod po", date(2025, 6, 13), time(10, 0)),
+    ("next Friday 10am", "ngayong linggo", date(2025, 6, 6), time(10, 0)),
+    ("sa Sabado umaga", "mga 9 po", date(2025, 6, 7), time(9, 0)),
+    ("sa Sabado 7", "bukas 3pm na lang", date(2025, 6, 3), time(15, 0)),
+])
+def test_follow_up_answer_resolves_the_schedule(first, answer, expected_date, expected_time):
+    pending = parse_schedule(first, NOW).pending()
+    resolved = resolve_follow_up(pending, answer, NOW)
+    assert resolved is not None and resolved.is_complete
+    assert (resolved.date, resolved.time) == (expected_date, expected_time)
+
+
+def test_unrelated_answer_leaves_the_question_open():
+    pending = parse_schedule("sa Sabado 7", NOW).pending()
+    assert resolve_follow_up(pending, "salamat po", NOW) is None
+
+
+def test_extraction_clears_the_follow_up_once_answered(monkeypatch):
+    async def no_llm(text, missing, context=None):
+        return {}
+
+    monkeypatch.setattr(extraction, "_extract_with_llm", no_llm)
+    context = MechaniGoContext(user_ctx=UserInfoContext(user_memory=User()))
+
+    async def say(text):
+        arguments = json.dumps({"text": text})
+        return await extraction.extract_user_info.on_invoke_tool(
+            ToolContext(
+                context=context, tool_name="extract_user_info", tool_call_id="call_1", tool_arguments=arguments
+            ),
+            arguments
+        )
+
+    asyncio.run(say("sa Sabado 7"))
+    assert context.user_ctx.schedule_follow_up.startswith("7AM po ba o 7PM")
+    assert context.user_ctx.user_memory.schedule_time is None
+
+    result = asyncio.run(say("PM po"))
+    assert context.user_ctx.schedule_follow_up is None
+    assert context.user_ctx.schedule_pending is None
+    assert context.user_ctx.user_memory.schedule_time == "19:00"
+    assert "schedule date and time" not in result["ask_for"]
@@ -0,0 +1,40 @@
+import asyncio
+import sys
+
+from components.schemas import MechaniGoContext, User, UserInfoContext
+from components.utils.SessionHandler import SessionHandler
+
+session_module = sys.modules["components.utils.SessionHandler"]
+
+
+def context(name: str) -> MechaniGoContext:
+    return MechaniGoContext(user_ctx=UserInfoContext(user_memory=User(name=name)))
+
+
+def test_stale_context_write_loses_and_reloads(supabase_rows):
+    rows = supabase_rows
+
+    async def scenario():
+        first, second = SessionHandler("s1"), SessionHandler("s1")
+        first_ctx, second_ctx = context("Juan"), context("Maria")
+
+        await first.stage_context(first_ctx)
+        await first.persist_items()
+        await second.load_context(second_ctx)
+        assert second_ctx.user_ctx.user_memory.name == "Juan"
+
+        # Both workers move on from version 1; the second one writes first.
+        second_ctx.user_ctx.user_memory.name = "Maria"
+        await second.stage_context(second_ctx)
+        await second.persist_items()
+        first_ctx.user_ctx.user_memory.name = "Pedro"
+        await first.stage_context(first_ctx)
+        await first.persist_items()
+        return first, first_ctx
+
+    first, first_ctx = asyncio.run(scenario())
+    assert rows["s1"]["version"] == 2
+    assert rows["s1"]["context"]["user_ctx"]["user_memory"]["name"] == "Maria"
+    assert first.context_version == 2
+    assert first_ctx.user_ctx.user_memory.name == "Maria"
+    assert session_module.get_session_stats()["context_conflicts"] >= 1
@@ -0,0 +1,117 @@
+import asyncio
+import sys
+
+from components.utils.SessionHandler import SUMMARY_PREFIX, SessionHandler
+from components.utils.Summarizer import SessionSummarizer
+from config import settings
+
+summarizer_module = sys.modules["components.utils.Summarizer"]
+
+
+def user(text: str) -> dict:
+    return {"role": "user", "content": text}
+
+
+def assistant(text: str) -> dict:
+    return {"role": "assistant", "content": text}
+
+
+def session_with(history):
+    session = SessionHandler("s1")
+    session._local_history = list(history)
+    session._summary_loaded = True
+
+    async def read_items(limit=None):
+        return list(session._local_history)
+
+    async def save_summary(summary, covers):
+        session.summary, session.summary_covers = summary, list(covers)
+
+    session._read_items = read_items
+    session.save_summary = save_summary
+    return session
+
+
+def test_repeated_messages_after_the_summary_stay_visible(monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARY_KEEP_TURNS", 2)
+    excerpts = []
+
+    async def summarize(previous, items):
+        excerpts.append(items)
+        return "Customer booked PMS."
+
+    monkeypatch.setattr(summarizer_module, "_summarize", summarize)
+    history = [
+        user("PMS po"), assistant("Kailan po?"),
+        user("oo"), assistant("Sige po"),
+        user("oo"), assistant("Sige po"),
+        user("oo"), assistant("Sige po"),
+    ]
+    session = session_with(history)
+
+    assert asyncio.run(SessionSummarizer().summarize(session))
+    assert excerpts == [history[:4]]
+
+    items = asyncio.run(session.get_items())
+    assert items[0] == {"role": "developer", "content": SUMMARY_PREFIX + "Customer booked PMS."}
+    assert items[1:] == history[4:]
+
+
+def test_next_summary_continues_after_the_covered_items(monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARY_KEEP_TURNS", 1)
+    excerpts = []
+
+    async def summarize(previous, items):
+        excerpts.append((previous, items))
+        return f"summary {len(excerpts)}"
+
+    monkeypatch.setattr(summarizer_module, "_summarize", summarize)
+    history = [user("oo"), assistant("Sige po"), user("oo"), assistant("Sige po")]
+    session = session_with(history)
+    asyncio.run(SessionSummarizer().summarize(session))
+    session._local_history += [user("oo"), assistant("Sige po")]
+    asyncio.run(SessionSummarizer().summarize(session))
+
+    assert excerpts == [(None, history[:2]), ("summary 1", history[2:])]
+    assert asyncio.run(session.get_items())[1:] == [user("oo"), assistant("Sige po")]
+
+
+def test_role_grouped_history_is_not_summarized(monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARY_KEEP_TURNS", 1)
+
+    async def summarize(previous, items):
+        raise AssertionError("should not be called")
+
+    monkeypatch.setattr(summarizer_module, "_summarize", summarize)
+    session = session_with([user("a"), user("b"), user("c"), assistant("x")])
+    assert not asyncio.run(SessionSummarizer().summarize(session))
+
+
+def test_failed_summary_read_backs_off(monkeypatch):
+    attempts = []
+
+    async def unavailable():
+        attempts.append(1)
+        raise ConnectionError("supabase down")
+
+    async def summarize(previous, items):
+        raise AssertionError("should not be called")
+
+    monkeypatch.setattr(sys.modules["components.utils.SessionHandler"], "get_supabase_client", unavailable)
+    monkeypatch.setattr(summarizer_module, "_summarize", summarize)
+    monkeypatch.setattr(settings, "SUMMARY_KEEP_TURNS", 1)
+    history = [user("oo"), assistant("Sige po"), user("oo"), assistant("Sige po")]
+    session = session_with(history)
+    session._summary_loaded = False
+
+    async def scenario():
+        first = await session.get_items()
+        second = await session.get_items()
+        # Without the stored summary, a new one could drop what it already covered.
+        summarized = await SessionSummarizer().summarize(session)
+        return first, second, summarized
+
+    first, second, summarized = asyncio.run(scenario())
+    assert first == second == history
+    assert not summarized
+    assert len(attempts) == 1
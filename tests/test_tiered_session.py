@@ -0,0 +1,55 @@
+import asyncio
+import sys
+
+from components.schemas import MechaniGoContext, User, UserInfoContext
+from components.utils.TieredSession import TieredSession
+
+tiered_module = sys.modules["components.utils.TieredSession"]
+
+
+def message(role: str, text: str) -> dict:
+    return {"role": role, "content": text}
+
+
+def test_stale_l1_is_dropped_even_when_l2_caught_up(supabase_rows, tmp_path):
+    path = str(tmp_path / "sessions.db")
+    fresh = [message("user", "hi"), message("assistant", "hello po"), message("user", "PMS po")]
+
+    async def scenario():
+        session = TieredSession("s1", l2_path=path)
+        # This worker's L1 copy was filled at version 1 ...
+        session.context_version = 1
+        session._l1_put(fresh[:2])
+        # ... then another worker on the node wrote version 2 and brought the shared L2 up to date.
+        other = TieredSession("s1", l2_path=path)
+        other.context_version = 2
+        await other._write_l2(fresh)
+        supabase_rows["s1"] = {
+            "session_id": "s1",
+            "context": MechaniGoContext(user_ctx=UserInfoContext(user_memory=User(name="Juan"))).model_dump(mode="json"),
+            "version": 2
+        }
+
+        replaced = await session.load_context(MechaniGoContext(user_ctx=UserInfoContext(user_memory=User())))
+        return replaced, await session._read_items()
+
+    replaced, items = asyncio.run(scenario())
+    assert replaced
+    assert items == fresh
+    assert tiered_module._L1["s1"][0] == 2
+    tiered_module._L1.pop("s1", None)
+
+
+def test_l1_from_an_older_version_is_not_served(tmp_path):
+    session = TieredSession("s2", l2_path=str(tmp_path / "sessions.db"))
+    session.context_version = 1
+    session._l1_put([message("user", "hi")])
+    session.context_version = 2
+
+    async def unavailable():
+        raise ConnectionError("supabase down")
+
+    # L2 is empty and Supabase is down, so the read ends at the local history.
+    session._fetch_history = unavailable
+    asyncio.run(session._read_items())
+    assert "s2" not in tiered_module._L1
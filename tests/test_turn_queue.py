@@ -0,0 +1,24 @@
+import asyncio
+
+from api.turn_queue import TurnQueue
+
+
+def test_only_the_last_message_of_a_burst_gets_the_reply():
+    inquiries = []
+
+    async def run(inquiry):
+        inquiries.append(inquiry)
+        return f"reply to {len(inquiries)}"
+
+    async def scenario():
+        queue = TurnQueue(debounce=0.05, max_wait=1.0, max_batch=5)
+        return await asyncio.gather(*(
+            queue.submit("s1", text, run) for text in ("hi", "yung aircon ko", "hindi lumalamig")
+        ))
+
+    first, second, last = asyncio.run(scenario())
+    assert inquiries == ["hi\nyung aircon ko\nhindi lumalamig"]
+    assert last.result == "reply to 1" and not last.merged
+    for turn in (first, second):
+        assert turn.merged and turn.result is None
+        assert turn.turn_id == last.turn_id and turn.batch_size == 3